@@ -0,0 +1 @@
+"""Scripts de mesure de performance du moteur de recommandation."""
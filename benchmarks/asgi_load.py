@@ -0,0 +1,167 @@
+"""
+Test de charge : workers gunicorn synchrones (WSGI, vues synchrones) contre
+workers uvicorn (ASGI, ``ASYNC_VIEWS``), au même nombre de workers.
+
+Pour chaque mode, le script démarre gunicorn avec les réglages Django
+courants (``DJANGO_SETTINGS_MODULE``) et l'API météo factice du banc de
+charge (``loadtest.weather_stub``), qui répond après ``--weather-delay``
+secondes (amont lent). Des utilisateurs
+virtuels connectés (formulaire de connexion avec jeton CSRF) enchaînent
+ensuite pendant ``--duration`` secondes la page d'accueil (appel météo) et
+des recommandations ``POST /recommend/`` sur des titres du catalogue.
+
+Rapporte le débit, les latences p50 / p95 par page et le nombre d'erreurs.
+L'utilisateur ``--username`` doit exister dans la base des réglages.
+
+Usage :
+    python -m benchmarks.asgi_load --workers 2 --concurrency 32 --username u --password p
+    python -m benchmarks.asgi_load --modes uvicorn --weather-delay 1 --weather-ttl 0
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from loadtest.scenario import login, wait_ready
+from loadtest.weather_stub import start_weather_stub
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SERVERS = {
+    'sync': ['cinetopia.wsgi:application'],
+    'uvicorn': ['cinetopia.asgi:application', '--worker-class', 'uvicorn.workers.UvicornWorker'],
+}
+
+
+def start_server(mode, args, port, weather_port):
+    """Démarre gunicorn dans le mode ``mode`` ; retourne le processus."""
+    env = dict(
+        os.environ,
+        ASYNC_VIEWS='True' if mode == 'uvicorn' else 'False',
+        WEATHER_API_KEY='loadtest',
+        WEATHER_API_SCHEME='http',
+        WEATHER_API_HOST=f'127.0.0.1:{weather_port}',
+        WEATHER_CACHE_TTL=str(args.weather_ttl),
+        WEATHER_CACHE_STALE_TTL='0',
+    )
+    command = [
+        sys.executable, '-m', 'gunicorn', *SERVERS[mode],
+        '--workers', str(args.workers), '--bind', f'127.0.0.1:{port}', '--timeout', '300',
+    ]
+    return subprocess.Popen(
+        command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+async def virtual_user(client, base_url, titles, deadline, home_ratio, latencies, errors):
+    """Enchaîne les requêtes jusqu'à ``deadline`` ; consigne latences et erreurs."""
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        if random.random() < home_ratio:
+            page = 'home'
+            response = await client.get(f'{base_url}/home/')
+            ok = response.status_code == 200
+        else:
+            page = 'recommend'
+            response = await client.post(
+                f'{base_url}/recommend/', data={'movie_name': random.choice(titles)},
+                headers={'X-CSRFToken': client.cookies['csrftoken'], 'Referer': f'{base_url}/recommend/'},
+            )
+            ok = response.status_code == 200 and response.json().get('success')
+        latencies[page].append((time.perf_counter() - start) * 1000)
+        if not ok:
+            errors[page] += 1
+
+
+async def run_mode(mode, args, titles, weather_port):
+    import httpx
+
+    port = args.port
+    base_url = f'http://127.0.0.1:{port}'
+    server = start_server(mode, args, port, weather_port)
+    clients = []
+    try:
+        async with httpx.AsyncClient(timeout=60) as probe:
+            await wait_ready(probe, base_url)
+
+        for _ in range(args.concurrency):
+            client = httpx.AsyncClient(timeout=120)
+            await login(client, base_url, args.username, args.password)
+            clients.append(client)
+
+        latencies = {'home': [], 'recommend': []}
+        errors = {'home': 0, 'recommend': 0}
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            virtual_user(client, base_url, titles, deadline, args.home_ratio, latencies, errors)
+            for client in clients
+        ))
+        elapsed = time.monotonic() - started
+    finally:
+        for client in clients:
+            await client.aclose()
+        server.terminate()
+        server.wait()
+
+    total = sum(len(values) for values in latencies.values())
+    row = f"{mode:<9}{total / elapsed:>9.1f}"
+    for page in ('home', 'recommend'):
+        values = latencies[page] or [float('nan')]
+        p50, p95 = np.percentile(values, [50, 95])
+        row += f"{p50:>10.0f}{p95:>10.0f}"
+    print(f"{row}{sum(errors.values()):>9}", flush=True)
+
+
+def catalog_titles(limit=2000):
+    """Titres du catalogue des réglages courants."""
+    import pandas as pd
+    from benchmarks.common import setup_django
+
+    setup_django()
+    from django.conf import settings
+
+    names = pd.read_csv(settings.RECOMMENDER_DATA_PATH, usecols=['Nom'], nrows=limit)['Nom']
+    return names.dropna().astype(str).tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Workers gunicorn synchrones vs uvicorn.")
+    parser.add_argument('--modes', nargs='+', default=list(SERVERS), choices=list(SERVERS))
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=32, help="Utilisateurs virtuels.")
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--home-ratio', type=float, default=0.5,
+                        help="Part des requêtes vers la page d'accueil (appel météo).")
+    parser.add_argument('--weather-delay', type=float, default=0.5,
+                        help="Latence de l'API météo factice (secondes).")
+    parser.add_argument('--weather-ttl', type=int, default=0,
+                        help="WEATHER_CACHE_TTL des serveurs (0 : chaque page interroge l'API).")
+    parser.add_argument('--username', default='loadtest')
+    parser.add_argument('--password', default='loadtest')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    titles = catalog_titles()
+    # Une ligne de journal par requête sinon
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    weather = start_weather_stub(latency=args.weather_delay)
+    print(f"{args.workers} workers, {args.concurrency} utilisateurs, {args.duration:.0f}s, "
+          f"API météo {args.weather_delay * 1000:.0f} ms, {os.cpu_count()} cœurs")
+    print(f"{'mode':<9}{'req/s':>9}{'home p50':>10}{'p95':>10}{'reco p50':>10}{'p95':>10}{'erreurs':>9}")
+    try:
+        for mode in args.modes:
+            asyncio.run(run_mode(mode, args, titles, weather.server_address[1]))
+    finally:
+        weather.shutdown()
+
+
+if __name__ == '__main__':
+    main()
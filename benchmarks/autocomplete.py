@@ -0,0 +1,64 @@
+"""
+Latence de l'autocomplétion des titres (``TrigramIndex``).
+
+Simule une saisie caractère par caractère de titres du catalogue, avec une
+faute de frappe sur une partie des requêtes, et mesure le temps de réponse
+par frappe.
+
+Usage :
+    python -m benchmarks.autocomplete --rows 100000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import generate_catalog
+from myapp_cinetopia.title_index import TrigramIndex
+
+
+def _with_typo(rng, text):
+    """Remplace un caractère au hasard, comme une faute de frappe."""
+    if len(text) < 4:
+        return text
+    position = rng.integers(1, len(text))
+    return text[:position] + 'x' + text[position + 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence de l'autocomplétion des titres.")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--typo-rate', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    titles = generate_catalog(args.rows, seed=args.seed)['Nom']
+    start = time.perf_counter()
+    index = TrigramIndex(titles)
+    build_time = time.perf_counter() - start
+    print(f"Index: {len(index)} titres distincts construits en {build_time:.2f} s")
+
+    rng = np.random.default_rng(args.seed)
+    samples = titles.sample(args.queries, random_state=args.seed)
+    timings = []
+    for title in samples:
+        if rng.random() < args.typo_rate:
+            title = _with_typo(rng, title)
+        # Une requête par frappe, comme le champ de recherche
+        for length in range(1, len(title) + 1):
+            start = time.perf_counter()
+            index.search(title[:length])
+            timings.append(time.perf_counter() - start)
+
+    timings = np.array(timings) * 1e6
+    print(f"{len(timings)} frappes simulées")
+    print(
+        f"latence (µs) : moyenne {timings.mean():.0f}, p50 {np.percentile(timings, 50):.0f}, "
+        f"p95 {np.percentile(timings, 95):.0f}, p99 {np.percentile(timings, 99):.0f}, "
+        f"max {timings.max():.0f}"
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Débit de la recommandation groupée (``recommend_many``) comparé à une boucle
+sur ``recommend_movies``.
+
+Usage :
+    python -m benchmarks.batch --rows 20000 --batch-sizes 10 100 1000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import synthetic_service
+
+
+def _throughput(function, titles, repeat):
+    """Titres traités par seconde (meilleur de ``repeat`` essais)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(titles)
+        best = min(best, time.perf_counter() - start)
+    return len(titles) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit de la recommandation groupée.")
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--n-neighbors', type=int, default=10)
+    parser.add_argument('--top-k', type=int, default=0,
+                        help="Voisins précalculés (0 : recherche exhaustive en direct).")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    service = synthetic_service(args.rows, top_k=args.top_k)
+    catalog_titles = service.catalog.column('Nom').tolist()
+    k = args.n_neighbors
+
+    def loop(titles):
+        return [service.recommend_movies(title, n_neighbors=k) for title in titles]
+
+    def batch(titles):
+        return service.recommend_many(titles, n_neighbors=k)
+
+    mode = f"table top-{args.top_k}" if args.top_k else "recherche exhaustive"
+    print(f"Catalogue: {args.rows} films, k={k}, {mode}")
+    print(f"{'lot':>6}{'boucle (titres/s)':>20}{'groupé (titres/s)':>20}{'gain':>8}")
+    for size in args.batch_sizes:
+        rows = np.random.default_rng(size).integers(len(catalog_titles), size=size)
+        titles = [catalog_titles[row] for row in rows]
+        assert loop(titles) == batch(titles)
+        looped = _throughput(loop, titles, args.repeat)
+        batched = _throughput(batch, titles, args.repeat)
+        print(f"{size:>6}{looped:>20.0f}{batched:>20.0f}{batched / looped:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
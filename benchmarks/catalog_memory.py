@@ -0,0 +1,123 @@
+"""
+Mémoire des colonnes textuelles du catalogue conservées par chaque worker.
+
+Compare, pour chaque taille de catalogue :
+
+- ``DataFrame complet`` : l'ancien ``data`` d'un worker ayant entraîné le
+  modèle (toutes les colonnes du CSV, ``keywords`` et ``combined_features``) ;
+- ``DataFrame catalogue`` : l'ancien ``catalog.pkl`` relu depuis un artefact
+  (colonnes d'affichage et de filtrage, en objets ``str``) ;
+- ``CompactCatalog`` : la table de chaînes internées et les codes.
+
+Les tailles des ``DataFrame`` sont mesurées avec ``memory_usage(deep=True)``.
+La latence est celle de la lecture des colonnes d'affichage d'une ligne.
+
+Le tas privé d'un worker qui relit le catalogue depuis un artefact est aussi
+mesuré (``tracemalloc``) : ``catalog.pkl`` dépicklé d'une part, tableaux du
+``CompactCatalog`` ouverts en ``memmap`` d'autre part (pages partagées entre
+workers, hors tas privé).
+
+Usage :
+    python -m benchmarks.catalog_memory --rows 20000 100000 500000
+"""
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_catalog
+from myapp_cinetopia.catalog import CATALOG_COLUMNS, CompactCatalog
+from myapp_cinetopia.features import preprocess
+
+DISPLAY_COLUMNS = [
+    'Nom', 'Lien_de_l_affiche', 'Nom_du_réalisateur',
+    'Noms_de_tous_les_acteurs', 'Synopsis',
+]
+
+
+def _frame_bytes(frame):
+    return int(frame.memory_usage(deep=True, index=True).sum())
+
+
+def _retained(load):
+    """Mémoire du tas (octets) encore allouée par l'objet retourné par ``load``."""
+    gc.collect()
+    tracemalloc.start()
+    loaded = load()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del loaded
+    return size
+
+
+def _artifact_heaps(frame, catalog):
+    """Tas privé retenu par le catalogue relu depuis un artefact : pickle, puis memmap."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        frame.to_pickle(tmp / 'catalog.pkl')
+        names = ('codes', 'buffer', 'offsets')
+        for name, array in zip(names, catalog.arrays()):
+            np.save(tmp / f'{name}.npy', array)
+
+        def load_compact():
+            arrays = [np.load(tmp / f'{name}.npy', mmap_mode='r') for name in names]
+            return CompactCatalog.from_arrays(catalog.columns, *arrays)
+
+        return _retained(lambda: pd.read_pickle(tmp / 'catalog.pkl')), _retained(load_compact)
+
+
+def _record_latency(read, rows):
+    """Latence moyenne (µs) de la lecture des colonnes d'affichage d'une ligne."""
+    start = time.perf_counter()
+    for row in rows:
+        read(row)
+    return (time.perf_counter() - start) / len(rows) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mémoire des colonnes textuelles du catalogue.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[20000, 100000])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'films':>8}  {'représentation':<22}{'mémoire (Mo)':>13}{'rapport':>9}{'lecture (µs)':>14}")
+    for n_rows in args.rows:
+        data = generate_catalog(n_rows, seed=args.seed)
+        # Noms de colonnes tels que renommés par le service au chargement du CSV
+        data = data.rename(columns={"Lien de l'affiche": 'Lien_de_l_affiche'})
+        data.columns = [col.replace(' ', '_') for col in data.columns]
+        data = preprocess(data)
+        frame = data[CATALOG_COLUMNS].reset_index(drop=True)
+        start = time.perf_counter()
+        catalog = CompactCatalog.from_frame(data)
+        build_time = time.perf_counter() - start
+        rows = np.random.default_rng(args.seed).integers(n_rows, size=10000)
+
+        display = {col: frame[col].to_numpy() for col in DISPLAY_COLUMNS}
+        frame_latency = _record_latency(
+            lambda row: {col: values[row] for col, values in display.items()}, rows
+        )
+        compact_latency = _record_latency(lambda row: catalog.record(row, DISPLAY_COLUMNS), rows)
+
+        compact = catalog.nbytes
+        for label, size, latency in [
+            ('DataFrame complet', _frame_bytes(data), frame_latency),
+            ('DataFrame catalogue', _frame_bytes(frame), frame_latency),
+            ('CompactCatalog', compact, compact_latency),
+        ]:
+            print(f"{n_rows:>8}  {label:<22}{size / 1e6:>13.1f}{size / compact:>8.1f}x{latency:>14.2f}")
+        pickled, mapped = _artifact_heaps(frame, catalog)
+        print(f"{'':>8}  tas privé après chargement de l'artefact : catalog.pkl "
+              f"{pickled / 1e6:.1f} Mo, CompactCatalog en memmap {mapped / 1e6:.2f} Mo")
+        print(f"{'':>8}  construction du CompactCatalog : {build_time:.2f}s, "
+              f"{catalog.n_strings} chaînes distinctes pour {n_rows * len(CATALOG_COLUMNS)} cellules")
+
+
+if __name__ == '__main__':
+    main()
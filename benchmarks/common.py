@@ -0,0 +1,40 @@
+"""Utilitaires partagés par les scripts de mesure."""
+import os
+import tempfile
+from pathlib import Path
+
+import django
+
+
+def setup_django():
+    """Initialise Django avec les réglages du projet."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cinetopia.settings')
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    django.setup()
+
+
+def synthetic_service(rows, top_k=0, seed=0):
+    """
+    Retourne le service de recommandation construit sur un catalogue synthétique.
+
+    Avec ``top_k > 0``, un artefact comprenant la table des voisins précalculés
+    est écrit puis chargé, comme en production après ``build_recommender``.
+    """
+    setup_django()
+    from django.conf import settings
+    from benchmarks.synthetic import write_catalog
+
+    work_dir = Path(tempfile.mkdtemp(prefix='cinetopia-bench-'))
+    source = write_catalog(work_dir / 'movies.csv', rows, seed=seed)
+    settings.RECOMMENDER_DATA_PATH = source
+    settings.RECOMMENDER_ARTIFACT_DIR = work_dir / 'artifacts'
+    # Catalogue synthétique seul : pas de synchronisation avec la base
+    settings.RECOMMENDER_SYNC_INTERVAL = None
+
+    from myapp_cinetopia.artifacts import save_artifact
+    from myapp_cinetopia.recommender import MovieRecommendationService
+
+    if top_k > 0:
+        trained = MovieRecommendationService(use_artifact=False)
+        save_artifact(trained.state, source, settings.RECOMMENDER_ARTIFACT_DIR, top_k=top_k)
+    return MovieRecommendationService()
@@ -0,0 +1,77 @@
+"""
+Plongements denses (TruncatedSVD) comparés à la matrice TF-IDF creuse.
+
+Pour chaque taille de catalogue et chaque dimension, rapporte l'empreinte
+mémoire de la matrice de recherche, la durée d'ajustement, la latence d'une
+requête (p50 / p99, recherche exhaustive) et le recouvrement des 10 voisins
+avec ceux de la matrice creuse.
+
+Usage :
+    python -m benchmarks.embeddings --rows 20000 100000 --dims 128 256
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.engines import _vectorize
+from myapp_cinetopia.embeddings import fit_embeddings
+from myapp_cinetopia.neighbors import CosineNeighbors
+
+
+def _nbytes(matrix):
+    if isinstance(matrix, np.ndarray):
+        return matrix.nbytes
+    return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+
+
+def _search(matrix, queries, k):
+    """Voisins de chaque requête et latences individuelles en millisecondes."""
+    engine = CosineNeighbors().fit(matrix)
+    results = []
+    latencies = []
+    for row in queries:
+        start = time.perf_counter()
+        results.append(engine.kneighbors(matrix[row:row + 1], n_neighbors=k)[1][0])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plongements denses contre TF-IDF creuse.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[20000, 100000])
+    parser.add_argument('--dims', type=int, nargs='+', default=[128, 256])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--franchise-share', type=float, default=0.3)
+    args = parser.parse_args()
+
+    print(f"{'films':>8}  {'espace':<14}{'mémoire (Mo)':>13}{'fit (s)':>9}"
+          f"{'p50 (ms)':>10}{'p99 (ms)':>10}{'recouvr.@' + str(args.k):>13}")
+    for rows in args.rows:
+        tfidf = _vectorize(rows, args.seed, args.franchise_share)
+        queries = np.random.default_rng(args.seed).choice(rows, size=args.queries, replace=False)
+
+        spaces = [('tf-idf creuse', tfidf, 0.0)]
+        for dim in args.dims:
+            start = time.perf_counter()
+            embeddings, _ = fit_embeddings(tfidf, dim, seed=args.seed)
+            spaces.append((f'svd {dim}', embeddings, time.perf_counter() - start))
+
+        baseline = None
+        for label, matrix, fit_time in spaces:
+            found, latencies = _search(matrix, queries, args.k)
+            if baseline is None:
+                baseline = found
+            overlap = np.mean([
+                len(np.intersect1d(expected, result)) / args.k
+                for expected, result in zip(baseline, found)
+            ])
+            p50, p99 = np.percentile(latencies, [50, 99])
+            print(f"{rows:>8}  {label:<14}{_nbytes(matrix) / 1e6:>13.1f}{fit_time:>9.1f}"
+                  f"{p50:>10.2f}{p99:>10.2f}{overlap:>13.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Rappel et débit des moteurs de recherche des voisins.
+
+Pour chaque taille de catalogue, compare le moteur approché ``inverted`` (avec
+plusieurs réglages) à la recherche exhaustive ``brute`` : rappel@k (part des
+k vrais voisins retrouvés) et requêtes par seconde, une requête à la fois
+comme dans ``recommend_movies``.
+
+Usage :
+    python -m benchmarks.engines --rows 20000 100000 500000
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from benchmarks.synthetic import generate_catalog
+from myapp_cinetopia.features import preprocess
+from myapp_cinetopia.neighbors import build_engine
+
+# Réglages (n_terms, max_candidates) comparés par défaut
+INVERTED_SETTINGS = [(8, 2000), (16, 5000), (32, 10000), (64, 20000)]
+
+
+def _vectorize(rows, seed, franchise_share):
+    data = generate_catalog(rows, seed=seed, franchise_share=franchise_share)
+    data = data.rename(columns={"Lien de l'affiche": 'Lien_de_l_affiche'})
+    data.columns = [col.replace(' ', '_') for col in data.columns]
+    return TfidfVectorizer().fit_transform(preprocess(data)['combined_features'])
+
+
+def _search(engine, matrix, queries, k):
+    """Voisins de chaque requête et requêtes par seconde."""
+    start = time.perf_counter()
+    results = [engine.kneighbors(matrix[row], n_neighbors=k)[1][0] for row in queries]
+    return results, len(queries) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rappel et débit des moteurs de voisins.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[20000, 100000])
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--franchise-share', type=float, default=0.3,
+                        help="Part des films déclinés d'un autre (structure de voisinage).")
+    args = parser.parse_args()
+
+    print(f"{'films':>8}  {'moteur':<26}{'fit (s)':>9}{'rappel@' + str(args.k):>11}{'req/s':>9}")
+    for rows in args.rows:
+        matrix = _vectorize(rows, args.seed, args.franchise_share)
+        queries = np.random.default_rng(args.seed).choice(rows, size=args.queries, replace=False)
+
+        brute = build_engine('brute').fit(matrix)
+        truth, brute_qps = _search(brute, matrix, queries, args.k)
+        print(f"{rows:>8}  {'brute':<26}{0:>9.1f}{1:>11.3f}{brute_qps:>9.0f}")
+
+        for n_terms, max_candidates in INVERTED_SETTINGS:
+            start = time.perf_counter()
+            engine = build_engine(
+                'inverted', n_terms=n_terms, max_candidates=max_candidates
+            ).fit(matrix)
+            fit_time = time.perf_counter() - start
+            found, qps = _search(engine, matrix, queries, args.k)
+            recall = np.mean([
+                len(np.intersect1d(expected, result)) / args.k
+                for expected, result in zip(truth, found)
+            ])
+            label = f"inverted t={n_terms} c={max_candidates}"
+            print(f"{rows:>8}  {label:<26}{fit_time:>9.1f}{recall:>11.3f}{qps:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
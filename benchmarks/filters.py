@@ -0,0 +1,96 @@
+"""
+Latence des recommandations filtrées (genre, années, note) comparée aux
+recommandations sans filtre.
+
+Pour chaque jeu de filtres, rapporte la part du catalogue autorisée, la
+latence de ``recommend_movies`` (p50 / p95, sans cache) rapportée à celle
+sans filtre, et le nombre moyen de films recommandés ; avec ``--top-k``, la
+part des requêtes servies par la table des voisins précalculés (les autres
+passent par la recherche en direct). Le script vérifie aussi que tous les
+voisins retournés satisfont les filtres.
+
+Usage :
+    python -m benchmarks.filters --rows 100000
+    python -m benchmarks.filters --rows 100000 --top-k 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import synthetic_service
+from myapp_cinetopia.facets import MovieFilters
+
+SCENARIOS = [
+    ('sans filtre', MovieFilters()),
+    ('genre Western', MovieFilters(genres=['Western'])),
+    ('2015-2024', MovieFilters(year_min=2015, year_max=2024)),
+    ('note >= 3', MovieFilters(min_rating=3)),
+    ('note >= 8', MovieFilters(min_rating=8)),
+    ('Comédie 2000+ >= 7', MovieFilters(genres=['Comédie'], year_min=2000, min_rating=7)),
+    ('Western <1950 >= 9', MovieFilters(genres=['Western'], year_max=1949, min_rating=9)),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence des recommandations filtrées.")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--n-neighbors', type=int, default=10)
+    parser.add_argument('--top-k', type=int, default=0,
+                        help="Voisins précalculés (0 : recherche exhaustive en direct).")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    service = synthetic_service(args.rows, top_k=args.top_k, seed=args.seed)
+    state = service.state
+    names = state.catalog.column('Nom')
+    rows = np.random.default_rng(args.seed).choice(args.rows, size=args.queries, replace=False)
+    # Une seule ligne par titre : celle que le service retient pour ce titre
+    rows = [row for row in rows if service._select_candidate(
+        state, names[row], service.resolve_title(names[row], state)) == row]
+    titles = [names[row] for row in rows]
+
+    mode = f"table top-{args.top_k}" if args.top_k else "recherche exhaustive"
+    print(f"Catalogue: {args.rows} films, k={args.n_neighbors}, {mode}, {len(titles)} requêtes")
+    print(f"{'filtres':<22}{'autorisés':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'rapport':>9}{'films':>7}"
+          f"{'table':>8}")
+    baseline = None
+    for label, filters in SCENARIOS:
+        service.result_cache.clear()
+        latencies = []
+        counts = []
+        for title in titles:
+            start = time.perf_counter()
+            recommended, _ = service.recommend_movies(
+                title, n_neighbors=args.n_neighbors, filters=filters
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            counts.append(len(recommended) if recommended is not None else 0)
+
+        # Tous les voisins retournés respectent les filtres
+        allowed = state.facets.mask(filters)
+        for row in rows[:20]:
+            mask = service._filter_mask(state, filters, row) if filters else None
+            _, indices = service._kneighbors(state, row, args.n_neighbors, mask)
+            neighbours = [index for index in indices[0] if index != row]
+            assert allowed[neighbours].all(), f"{label}: voisin hors filtres pour la ligne {row}"
+
+        # Requêtes auxquelles la table suffit (au moins k voisins autorisés)
+        served = '-'
+        if args.top_k:
+            served = np.mean([
+                (service._filter_mask(state, filters, row) if filters else allowed)[
+                    state.top_k_indices[row]].sum() >= args.n_neighbors
+                for row in rows
+            ])
+            served = f"{served:.0%}"
+
+        p50, p95 = np.percentile(latencies, [50, 95])
+        baseline = baseline or p50
+        print(f"{label:<22}{allowed.mean():>10.1%}{p50:>10.2f}{p95:>10.2f}"
+              f"{p50 / baseline:>8.2f}x{np.mean(counts):>7.1f}{served:>8}")
+
+
+if __name__ == '__main__':
+    main()
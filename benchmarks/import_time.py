@@ -0,0 +1,81 @@
+"""
+Coût de démarrage des commandes de gestion (``python -X importtime``).
+
+Chaque commande est lancée dans un processus neuf ; le script rapporte la
+durée totale, la mémoire résidente maximale, le temps cumulé des imports et
+la part des bibliothèques lourdes (pandas, scikit-learn, SciPy, NumPy).
+
+Usage :
+    python -m benchmarks.import_time --commands check showmigrations
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+MANAGE = Path(__file__).resolve().parent.parent / 'manage.py'
+HEAVY_PACKAGES = ['pandas', 'sklearn', 'scipy', 'numpy']
+
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def _parse(stderr):
+    """Temps total des imports et temps cumulé de chaque paquet de premier niveau (ms)."""
+    total = 0
+    packages = {}
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, module = match.groups()
+        total += int(self_us)
+        if module in HEAVY_PACKAGES:
+            packages[module] = max(packages.get(module, 0), int(cumulative_us))
+    return total / 1000, {name: us / 1000 for name, us in packages.items()}
+
+
+def measure(command):
+    """Lance ``manage.py command`` et retourne ses mesures."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', str(MANAGE), *command.split()],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, env=os.environ,
+    )
+    stderr = process.stderr.read()
+    _, status, usage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - start
+    imports, packages = _parse(stderr)
+    return {
+        'command': command,
+        'status': os.waitstatus_to_exitcode(status),
+        'wall_s': wall,
+        'max_rss_mb': usage.ru_maxrss / 1024,
+        'imports_ms': imports,
+        'packages_ms': packages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coût de démarrage des commandes de gestion.")
+    parser.add_argument('--commands', nargs='+', default=['check', 'showmigrations', 'help'])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'commande':<20}{'durée (s)':>10}{'RSS max (Mo)':>14}{'imports (ms)':>14}  paquets lourds (ms)")
+    for command in args.commands:
+        # Meilleur essai : le cache de pages est chaud après le premier lancement
+        result = min((measure(command) for _ in range(args.repeat)), key=lambda r: r['wall_s'])
+        heavy = ', '.join(
+            f"{name} {result['packages_ms'][name]:.0f}"
+            for name in HEAVY_PACKAGES if name in result['packages_ms']
+        ) or '-'
+        failed = '' if result['status'] == 0 else f"  (code de sortie {result['status']})"
+        print(f"{command:<20}{result['wall_s']:>10.2f}{result['max_rss_mb']:>14.0f}"
+              f"{result['imports_ms']:>14.0f}  {heavy}{failed}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Coût de la mesure des étapes (``PERFORMANCE_METRICS``).
+
+Rapporte le coût unitaire d'une étape ``stage()`` désactivée et activée,
+puis la latence de requêtes ``POST /recommend/`` complètes (middlewares,
+session, authentification, recherche des voisins, réponse JSON) servies par
+le client de test de Django, instrumentation désactivée puis activée, en
+alternance (ordre tiré au hasard dans chaque paire). Le cache de résultats
+est vidé avant chaque requête : chaque requête effectue la recherche des
+voisins. Le surcoût est la médiane des écarts entre les deux requêtes de
+chaque paire ; sur une machine chargée, il est dominé par le bruit de mesure.
+Le coût direct (``TimingMiddleware`` et autant d'étapes que dans une
+requête, autour d'une vue vide) est mesuré à part.
+
+Le service est construit sur un catalogue synthétique ; les sessions et
+l'utilisateur sont enregistrés dans une base de test créée pour l'occasion.
+
+Usage :
+    python -m benchmarks.instrumentation --rows 100000
+    python -m benchmarks.instrumentation --rows 20000 --requests 500
+"""
+import argparse
+import random
+import time
+import timeit
+
+import numpy as np
+
+from benchmarks.common import synthetic_service
+
+
+def stage_cost(enabled, number=200000):
+    """Coût moyen (nanosecondes) d'un ``with stage(...)`` vide."""
+    from django.test import override_settings
+    from myapp_cinetopia.instrumentation import stage
+
+    statement = "with stage('bench'):\n    pass"
+    with override_settings(PERFORMANCE_METRICS=enabled):
+        timings = timeit.repeat(statement, globals={'stage': stage}, number=number, repeat=5)
+    return min(timings) / number * 1e9
+
+
+def direct_cost(n_stages, number=20000):
+    """Coût (microsecondes) de ``TimingMiddleware`` et de ``n_stages`` étapes autour d'une vue vide."""
+    from django.http import HttpResponse
+    from django.test import RequestFactory, override_settings
+    from myapp_cinetopia.instrumentation import TimingMiddleware, stage
+
+    request = RequestFactory().get('/')
+    request.resolver_match = None
+    response = HttpResponse()
+    names = [f'stage_{position}' for position in range(n_stages)]
+
+    def view(request):
+        for name in names:
+            with stage(name):
+                pass
+        return response
+
+    with override_settings(PERFORMANCE_METRICS=False):
+        bare = min(timeit.repeat(lambda: view(request), number=number, repeat=5))
+    with override_settings(PERFORMANCE_METRICS=True):
+        middleware = TimingMiddleware(view)
+        instrumented = min(timeit.repeat(lambda: middleware(request), number=number, repeat=5))
+    return (instrumented - bare) / number * 1e6
+
+
+def make_client(enabled, user):
+    """Client de test dont la chaîne de middlewares est construite avec ``enabled``."""
+    from django.test import Client, override_settings
+
+    with override_settings(PERFORMANCE_METRICS=enabled):
+        client = Client()
+        client.force_login(user)
+        # La chaîne de middlewares est construite à la première requête
+        client.get('/login/')
+    return client
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coût de la mesure des étapes des requêtes.")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    service = synthetic_service(args.rows, seed=args.seed)
+
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import override_settings
+    from django.test.utils import setup_test_environment
+    from myapp_cinetopia import services
+    from myapp_cinetopia.instrumentation import registry
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    settings.ALLOWED_HOSTS = ['*']
+    # Le service synthétique remplace celui des réglages
+    services.movie_service._instance = service
+    user = User.objects.create_user('benchmark', password='benchmark')
+
+    print(f"Catalogue: {args.rows} films, {args.requests} requêtes par mode")
+    print(f"stage() désactivé : {stage_cost(False):.0f} ns, activé : {stage_cost(True):.0f} ns")
+
+    clients = {False: make_client(False, user), True: make_client(True, user)}
+    names = service.state.catalog.column('Nom')
+    titles = [names[row] for row in range(min(args.rows, 5000))]
+    rng = random.Random(args.seed)
+    latencies = {False: [], True: []}
+    for _ in range(args.requests):
+        title = rng.choice(titles)
+        # Alternance des modes, dans un ordre aléatoire : même charge de fond
+        # pour les deux, sans avantage à la seconde requête de la paire
+        for enabled in rng.sample((False, True), 2):
+            service.result_cache.clear()
+            with override_settings(PERFORMANCE_METRICS=enabled):
+                start = time.perf_counter()
+                response = clients[enabled].post('/recommend/', {'movie_name': title})
+                latencies[enabled].append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200
+            assert ('Server-Timing' in response) == enabled
+            if enabled:
+                n_stages = response['Server-Timing'].count(',')
+
+    print(f"{'mode':<12}{'p50 (ms)':>10}{'p95 (ms)':>10}{'moyenne (ms)':>14}")
+    for enabled, label in ((False, 'désactivé'), (True, 'activé')):
+        values = np.array(latencies[enabled])
+        print(f"{label:<12}{np.percentile(values, 50):>10.3f}{np.percentile(values, 95):>10.3f}"
+              f"{values.mean():>14.3f}")
+    difference = float(np.median(np.array(latencies[True]) - np.array(latencies[False])))
+    print(f"Surcoût médian de l'instrumentation : {difference * 1000:+.1f} µs par requête "
+          f"({difference / np.median(latencies[False]) * 100:+.2f} %)")
+    cost = direct_cost(n_stages)
+    print(f"Coût direct : {cost:.1f} µs par requête ({n_stages} étapes), "
+          f"{cost / 1000 / np.median(latencies[False]) * 100:.2f} % de la latence médiane")
+    print(f"Étapes mesurées : {len([line for line in registry.exposition() if '_count{' in line])} séries")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Construction des caractéristiques combinées : implémentation vectorisée
+comparée à l'ancienne implémentation ligne à ligne (``DataFrame.apply``).
+
+Le script vérifie d'abord que la colonne ``combined_features`` est identique
+octet pour octet entre les deux implémentations (code de sortie 1 sinon),
+puis mesure leurs temps d'exécution.
+
+Usage :
+    python -m benchmarks.preprocessing --rows 10000 100000 1000000
+"""
+import argparse
+import gc
+import hashlib
+import re
+import sys
+import time
+
+from benchmarks.synthetic import generate_catalog
+from myapp_cinetopia.features import preprocess
+
+
+def _legacy_clean_text(text):
+    if isinstance(text, str):
+        text = re.sub(r'\bid\b|\bname\b|\d+', '', text)
+    return text
+
+
+def _legacy_combine_features(row):
+    genres = row.get('Genre', '') * 2
+    acteurs = row.get('Noms_de_tous_les_acteurs', '')
+    director = row.get('Nom_du_réalisateur', '') * 2
+    synopsis = row.get('Synopsis', '') * 2
+    note = str(row.get('Note', ''))
+    date = str(row.get('Date_de_sortie', '')) * 2
+    keywords = row.get('keywords', '')
+    return f'{acteurs} {director} {genres} {synopsis} {note} {date} {keywords}'
+
+
+def legacy_preprocess(data):
+    """Implémentation historique de ``_preprocess_data``, ligne à ligne."""
+    data = data.copy()
+    data['keywords'] = data['keywords'].apply(_legacy_clean_text)
+    data = data.fillna('')
+    data['combined_features'] = data.apply(_legacy_combine_features, axis=1)
+    return data
+
+
+def _load(rows, seed):
+    """Catalogue synthétique avec les noms de colonnes utilisés par le service."""
+    data = generate_catalog(rows, seed=seed)
+    data = data.rename(columns={"Lien de l'affiche": 'Lien_de_l_affiche'})
+    data.columns = [col.replace(' ', '_') for col in data.columns]
+    return data
+
+
+def _run(function, data):
+    """Exécute ``function`` et retourne (empreinte du résultat, durée)."""
+    start = time.perf_counter()
+    result = function(data)
+    elapsed = time.perf_counter() - start
+
+    # Empreinte octet pour octet, pour ne pas garder deux résultats en mémoire
+    digest = hashlib.sha256()
+    for column in ('combined_features', 'keywords'):
+        digest.update('\x00'.join(result[column].astype(str)).encode('utf-8'))
+    del result
+    gc.collect()
+    return digest.hexdigest(), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Préprocessing vectorisé vs ligne à ligne.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'lignes':>9}{'apply (s)':>12}{'vectorisé (s)':>15}{'gain':>8}")
+    for rows in args.rows:
+        data = _load(rows, args.seed)
+        expected, legacy_time = _run(legacy_preprocess, data)
+        actual, vectorized_time = _run(preprocess, data)
+        del data
+
+        if expected != actual:
+            print(f"ÉCHEC : combined_features diffère de l'implémentation historique ({rows} lignes)")
+            sys.exit(1)
+
+        print(f"{rows:>9}{legacy_time:>12.2f}{vectorized_time:>15.2f}{legacy_time / vectorized_time:>7.1f}x",
+              flush=True)
+
+    print("combined_features identique octet pour octet à l'implémentation historique")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Latence des recommandations personnalisées selon la taille de l'historique.
+
+Pour chaque taille d'historique, rapporte le coût de construction du profil
+(agrégation creuse des vecteurs de l'historique), celui de la recherche des
+voisins du barycentre avec exclusion des films vus, et celui d'une mise à
+jour incrémentale du profil (un film ajouté) comparée à une reconstruction.
+L'historique est tiré au hasard dans le catalogue, sans passer par la base.
+
+Usage :
+    python -m benchmarks.profiles --rows 100000
+    python -m benchmarks.profiles --rows 100000 --history 100 300 500
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import synthetic_service
+from myapp_cinetopia.profiles import UserProfile
+
+
+def timed(function, repeat):
+    """Médiane de ``repeat`` exécutions de ``function``, en millisecondes."""
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.median(latencies))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence des recommandations personnalisées.")
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--history', type=int, nargs='+', default=[10, 100, 300, 500])
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--n-neighbors', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    service = synthetic_service(args.rows, seed=args.seed)
+    state = service.state
+    matrix = state.data_vectorized
+    rng = np.random.default_rng(args.seed)
+
+    print(f"Catalogue: {args.rows} films, k={args.n_neighbors}, médianes sur {args.repeat} essais")
+    print(f"{'historique':>10}{'profil (ms)':>13}{'voisins (ms)':>14}{'total (ms)':>12}"
+          f"{'incrément (ms)':>16}{'films':>7}")
+    for size in args.history:
+        rows = rng.choice(args.rows, size=size + 1, replace=False)
+        weights = {int(row): float(rng.choice([1.0, 2.0])) for row in rows[:-1]}
+        extra = int(rows[-1])
+        profile = UserProfile.build(state.model_version, matrix, weights)
+
+        # Profil placé en cache : la recherche ne lit pas l'historique en base
+        service.profiles.set(1, profile)
+        recommended, info = service.recommend_for_user(1, n_neighbors=args.n_neighbors)
+        assert info['history_size'] == size
+        # Aucun film de l'historique n'est recommandé
+        names = state.catalog.column('Nom')
+        seen_names = {names[row] for row in weights}
+        assert not seen_names & {movie['Nom'] for movie in recommended}
+
+        build = timed(lambda: UserProfile.build(state.model_version, matrix, weights), args.repeat)
+        search = timed(lambda: service.recommend_for_user(1, n_neighbors=args.n_neighbors), args.repeat)
+        increment = timed(lambda: profile.updated(matrix, extra, 1.0), args.repeat)
+        print(f"{size:>10}{build:>13.2f}{search:>14.2f}{build + search:>12.2f}"
+              f"{increment:>16.3f}{len(recommended):>7}")
+
+
+if __name__ == '__main__':
+    main()
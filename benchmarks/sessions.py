@@ -0,0 +1,133 @@
+"""
+Requêtes SQL et latence du parcours connexion → résultats, avant et après
+les sessions en cache.
+
+« avant » : sessions en base (``backends.db``) et ``ModelBackend``, qui
+relisent la session et l'utilisateur à chaque page ; « après » : réglages du
+projet, sessions ``cached_db`` et ``CachedModelBackend`` (voir
+``myapp_cinetopia/auth.py``), avec le cache configuré par ``CACHE_BACKEND``.
+
+Chaque itération ouvre une session neuve dans chacun des deux modes, dans un
+ordre tiré au hasard, et enchaîne ``POST /login/``, ``GET /home/`` (sans
+appel à l'API météo), ``GET /movie/``, ``POST /movie/`` et la page de
+résultats vers laquelle il redirige. Les mots de passe sont hachés en MD5
+pour que la connexion ne soit pas dominée par PBKDF2, identique dans les
+deux modes.
+
+Le service est construit sur un catalogue synthétique ; les sessions et
+l'utilisateur sont enregistrés dans une base de test créée pour l'occasion.
+
+Usage :
+    python -m benchmarks.sessions --iterations 200
+    CACHE_BACKEND=locmem python -m benchmarks.sessions --rows 20000
+"""
+import argparse
+import logging
+import random
+import time
+
+import numpy as np
+
+from benchmarks.common import synthetic_service
+
+STEPS = ('login', 'home', 'movie', 'movie_submit', 'results')
+
+MODES = {
+    'avant': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+    },
+    'après': {},
+}
+
+PASSWORD = 'benchmark'
+
+
+def run_flow(client, title):
+    """Parcours connexion → résultats ; retourne ``{étape: (requêtes SQL, ms)}``."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    measures = {}
+
+    def timed(step, request, expected):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = request()
+            elapsed = (time.perf_counter() - start) * 1000
+        assert response.status_code == expected, f"{step} : HTTP {response.status_code}"
+        measures[step] = (len(queries), elapsed)
+        return response
+
+    timed('login', lambda: client.post('/login/', {'username': 'benchmark', 'password': PASSWORD}), 302)
+    timed('home', lambda: client.get('/home/'), 200)
+    timed('movie', lambda: client.get('/movie/'), 200)
+    submitted = timed('movie_submit', lambda: client.post('/movie/', {'movie_name': title}), 302)
+    timed('results', lambda: client.get(submitted['Location']), 200)
+    return measures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Requêtes SQL et latence avec et sans sessions en cache.")
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    service = synthetic_service(args.rows, seed=args.seed)
+
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.test.utils import setup_test_environment
+    from myapp_cinetopia import services
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    settings.ALLOWED_HOSTS = ['*']
+    settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    # Le service synthétique remplace celui des réglages, sans API météo
+    services.movie_service._instance = service
+    services.weather_service.api_key = None
+    logging.getLogger('myapp_cinetopia.services').setLevel(logging.ERROR)
+    cache.clear()
+    User.objects.create_user('benchmark', password=PASSWORD)
+
+    names = service.state.catalog.column('Nom')
+    titles = [names[row] for row in range(min(args.rows, 5000))]
+    rng = random.Random(args.seed)
+    measures = {mode: {step: [] for step in STEPS} for mode in MODES}
+    for _ in range(args.iterations):
+        title = rng.choice(titles)
+        for mode in rng.sample(list(MODES), 2):
+            with override_settings(**MODES[mode]):
+                # La chaîne de middlewares (moteur de session) est construite
+                # à la première requête du client, hors mesure
+                client = Client()
+                client.get('/login/')
+                for step, measure in run_flow(client, title).items():
+                    measures[mode][step].append(measure)
+
+    print(f"Catalogue: {args.rows} films, {args.iterations} parcours par mode, "
+          f"cache {settings.CACHES['default']['BACKEND'].rsplit('.', 1)[-1]}")
+    print(f"{'étape':<14}{'SQL avant':>10}{'SQL après':>10}{'p50 avant':>11}{'p50 après':>11}")
+    totals = {mode: np.zeros(args.iterations) for mode in MODES}
+    query_totals = dict.fromkeys(MODES, 0.0)
+    for step in STEPS:
+        row = f"{step:<14}"
+        latencies = []
+        for mode in MODES:
+            queries, elapsed = np.array(measures[mode][step]).T
+            row += f"{queries.mean():>10.1f}"
+            query_totals[mode] += queries.mean()
+            totals[mode] += elapsed
+            latencies.append(np.percentile(elapsed, 50))
+        print(row + ''.join(f"{latency:>9.2f}ms" for latency in latencies))
+    print(f"{'parcours':<14}" + ''.join(f"{query_totals[mode]:>10.1f}" for mode in MODES)
+          + ''.join(f"{np.percentile(totals[mode], 50):>9.2f}ms" for mode in MODES))
+
+
+if __name__ == '__main__':
+    main()
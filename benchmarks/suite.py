@@ -0,0 +1,274 @@
+"""
+Suite de mesures du service de recommandation, avec résultats JSON et
+comparaison à une référence.
+
+Pour chaque taille de catalogue synthétique (``benchmarks.synthetic``, mêmes
+colonnes que ``french_movies_with_keywords.csv``), deux processus neufs
+mesurent :
+
+- entraînement : démarrage à froid sans artefact (``_load_data`` : lecture
+  du CSV, préprocessing, entraînement, index), puis séparément
+  ``_preprocess_data`` et ``_train_model`` ; l'artefact est ensuite écrit ;
+- service, comme un worker : démarrage à froid depuis l'artefact, latences
+  p50 / p95 / p99 de ``recommend_movies`` (une requête) et de
+  ``recommend_many`` (``--batch-size`` titres), cache de résultats vidé
+  avant chaque appel, puis mémoire résidente du worker.
+
+Toutes les métriques sont « plus bas est meilleur » (secondes, millisecondes,
+mégaoctets). ``--output`` écrit les résultats en JSON ; ``--compare`` les
+compare à un fichier de référence et termine avec le code 1 si une métrique
+se dégrade de plus de ``--threshold`` (part relative). ``--compare`` seul,
+avec ``--current``, compare deux fichiers sans rien mesurer. Les catalogues et
+artefacts synthétiques sont supprimés à la fin, sauf avec ``--keep``.
+
+Usage :
+    python -m benchmarks.suite --rows 1000 10000 100000 --output baseline.json
+    python -m benchmarks.suite --rows 1000 10000 100000 --compare baseline.json --threshold 0.2
+    python -m benchmarks.suite --compare baseline.json --current results.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.synthetic import write_catalog
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Métriques rapportées, dans l'ordre d'affichage
+METRICS = [
+    'cold_start_train_s', 'preprocess_s', 'train_s', 'cold_start_artifact_s',
+    'query_p50_ms', 'query_p95_ms', 'query_p99_ms',
+    'batch_p50_ms', 'batch_p95_ms', 'batch_p99_ms',
+    'worker_rss_mb', 'worker_peak_rss_mb',
+]
+
+
+def _configure(csv_path, artifact_dir):
+    """Initialise Django sur le catalogue synthétique ``csv_path``."""
+    from benchmarks.common import setup_django
+
+    setup_django()
+    from django.conf import settings
+
+    settings.RECOMMENDER_DATA_PATH = csv_path
+    settings.RECOMMENDER_ARTIFACT_DIR = artifact_dir
+    # Catalogue synthétique seul : pas de synchronisation avec la base
+    settings.RECOMMENDER_SYNC_INTERVAL = None
+    return settings
+
+
+def _percentiles(latencies, prefix):
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {f'{prefix}_p50_ms': p50, f'{prefix}_p95_ms': p95, f'{prefix}_p99_ms': p99}
+
+
+def _train_child(args):
+    """Mesures d'entraînement ; écrit l'artefact servi par ``_serve_child``."""
+    settings = _configure(args.csv, args.artifact_dir)
+    import pandas as pd
+
+    from myapp_cinetopia.artifacts import save_artifact
+    from myapp_cinetopia.features import normalize_columns
+    from myapp_cinetopia.recommender import MovieRecommendationService
+
+    start = time.perf_counter()
+    service = MovieRecommendationService(use_artifact=False)
+    result = {'cold_start_train_s': time.perf_counter() - start}
+
+    data = normalize_columns(pd.read_csv(args.csv))
+    start = time.perf_counter()
+    data = service._preprocess_data(data)
+    result['preprocess_s'] = time.perf_counter() - start
+    start = time.perf_counter()
+    service._train_model(data)
+    result['train_s'] = time.perf_counter() - start
+
+    save_artifact(service.state, args.csv, settings.RECOMMENDER_ARTIFACT_DIR, top_k=args.top_k)
+    return result
+
+
+def _serve_child(args):
+    """Mesures d'un worker servant l'artefact : démarrage, latences, mémoire."""
+    _configure(args.csv, args.artifact_dir)
+    from myapp_cinetopia.metrics import rss_bytes
+    from myapp_cinetopia.recommender import MovieRecommendationService
+
+    start = time.perf_counter()
+    service = MovieRecommendationService()
+    result = {'cold_start_artifact_s': time.perf_counter() - start}
+
+    names = service.state.catalog.column('Nom')
+    rng = np.random.default_rng(args.seed)
+    rows = rng.integers(0, len(names), size=args.queries + args.batches * args.batch_size)
+    titles = [names[row] for row in rows]
+
+    latencies = []
+    for title in titles[:args.queries]:
+        service.result_cache.clear()
+        start = time.perf_counter()
+        recommended, info = service.recommend_movies(title)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if recommended is None:
+            raise RuntimeError(info)
+    result.update(_percentiles(latencies, 'query'))
+
+    latencies = []
+    for position in range(args.queries, len(titles), args.batch_size):
+        service.result_cache.clear()
+        start = time.perf_counter()
+        service.recommend_many(titles[position:position + args.batch_size])
+        latencies.append((time.perf_counter() - start) * 1000)
+    result.update(_percentiles(latencies, 'batch'))
+
+    result['worker_rss_mb'] = rss_bytes() / 2 ** 20
+    result['worker_peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return result
+
+
+def _run_child(args, mode, csv_path, artifact_dir):
+    command = [
+        sys.executable, '-m', 'benchmarks.suite', '--child', mode,
+        '--csv', str(csv_path), '--artifact-dir', str(artifact_dir),
+        '--queries', str(args.queries), '--batches', str(args.batches),
+        '--batch-size', str(args.batch_size), '--top-k', str(args.top_k), '--seed', str(args.seed),
+    ]
+    completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        sys.stderr.write(completed.stderr)
+        raise RuntimeError(f"Mesure '{mode}' interrompue (code {completed.returncode})")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def measure(args):
+    """Mesure chaque taille de catalogue ; retourne le document JSON des résultats."""
+    work_dir = Path(tempfile.mkdtemp(prefix='cinetopia-suite-'))
+    results = {}
+    try:
+        for rows in args.rows:
+            csv_path = write_catalog(work_dir / f'movies-{rows}.csv', rows, seed=args.seed)
+            artifact_dir = work_dir / f'artifacts-{rows}'
+            result = _run_child(args, 'train', csv_path, artifact_dir)
+            result.update(_run_child(args, 'serve', csv_path, artifact_dir))
+            results[str(rows)] = result
+            print(f"{rows} films : " + ', '.join(
+                f"{name}={result[name]:.3f}" for name in METRICS
+            ), flush=True)
+    finally:
+        # CSV et artefacts synthétiques : plusieurs centaines de Mo au million de films
+        if args.keep:
+            print(f"Catalogues et artefacts conservés dans {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'meta': {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': args.seed,
+            'queries': args.queries,
+            'batches': args.batches,
+            'batch_size': args.batch_size,
+            'top_k': args.top_k,
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """
+    Compare ``current`` à ``baseline`` (documents JSON de ``measure``).
+
+    Retourne la liste des régressions ``(taille, métrique, référence, valeur,
+    écart relatif)`` au-delà de ``threshold``.
+    """
+    for key in ('cpu_count', 'queries', 'batch_size', 'top_k'):
+        if baseline['meta'].get(key) != current['meta'].get(key):
+            print(f"Attention : '{key}' diffère de la référence "
+                  f"({baseline['meta'].get(key)} contre {current['meta'].get(key)})")
+
+    regressions = []
+    print(f"{'films':>8}  {'métrique':<24}{'référence':>12}{'actuel':>12}{'écart':>9}")
+    for rows, values in current['results'].items():
+        reference = baseline['results'].get(rows)
+        if reference is None:
+            continue
+        for name in METRICS:
+            if name not in reference or name not in values:
+                continue
+            change = values[name] / reference[name] - 1 if reference[name] else 0.0
+            regressed = change > threshold
+            flag = '  RÉGRESSION' if regressed else ''
+            print(f"{rows:>8}  {name:<24}{reference[name]:>12.3f}{values[name]:>12.3f}"
+                  f"{change * 100:>+8.1f}%{flag}")
+            if regressed:
+                regressions.append((rows, name, reference[name], values[name], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de mesures du service de recommandation.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--queries', type=int, default=300, help="Requêtes recommend_movies mesurées.")
+    parser.add_argument('--batches', type=int, default=20, help="Appels recommend_many mesurés.")
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--top-k', type=int, default=0,
+                        help="Voisins précalculés dans l'artefact (0 : recherche à chaque requête).")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--keep', action='store_true',
+                        help="Conserve les catalogues et artefacts synthétiques (supprimés sinon).")
+    parser.add_argument('--output', type=Path, help="Fichier JSON des résultats.")
+    parser.add_argument('--compare', type=Path, help="Fichier JSON de référence.")
+    parser.add_argument('--current', type=Path,
+                        help="Résultats à comparer à la référence (sinon, nouvelles mesures).")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="Dégradation relative tolérée par métrique (0.15 : +15 %%).")
+    parser.add_argument('--child', choices=['train', 'serve'], help=argparse.SUPPRESS)
+    parser.add_argument('--csv', type=Path, help=argparse.SUPPRESS)
+    parser.add_argument('--artifact-dir', type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = _train_child(args) if args.child == 'train' else _serve_child(args)
+        print(json.dumps(result))
+        return
+
+    if args.current:
+        current = json.loads(args.current.read_text())
+    else:
+        current = measure(args)
+        if args.output:
+            args.output.write_text(json.dumps(current, indent=2) + '\n')
+            print(f"Résultats écrits dans {args.output}")
+
+    if args.compare:
+        regressions = compare(json.loads(args.compare.read_text()), current, args.threshold)
+        if regressions:
+            print(f"ÉCHEC : {len(regressions)} métrique(s) dégradée(s) de plus de {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"Aucune métrique dégradée de plus de {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
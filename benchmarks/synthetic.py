@@ -0,0 +1,188 @@
+"""
+Générateur déterministe de catalogues synthétiques.
+
+Produit les mêmes colonnes que ``french_movies_with_keywords.csv`` afin de
+mesurer le moteur de recommandation à différentes tailles de catalogue.
+
+Usage :
+    python -m benchmarks.synthetic --rows 100000 --output /tmp/movies.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+CSV_COLUMNS = [
+    'Nom', "Lien de l'affiche", 'Nom du réalisateur', 'Noms de tous les acteurs',
+    'Synopsis', 'Genre', 'Note', 'Date de sortie', 'keywords',
+]
+
+GENRES = [
+    'Action', 'Animation', 'Aventure', 'Comédie', 'Crime', 'Documentaire',
+    'Drame', 'Fantastique', 'Guerre', 'Histoire', 'Horreur', 'Musique',
+    'Mystère', 'Romance', 'Science-Fiction', 'Thriller', 'Western', 'Familial',
+]
+
+_SYLLABLES = [
+    'ba', 'be', 'bi', 'bo', 'ca', 'ce', 'ci', 'co', 'da', 'de', 'di', 'do',
+    'fa', 'fe', 'fi', 'fo', 'ga', 'ge', 'la', 'le', 'li', 'lo', 'ma', 'me',
+    'mi', 'mo', 'na', 'ne', 'ni', 'no', 'pa', 'pe', 'pi', 'po', 'ra', 're',
+    'ri', 'ro', 'sa', 'se', 'si', 'so', 'ta', 'te', 'ti', 'to', 'va', 've',
+    'vi', 'vo', 'ré', 'té', 'lé', 'mé', 'ou', 'an', 'on', 'in',
+]
+
+
+def _words(rng, count, min_syllables=2, max_syllables=4):
+    """Génère ``count`` mots pseudo-français distincts."""
+    words = set()
+    while len(words) < count:
+        size = rng.integers(min_syllables, max_syllables + 1)
+        words.add(''.join(rng.choice(_SYLLABLES, size=size)))
+    # Ordre aléatoire (mais reproductible) pour décorréler fréquence et alphabet
+    return rng.permutation(np.array(sorted(words)))
+
+
+def _zipf_choice(rng, values, size, exponent=1.1):
+    """Tirage selon une loi de Zipf, comme la fréquence des mots réels."""
+    ranks = np.arange(1, len(values) + 1, dtype=np.float64)
+    weights = ranks ** -exponent
+    return values[rng.choice(len(values), size=size, p=weights / weights.sum())]
+
+
+def _zipf_sentences(rng, values, n_rows, n_words, exponent=1.1, chunk_size=50000):
+    """Génère ``n_rows`` suites de ``n_words`` mots, par blocs pour borner la mémoire."""
+    ranks = np.arange(1, len(values) + 1, dtype=np.float64)
+    weights = ranks ** -exponent
+    weights /= weights.sum()
+    words = values.tolist()
+
+    sentences = []
+    for start in range(0, n_rows, chunk_size):
+        size = min(chunk_size, n_rows - start)
+        ids = rng.choice(len(words), size=(size, n_words), p=weights)
+        sentences.extend(' '.join([words[i] for i in row]) for row in ids.tolist())
+    return sentences
+
+
+def _join_rows(tokens):
+    """Concatène chaque ligne d'une matrice de mots en une chaîne."""
+    return [' '.join(row) for row in tokens]
+
+
+def _add_franchises(rng, catalog, share):
+    """
+    Fait d'une part ``share`` des films les déclinaisons d'un film antérieur :
+    même réalisateur et même genre, la moitié de la distribution et du synopsis
+    en commun, comme les suites et remakes d'un vrai catalogue.
+    """
+    n_rows = len(catalog)
+    children = np.flatnonzero(rng.random(n_rows) < share)
+    children = children[children > 0]
+    parents = (rng.random(len(children)) * children).astype(np.int64)
+
+    columns = {
+        col: catalog[col].to_numpy(copy=True)
+        for col in ('Nom du réalisateur', 'Genre', 'Noms de tous les acteurs', 'Synopsis')
+    }
+    # Parcours croissant : un parent est toujours traité avant ses déclinaisons
+    for child, parent in zip(children.tolist(), parents.tolist()):
+        columns['Nom du réalisateur'][child] = columns['Nom du réalisateur'][parent]
+        columns['Genre'][child] = columns['Genre'][parent]
+        for col in ('Noms de tous les acteurs', 'Synopsis'):
+            own = columns[col][child].split(' ')
+            inherited = columns[col][parent].split(' ')
+            half = len(inherited) // 2
+            columns[col][child] = ' '.join(inherited[:half] + own[half:])
+    for col, values in columns.items():
+        catalog[col] = values
+    return catalog
+
+
+def generate_catalog(n_rows, seed=0, synopsis_words=30, vocabulary_size=20000, franchise_share=0.0):
+    """
+    Construit un catalogue synthétique de ``n_rows`` films.
+
+    Avec ``franchise_share > 0``, une part des films reprend en partie un film
+    antérieur (voir ``_add_franchises``) : les vrais voisins sont alors
+    nettement plus proches que des films quelconques.
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = _words(rng, vocabulary_size)
+    first_names = np.char.capitalize(_words(rng, 400, 2, 3))
+    last_names = np.char.capitalize(_words(rng, 3000, 2, 4))
+
+    def people(size):
+        return np.char.add(
+            np.char.add(_zipf_choice(rng, first_names, size, 0.8), ' '),
+            _zipf_choice(rng, last_names, size, 0.8),
+        )
+
+    title_words = _zipf_choice(rng, vocabulary, (n_rows, 3), 0.9)
+    title_lengths = rng.integers(1, 4, size=n_rows)
+    titles = [
+        ' '.join(words[:length]).capitalize()
+        for words, length in zip(title_words, title_lengths)
+    ]
+    # Quelques titres numérotés (suites) et quelques doublons volontaires
+    sequels = rng.random(n_rows) < 0.05
+    titles = [f'{title} {rng.integers(2, 5)}' if sequel else title for title, sequel in zip(titles, sequels)]
+
+    genre_pairs = rng.choice(len(GENRES), size=(n_rows, 2))
+    genres = [
+        GENRES[a] if a == b else f'{GENRES[a]}, {GENRES[b]}'
+        for a, b in genre_pairs
+    ]
+
+    notes = np.round(rng.uniform(1, 10, size=n_rows), 1).astype(object)
+    notes[rng.random(n_rows) < 0.05] = np.nan
+
+    years = rng.integers(1930, 2025, size=n_rows)
+    months = rng.integers(1, 13, size=n_rows)
+    days = rng.integers(1, 29, size=n_rows)
+    dates = [f'{y:04d}-{m:02d}-{d:02d}' for y, m, d in zip(years, months, days)]
+
+    keyword_tokens = _zipf_choice(rng, vocabulary, (n_rows, 3))
+    keyword_ids = rng.integers(1, 300000, size=(n_rows, 3))
+    keywords = [
+        '[' + ', '.join(f"{{'id': {i}, 'name': '{w}'}}" for i, w in zip(ids, tokens)) + ']'
+        for ids, tokens in zip(keyword_ids, keyword_tokens)
+    ]
+    keywords = np.array(keywords, dtype=object)
+    keywords[rng.random(n_rows) < 0.1] = np.nan
+
+    actors = people(n_rows * 4).reshape(n_rows, 4)
+
+    catalog = pd.DataFrame({
+        'Nom': titles,
+        "Lien de l'affiche": [f'https://image.tmdb.org/t/p/w500/{i:07d}.jpg' for i in range(n_rows)],
+        'Nom du réalisateur': people(n_rows),
+        'Noms de tous les acteurs': _join_rows(actors),
+        'Synopsis': _zipf_sentences(rng, vocabulary, n_rows, synopsis_words),
+        'Genre': genres,
+        'Note': notes,
+        'Date de sortie': dates,
+        'keywords': keywords,
+    }, columns=CSV_COLUMNS)
+    if franchise_share > 0:
+        catalog = _add_franchises(rng, catalog, franchise_share)
+    return catalog
+
+
+def write_catalog(path, n_rows, seed=0):
+    """Écrit un catalogue synthétique au format CSV."""
+    generate_catalog(n_rows, seed=seed).to_csv(path, index=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère un catalogue de films synthétique.")
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', required=True)
+    args = parser.parse_args()
+    write_catalog(args.output, args.rows, seed=args.seed)
+    print(f"{args.rows} films écrits dans {args.output}")
+
+
+if __name__ == '__main__':
+    main()
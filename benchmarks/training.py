@@ -0,0 +1,140 @@
+"""
+Entraînement en un seul passage comparé à l'entraînement par lots parallèle.
+
+Chaque configuration est mesurée dans un processus neuf : durée, mémoire
+résidente maximale du processus principal et du plus gros processus du pool.
+L'entraînement en un seul passage reproduit celui du service (lecture du CSV
+entier, préprocessing, ``TfidfVectorizer``, catalogue compact) ; les modes
+par lots utilisent ``training.train_chunked`` en ``tfidf`` (vocabulaire
+fusionné) et ``hashing``. Le script vérifie que le mode ``tfidf`` par lots
+produit le même vocabulaire et la même matrice que le passage unique
+(``--check``, qui refait un passage unique dans le même processus).
+
+Usage :
+    python -m benchmarks.training --rows 1000000 --workers 1 2 4 8
+    python -m benchmarks.training --csv /tmp/movies.csv --kinds hashing
+    python -m benchmarks.training --rows 100000 --check
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import write_catalog
+
+
+def _single_pass(csv_path):
+    """Entraînement historique : tout le CSV en mémoire, un seul processus."""
+    import pandas as pd
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    from myapp_cinetopia.artifacts import numeric_columns
+    from myapp_cinetopia.catalog import CompactCatalog
+    from myapp_cinetopia.features import normalize_columns, preprocess
+
+    data = preprocess(normalize_columns(pd.read_csv(csv_path)))
+    vectorizer = TfidfVectorizer()
+    matrix = vectorizer.fit_transform(data['combined_features'])
+    CompactCatalog.from_frame(data)
+    numeric_columns(data)
+    return vectorizer, matrix
+
+
+def _child(args):
+    """Mesure une configuration dans le processus courant et imprime le résultat (JSON)."""
+    from myapp_cinetopia.training import train_chunked
+
+    start = time.perf_counter()
+    if args.child == 'single':
+        vectorizer, matrix = _single_pass(args.csv)
+    else:
+        features = train_chunked(
+            args.csv, kind=args.child, workers=args.child_workers, chunk_size=args.chunk_size,
+        )
+        vectorizer, matrix = features.vectorizer, features.matrix
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'seconds': elapsed,
+        'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'worker_rss_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        'shape': list(matrix.shape),
+        'nnz': int(matrix.nnz),
+    }
+    if args.child == 'tfidf' and args.check:
+        expected_vectorizer, expected = _single_pass(args.csv)
+        result['identical'] = bool(
+            vectorizer.vocabulary_ == expected_vectorizer.vocabulary_
+            and abs(matrix - expected).max() < 1e-12
+        )
+    print(json.dumps(result))
+
+
+def _measure(args, mode, workers, check=False):
+    command = [
+        sys.executable, '-m', 'benchmarks.training', '--csv', str(args.csv),
+        '--child', mode, '--child-workers', str(workers), '--chunk-size', str(args.chunk_size),
+    ]
+    if check:
+        command.append('--check')
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraînement en un passage vs par lots parallèle.")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--csv', type=Path, help="CSV existant (sinon un catalogue synthétique est généré).")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--kinds', nargs='+', default=['tfidf', 'hashing'], choices=['tfidf', 'hashing'])
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--skip-single', action='store_true',
+                        help="Ne mesure pas l'entraînement en un seul passage.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--child-workers', type=int, default=1, help=argparse.SUPPRESS)
+    parser.add_argument('--check', action='store_true',
+                        help="Vérifie que le mode tfidf par lots reproduit le passage unique.")
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args)
+        return
+
+    if args.csv is None:
+        args.csv = Path(tempfile.mkdtemp(prefix='cinetopia-bench-')) / 'movies.csv'
+        write_catalog(args.csv, args.rows, seed=args.seed)
+    print(f"CSV: {args.csv} ({args.csv.stat().st_size / 2 ** 20:.0f} Mo), "
+          f"lots de {args.chunk_size} lignes, {os.cpu_count()} cœurs")
+    print(f"{'mode':<10}{'processus':>10}{'durée (s)':>11}{'gain':>8}"
+          f"{'RSS princ. (Mo)':>17}{'RSS worker (Mo)':>17}")
+
+    baseline = None
+    if not args.skip_single:
+        result = _measure(args, 'single', 1)
+        baseline = result['seconds']
+        print(f"{'un passage':<10}{1:>10}{result['seconds']:>11.1f}{'1.00x':>8}"
+              f"{result['rss_mb']:>17.0f}{'-':>17}", flush=True)
+
+    for kind in args.kinds:
+        for workers in args.workers:
+            check = args.check and kind == 'tfidf' and workers == args.workers[0]
+            result = _measure(args, kind, workers, check=check)
+            speedup = f"{baseline / result['seconds']:.2f}x" if baseline else '-'
+            worker_rss = f"{result['worker_rss_mb']:.0f}" if workers > 1 else '-'
+            print(f"{kind:<10}{workers:>10}{result['seconds']:>11.1f}{speedup:>8}"
+                  f"{result['rss_mb']:>17.0f}{worker_rss:>17}", flush=True)
+            if 'identical' in result:
+                if not result['identical']:
+                    print("ÉCHEC : la matrice tfidf par lots diffère du passage unique")
+                    sys.exit(1)
+                print("tfidf par lots : vocabulaire et matrice identiques au passage unique")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Mesure de la mémoire par worker du service de recommandation.
+
+Simule ``gunicorn --workers N`` : chaque processus fils importe le service
+(comme un worker sans ``--preload``), sert quelques recommandations puis
+relève sa mémoire résidente (RSS) et proportionnelle (PSS, qui répartit les
+pages partagées entre les processus qui les projettent).
+
+Trois modes sont comparés :
+
+- ``train`` : entraînement complet dans chaque worker ;
+- ``artifact`` : artefact chargé intégralement en mémoire (``RECOMMENDER_MMAP = False``) ;
+- ``mmap`` : artefact projeté en mémoire et partagé entre workers.
+
+Usage :
+    python -m benchmarks.worker_rss --rows 50000 --workers 1 4 16
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+from pathlib import Path
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cinetopia.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+
+MODES = ('train', 'artifact', 'mmap')
+
+
+def _memory_kb():
+    """Retourne (RSS, PSS) du processus courant en kB (Linux)."""
+    values = {}
+    with open('/proc/self/smaps_rollup') as handle:
+        for line in handle:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0][:-1]] = int(parts[1])
+    return values['Rss'], values['Pss']
+
+
+def _worker(mode, source, artifact_dir, barrier, results):
+    django.setup()
+    from django.conf import settings
+    settings.RECOMMENDER_DATA_PATH = source
+    settings.RECOMMENDER_ARTIFACT_DIR = artifact_dir if mode != 'train' else tempfile.mkdtemp()
+    settings.RECOMMENDER_MMAP = mode == 'mmap'
+    # Catalogue synthétique seul : pas de synchronisation avec la base
+    settings.RECOMMENDER_SYNC_INTERVAL = None
+
+    from myapp_cinetopia.services import movie_service
+    names = movie_service.catalog.column('Nom')
+    titles = [names[row] for row in range(20)]
+    for title in titles:
+        movie_service.recommend_movies(title)
+
+    # Tous les workers sont chargés avant la mesure, comme en production
+    barrier.wait()
+    results.put(_memory_kb())
+    barrier.wait()
+
+
+def measure(mode, n_workers, source, artifact_dir):
+    """Lance ``n_workers`` processus et retourne leur RSS/PSS moyens (MB)."""
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(n_workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(mode, source, artifact_dir, barrier, results))
+        for _ in range(n_workers)
+    ]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    rss = sum(sample[0] for sample in samples) / len(samples) / 1024
+    pss = sum(sample[1] for sample in samples) / len(samples) / 1024
+    return rss, pss
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mémoire par worker du service de recommandation.")
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+
+    django.setup()
+    from django.conf import settings
+    from benchmarks.synthetic import write_catalog
+    from myapp_cinetopia.artifacts import save_artifact
+
+    work_dir = Path(tempfile.mkdtemp(prefix='cinetopia-rss-'))
+    source = write_catalog(work_dir / 'movies.csv', args.rows)
+    artifact_dir = work_dir / 'artifacts'
+
+    settings.RECOMMENDER_DATA_PATH = source
+    settings.RECOMMENDER_ARTIFACT_DIR = artifact_dir
+    from myapp_cinetopia.recommender import MovieRecommendationService
+    save_artifact(MovieRecommendationService(use_artifact=False).state, source, artifact_dir)
+
+    print(f"Catalogue synthétique: {args.rows} films")
+    print(f"{'mode':<10}{'workers':>8}{'RSS/worker (MB)':>18}{'PSS/worker (MB)':>18}{'PSS total (MB)':>17}")
+    for mode in args.modes:
+        for n_workers in args.workers:
+            rss, pss = measure(mode, n_workers, source, artifact_dir)
+            print(f"{mode:<10}{n_workers:>8}{rss:>18.1f}{pss:>18.1f}{pss * n_workers:>17.1f}", flush=True)
+
+
+if __name__ == '__main__':
+    main()
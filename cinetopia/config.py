@@ -12,7 +12,45 @@ DB_USER = os.getenv('DB_USER', 'root')
 DB_PASSWORD = os.getenv('DB_PASSWORD')
 DB_HOST = os.getenv('DB_HOST', 'localhost')
 DB_PORT = os.getenv('DB_PORT', '3306')
+# 'mysql' (production) ou 'sqlite' (base locale <DB_NAME>.sqlite3)
+DB_ENGINE = os.getenv('DB_ENGINE', 'mysql')
+# Connexions persistantes : durée (s) de réutilisation d'une connexion d'une
+# requête à l'autre (0 : une connexion par requête), vérifiée avant réutilisation
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+DB_CONN_HEALTH_CHECKS = os.getenv('DB_CONN_HEALTH_CHECKS', 'True').lower() == 'true'
 
 # Weather API
 WEATHER_API_KEY = os.getenv('WEATHER_API_KEY')
-WEATHER_API_HOST = os.getenv('WEATHER_API_HOST', 'weatherapi-com.p.rapidapi.com')
\ No newline at end of file
+WEATHER_API_HOST = os.getenv('WEATHER_API_HOST', 'weatherapi-com.p.rapidapi.com')
+WEATHER_API_SCHEME = os.getenv('WEATHER_API_SCHEME', 'https')
+WEATHER_CONNECT_TIMEOUT = float(os.getenv('WEATHER_CONNECT_TIMEOUT', '2'))
+WEATHER_READ_TIMEOUT = float(os.getenv('WEATHER_READ_TIMEOUT', '5'))
+WEATHER_CACHE_TTL = int(os.getenv('WEATHER_CACHE_TTL', '600'))
+WEATHER_CACHE_STALE_TTL = int(os.getenv('WEATHER_CACHE_STALE_TTL', '3600'))
+
+# Budgets de requêtes SQL par vue (QUERY_BUDGETS) : une vue qui les dépasse
+# lève une erreur (CI, développement)
+QUERY_BUDGET_CHECKS = os.getenv('QUERY_BUDGET_CHECKS', 'False').lower() == 'true'
+
+# Cache Django (sessions, utilisateurs connectés) : 'file' (partagé par les
+# workers d'une même machine), 'redis' (partagé entre machines) ou 'locmem'
+# (propre à chaque processus : développement avec un seul processus)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'file')
+# Dossier du cache 'file', URL du serveur 'redis' (ex. redis://127.0.0.1:6379/1)
+CACHE_LOCATION = os.getenv('CACHE_LOCATION', '')
+CACHE_TIMEOUT = int(os.getenv('CACHE_TIMEOUT', '300'))
+
+# Vues asynchrones (déploiement ASGI, ex. gunicorn -k uvicorn.workers.UvicornWorker)
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False').lower() == 'true'
+
+# Mesure des étapes des requêtes (en-tête Server-Timing, /metrics)
+PERFORMANCE_METRICS = os.getenv('PERFORMANCE_METRICS', 'False').lower() == 'true'
+
+# Recommandation
+RECOMMENDER_ARTIFACT_DIR = os.getenv('RECOMMENDER_ARTIFACT_DIR')
+# Construit le modèle au démarrage de chaque worker gunicorn (gunicorn.conf.py)
+# plutôt qu'à la première requête
+RECOMMENDER_WARMUP = os.getenv('RECOMMENDER_WARMUP', 'True').lower() == 'true'
+# Processus d'entraînement par lots (1 : entraînement en un seul passage,
+# 0 : un processus par cœur)
+RECOMMENDER_TRAINING_WORKERS = int(os.getenv('RECOMMENDER_TRAINING_WORKERS', '1'))
@@ -12,6 +12,12 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 from .config import SECRET_KEY, DEBUG, DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+from .config import DB_ENGINE, DB_CONN_MAX_AGE, DB_CONN_HEALTH_CHECKS, QUERY_BUDGET_CHECKS
+from .config import RECOMMENDER_ARTIFACT_DIR, RECOMMENDER_TRAINING_WORKERS, ASYNC_VIEWS
+# Mesure des étapes des requêtes : histogrammes par étape exposés sur
+# /metrics (personnel uniquement) et en-tête Server-Timing
+from .config import PERFORMANCE_METRICS
+from .config import CACHE_BACKEND, CACHE_LOCATION, CACHE_TIMEOUT
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -42,6 +48,10 @@ INSTALLED_APPS = [
     'myapp_cinetopia'
 ]
 MIDDLEWARE = [
+    # Retiré de la chaîne si PERFORMANCE_METRICS est désactivé
+    'myapp_cinetopia.instrumentation.TimingMiddleware',
+    # Retiré de la chaîne si QUERY_BUDGET_CHECKS est désactivé
+    'myapp_cinetopia.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -85,6 +95,69 @@ DATABASES = {
         'PORT': DB_PORT,
     }
 }
+if DB_ENGINE == 'sqlite':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'{DB_NAME}.sqlite3',
+    }
+
+# Connexions persistantes (Django 5.0 n'a pas de pool pour MySQL). Sous ASGI,
+# les accès à la base passent par des threads qui ne réutilisent pas les
+# connexions d'une requête à l'autre : une connexion par requête
+DATABASES['default']['CONN_MAX_AGE'] = 0 if ASYNC_VIEWS else DB_CONN_MAX_AGE
+DATABASES['default']['CONN_HEALTH_CHECKS'] = DB_CONN_HEALTH_CHECKS
+
+# Nombre maximal de requêtes SQL par requête HTTP (middlewares compris), par
+# nom d'URL et éventuellement par méthode, vérifié par QueryBudgetMiddleware
+# si QUERY_BUDGET_CHECKS est activé et par la commande check_query_budgets.
+# Comptées sur SQLite, caches vides, instructions de transaction comprises
+QUERY_BUDGETS = {
+    'home': 2,
+    'movie': 2,
+    'results': 2,
+    'recommend': 2,
+    'recommend_batch': 2,
+    'autocomplete': 2,
+    'recommend_user': 3,
+    'history': {'GET': 3, 'POST': 7},
+    'history_remove': 5,
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+CACHE_DEFAULT_LOCATIONS = {
+    'locmem': 'cinetopia',
+    'file': BASE_DIR / 'cache',
+    'redis': 'redis://127.0.0.1:6379/1',
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': CACHE_LOCATION or CACHE_DEFAULT_LOCATIONS[CACHE_BACKEND],
+        'TIMEOUT': CACHE_TIMEOUT,
+    }
+}
+
+# Sessions lues dans le cache, la base restant la référence (écritures
+# dans les deux) : plus de SELECT de session par page authentifiée
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Utilisateur connecté gardé en cache entre les requêtes (invalidé à chaque
+# modification, voir signals.py). ``ModelBackend`` reste listé : les sessions
+# ouvertes avant le cache, qui le désignent, restent valides
+AUTHENTICATION_BACKENDS = [
+    'myapp_cinetopia.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+AUTH_USER_CACHE_TIMEOUT = CACHE_TIMEOUT
 
 
 # Password validation
@@ -134,6 +207,63 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Recommandation de films
+RECOMMENDER_DATA_PATH = BASE_DIR / 'myapp_cinetopia' / 'data' / 'french_movies_with_keywords.csv'
+RECOMMENDER_ARTIFACT_DIR = RECOMMENDER_ARTIFACT_DIR or BASE_DIR / 'myapp_cinetopia' / 'data' / 'artifacts'
+# Projection en mémoire (memmap) des tableaux de l'artefact, partagés entre workers
+RECOMMENDER_MMAP = True
+# Dimension des plongements denses float32 (TruncatedSVD) remplaçant la matrice
+# TF-IDF creuse, par exemple 128 ou 256 ; 0 pour conserver la matrice creuse
+RECOMMENDER_EMBEDDING_DIM = 0
+# Vectorisation : 'tfidf' (vocabulaire explicite) ou 'hashing' (termes hachés
+# dans RECOMMENDER_HASHING_FEATURES colonnes, sans vocabulaire)
+RECOMMENDER_VECTORIZER = 'tfidf'
+RECOMMENDER_HASHING_FEATURES = 2 ** 18
+# Entraînement par lots du CSV préparés en parallèle par
+# RECOMMENDER_TRAINING_WORKERS processus (voir config.py)
+RECOMMENDER_TRAINING_CHUNK_SIZE = 50000
+# Moteur de recherche des voisins : 'brute' (exact) ou 'inverted' (approché,
+# grands catalogues). Réglages de 'inverted' : n_terms, max_candidates
+RECOMMENDER_ENGINE = 'brute'
+RECOMMENDER_ENGINE_OPTIONS = {}
+# Nombre de voisins précalculés par film lors de build_recommender (0 pour
+# désactiver). Les recommandations filtrées parcourent toute la liste : 200
+# voisins suffisent aux filtres retenant au moins ~10 % du catalogue, les plus
+# sélectifs passant par la recherche sur les seules lignes autorisées
+RECOMMENDER_TOP_K = 200
+# Intégration des films du modèle Movie : intervalle minimal (secondes) entre
+# deux synchronisations par worker (None pour désactiver), et part de termes
+# inconnus du vocabulaire au-delà de laquelle le modèle est réentraîné
+RECOMMENDER_SYNC_INTERVAL = 60
+RECOMMENDER_VOCABULARY_DRIFT = 0.02
+# Rechargement à chaud du modèle : signal reçu par chaque worker gunicorn
+# (installé par gunicorn.conf.py ; None pour désactiver) et intervalle (secondes) de vérification de reload_recommender
+RECOMMENDER_RELOAD_SIGNAL = 'SIGHUP'
+RECOMMENDER_RELOAD_CHECK_INTERVAL = 5
+# Vues asynchrones (ASYNC_VIEWS, voir config.py) : threads exécutant les
+# recherches de voisins hors de la boucle d'événements, par worker
+RECOMMENDER_EXECUTOR_WORKERS = 4
+# Limites de l'API de recommandation groupée
+RECOMMENDER_BATCH_MAX_TITLES = 1000
+RECOMMENDER_BATCH_MAX_NEIGHBORS = 100
+# Durée de validité (secondes) des pages /results/<titre>/ dans le cache du
+# navigateur ; au-delà, la page est revalidée par son ETag (version du modèle)
+RECOMMENDER_RESULTS_MAX_AGE = 300
+# Cache des résultats de recommandation : LRU par worker, puis cache Django
+# partagé entre workers si un alias de CACHES est indiqué
+RECOMMENDER_RESULT_CACHE_SIZE = 1024
+RECOMMENDER_RESULT_CACHE_ALIAS = None
+RECOMMENDER_RESULT_CACHE_TIMEOUT = 3600
+# Recommandations personnalisées : poids d'un film aimé (un film vu pèse 1),
+# nombre maximal de films récents de l'historique pris en compte, et profils
+# gardés en cache par worker. Un profil est mis à jour à chaque modification
+# de l'historique dans le worker qui la reçoit ; les autres workers le
+# reconstruisent au plus tard après RECOMMENDER_PROFILE_TTL secondes
+RECOMMENDER_HISTORY_LIKED_WEIGHT = 2.0
+RECOMMENDER_HISTORY_MAX_ITEMS = 500
+RECOMMENDER_PROFILE_CACHE_SIZE = 1024
+RECOMMENDER_PROFILE_TTL = 300
+
 # Logging configuration
 LOGGING = {
     'version': 1,
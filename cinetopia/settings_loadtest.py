@@ -0,0 +1,47 @@
+"""
+Réglages du banc de charge (``python -m loadtest``).
+
+Reprennent ``settings.py`` avec une base SQLite locale (``LOADTEST_DB``), le
+catalogue et les artefacts préparés par le banc (``LOADTEST_DATA_PATH``,
+``LOADTEST_ARTIFACT_DIR``) et une journalisation réduite aux avertissements.
+L'API météo est désignée comme d'habitude par ``WEATHER_API_SCHEME`` et
+``WEATHER_API_HOST`` (API factice de ``loadtest.weather_stub``).
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES, RECOMMENDER_ARTIFACT_DIR, RECOMMENDER_DATA_PATH, SECRET_KEY
+
+# config.py peut avoir été importé avant ces réglages (gunicorn.conf.py)
+SECRET_KEY = SECRET_KEY or 'loadtest'
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('LOADTEST_DB', str(BASE_DIR / 'loadtest.sqlite3')),
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'CONN_HEALTH_CHECKS': DATABASES['default']['CONN_HEALTH_CHECKS'],
+        # Écritures de session concurrentes des workers : attente du verrou
+        'OPTIONS': {'timeout': 30},
+    }
+}
+
+RECOMMENDER_DATA_PATH = os.getenv('LOADTEST_DATA_PATH') or RECOMMENDER_DATA_PATH
+RECOMMENDER_ARTIFACT_DIR = os.getenv('LOADTEST_ARTIFACT_DIR') or RECOMMENDER_ARTIFACT_DIR
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'level': 'WARNING',
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': 'WARNING',
+    },
+}
@@ -18,17 +18,30 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from myapp_cinetopia import views
+from myapp_cinetopia import views, views_async
+
+# Sous ASGI, les vues d'accueil et de recommandation ne bloquent pas le worker
+pages = views_async if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', views.login_view, name='login'),
     path('login/', views.login_view, name='login_page'),
     path('signup/', views.signup_view, name='signup'),
-    path('home/', views.home_view, name='home'),
+    path('home/', pages.home_view, name='home'),
     path('movie/', views.movie_view, name='movie'),
-    path('results/', views.results_view, name='results'),
-    path('recommend/', views.recommend_view, name='recommend'),
+    path('results/', views.legacy_results_view, name='results_legacy'),
+    # Film désigné par sa ligne du catalogue ; le titre (slug) est descriptif,
+    # absent pour un titre sans lettre ni chiffre
+    path('results/<int:row>-<str:slug>/', pages.results_view, name='results'),
+    path('results/<int:row>/', pages.results_view, name='results'),
+    path('recommend/', pages.recommend_view, name='recommend'),
+    path('recommend/batch/', views.recommend_batch_view, name='recommend_batch'),
+    path('recommend/me/', views.user_recommend_view, name='recommend_user'),
+    path('history/', views.history_view, name='history'),
+    path('history/remove/', views.history_remove_view, name='history_remove'),
+    path('autocomplete/', views.autocomplete_view, name='autocomplete'),
+    path('metrics', views.metrics_view, name='metrics'),
 ]
 
 # Servir les fichiers statiques et media en développement
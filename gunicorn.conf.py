@@ -0,0 +1,33 @@
+"""
+Configuration gunicorn, chargée automatiquement depuis le répertoire courant.
+
+Le modèle de recommandation est construit à la première utilisation ; ces
+crochets le préchargent au démarrage (``RECOMMENDER_WARMUP``) pour que la
+première requête de chaque worker ne paie pas le chargement, et installent
+dans chaque worker le rechargement du modèle sur signal.
+"""
+from cinetopia.config import RECOMMENDER_WARMUP
+
+
+def _warmup():
+    from myapp_cinetopia.services import warmup
+    warmup()
+
+
+def when_ready(server):
+    # Avec preload_app, l'application est chargée dans le maître : le modèle y
+    # est construit une fois et partagé par les workers (copie à l'écriture)
+    if RECOMMENDER_WARMUP and server.cfg.preload_app:
+        _warmup()
+
+
+def post_worker_init(worker):
+    # Après Worker.init_signals, qui rétablit les signaux par défaut (y
+    # compris ceux installés dans le maître avec preload_app)
+    from myapp_cinetopia.services import install_reload_signal
+    install_reload_signal()
+
+    # post_fork est appelé avant que le worker ne charge l'application (Django
+    # n'est pas encore configuré) : le préchargement attend post_worker_init
+    if RECOMMENDER_WARMUP and not worker.cfg.preload_app:
+        _warmup()
@@ -0,0 +1,4 @@
+"""
+Banc de charge de bout en bout (``python -m loadtest``) : API météo
+factice, réglages SQLite et scénario multi-utilisateurs.
+"""
@@ -0,0 +1,207 @@
+"""
+Banc de charge de bout en bout.
+
+Prépare un environnement autonome dans ``--work-dir`` : base SQLite
+(réglages ``cinetopia.settings_loadtest``) avec un compte par utilisateur
+virtuel, catalogue (synthétique de ``--rows`` films, ou ``--catalog``) et
+artefact du modèle (``build_recommender``). Démarre ensuite l'API météo
+factice, puis gunicorn (workers synchrones ou uvicorn avec ``ASYNC_VIEWS``)
+pointé vers elle, et lance ``--users`` utilisateurs virtuels qui parcourent
+le site (voir ``loadtest.scenario``) pendant ``--duration`` secondes après
+``--warmup`` secondes de chauffe.
+
+Rapporte par point d'accès le débit, les latences p50 / p95 / p99 / max et
+les erreurs ; ``--output`` écrit le rapport en JSON.
+
+Usage :
+    python -m loadtest --users 32 --duration 60 --workers 4
+    python -m loadtest --server uvicorn --weather-latency 0.5 --weather-cache-ttl 0
+    python -m loadtest --catalog myapp_cinetopia/data/french_movies_with_keywords.csv --output report.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from loadtest.scenario import ENDPOINTS, run_scenario, wait_ready
+from loadtest.weather_stub import start_weather_stub
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SERVERS = {
+    'sync': ['cinetopia.wsgi:application'],
+    'uvicorn': ['cinetopia.asgi:application', '--worker-class', 'uvicorn.workers.UvicornWorker'],
+}
+
+PASSWORD = 'loadtest'
+
+
+def server_environment(args, work_dir, weather_port):
+    """Variables d'environnement des commandes de gestion et de gunicorn."""
+    environment = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE='cinetopia.settings_loadtest',
+        LOADTEST_DB=str(work_dir / 'loadtest.sqlite3'),
+        LOADTEST_DATA_PATH=str(args.catalog),
+        LOADTEST_ARTIFACT_DIR=str(work_dir / 'artifacts'),
+        ASYNC_VIEWS='True' if args.server == 'uvicorn' else 'False',
+        WEATHER_API_KEY='loadtest',
+        WEATHER_API_SCHEME='http',
+        WEATHER_API_HOST=f'127.0.0.1:{weather_port}',
+        WEATHER_CACHE_TTL=str(args.weather_cache_ttl),
+        WEATHER_CACHE_STALE_TTL=str(args.weather_cache_stale_ttl),
+    )
+    # Cache des sessions propre au banc
+    if environment.get('CACHE_BACKEND', 'file') == 'file':
+        environment.setdefault('CACHE_LOCATION', str(work_dir / 'cache'))
+    return environment
+
+
+def manage(env, *command):
+    subprocess.run([sys.executable, 'manage.py', *command], cwd=ROOT, env=env, check=True)
+
+
+def prepare(args, env):
+    """Base SQLite, comptes des utilisateurs virtuels et artefact du modèle."""
+    manage(env, 'migrate', '--run-syncdb', '--verbosity', '0')
+    # Journal WAL (réglage conservé dans le fichier) : lectures concurrentes
+    # des workers pendant les écritures de session
+    import sqlite3
+    with sqlite3.connect(env['LOADTEST_DB']) as connection:
+        connection.execute('PRAGMA journal_mode=WAL')
+    manage(env, 'shell', '--command', (
+        "from django.contrib.auth.hashers import make_password\n"
+        "from django.contrib.auth.models import User\n"
+        f"password = make_password({PASSWORD!r})\n"
+        f"names = ['loadtest-%d' % i for i in range({args.users})]\n"
+        "existing = set(User.objects.filter(username__in=names).values_list('username', flat=True))\n"
+        "User.objects.bulk_create([User(username=name, password=password)"
+        " for name in names if name not in existing])\n"
+    ))
+    manage(env, 'build_recommender', '--verbosity', '0')
+    return [(f'loadtest-{position}', PASSWORD) for position in range(args.users)]
+
+
+def catalog_titles(catalog, limit=5000):
+    """Titres tirés du catalogue servi."""
+    import pandas as pd
+
+    names = pd.read_csv(catalog, usecols=['Nom'], nrows=limit)['Nom']
+    return names.dropna().astype(str).tolist()
+
+
+def start_server(args, env):
+    command = [
+        sys.executable, '-m', 'gunicorn', *SERVERS[args.server],
+        '--workers', str(args.workers), '--bind', f'127.0.0.1:{args.port}', '--timeout', '300',
+        '--log-level', 'warning',
+    ]
+    return subprocess.Popen(command, cwd=ROOT, env=env)
+
+
+def print_report(summary, elapsed):
+    total = sum(stats['requests'] for stats in summary.values())
+    print(f"{total} requêtes en {elapsed:.1f}s : {total / elapsed:.1f} req/s")
+    endpoint_header = "point d'accès"
+    print(f"{endpoint_header:<14}{'requêtes':>9}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p99 ms':>9}{'max ms':>9}{'erreurs':>9}")
+    for endpoint in ENDPOINTS:
+        stats = summary.get(endpoint)
+        if stats is None:
+            continue
+        print(f"{endpoint:<14}{stats['requests']:>9}{stats['throughput']:>8.1f}{stats['p50_ms']:>9.0f}"
+              f"{stats['p95_ms']:>9.0f}{stats['p99_ms']:>9.0f}{stats['max_ms']:>9.0f}{stats['errors']:>9}")
+        for kind, count in stats['error_kinds'].items():
+            print(f"{'':<14}{kind}: {count}")
+
+
+async def measure(args, accounts, titles):
+    import httpx
+
+    base_url = f'http://127.0.0.1:{args.port}'
+    async with httpx.AsyncClient(timeout=60) as probe:
+        await wait_ready(probe, base_url)
+    return await run_scenario(
+        base_url, accounts, titles, args.duration, warmup=args.warmup,
+        think_time=args.think_time, seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc de charge de bout en bout.")
+    parser.add_argument('--users', type=int, default=16, help="Utilisateurs virtuels simultanés.")
+    parser.add_argument('--duration', type=float, default=30, help="Durée de la mesure (secondes).")
+    parser.add_argument('--warmup', type=float, default=5, help="Chauffe non mesurée (secondes).")
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help="Pause moyenne entre deux parcours (secondes).")
+    parser.add_argument('--server', choices=list(SERVERS), default='sync')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--catalog', type=Path,
+                        help="CSV des films (sinon catalogue synthétique de --rows films).")
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--weather-latency', type=float, default=0.2)
+    parser.add_argument('--weather-jitter', type=float, default=0.05)
+    parser.add_argument('--weather-error-rate', type=float, default=0.0)
+    parser.add_argument('--weather-error-status', type=int, default=503)
+    parser.add_argument('--weather-cache-ttl', type=int, default=600,
+                        help="WEATHER_CACHE_TTL des workers (0 : chaque page interroge l'API).")
+    parser.add_argument('--weather-cache-stale-ttl', type=int, default=3600)
+    parser.add_argument('--work-dir', type=Path, help="Dossier de la base, du catalogue et des artefacts.")
+    parser.add_argument('--output', type=Path, help="Rapport JSON.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or Path(tempfile.mkdtemp(prefix='cinetopia-loadtest-'))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    if args.catalog is None:
+        from benchmarks.synthetic import write_catalog
+        args.catalog = write_catalog(work_dir / 'movies.csv', args.rows, seed=args.seed)
+    args.catalog = args.catalog.resolve()
+
+    # Une ligne de journal par requête sinon
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    weather = start_weather_stub(
+        latency=args.weather_latency, jitter=args.weather_jitter,
+        error_rate=args.weather_error_rate, error_status=args.weather_error_status, seed=args.seed,
+    )
+    env = server_environment(args, work_dir, weather.server_address[1])
+    print(f"Préparation dans {work_dir} (catalogue {args.catalog.name})", flush=True)
+    accounts = prepare(args, env)
+    titles = catalog_titles(args.catalog)
+
+    print(f"{args.server}, {args.workers} workers, {args.users} utilisateurs, {args.duration:.0f}s "
+          f"(+{args.warmup:.0f}s de chauffe), API météo {args.weather_latency * 1000:.0f} ms "
+          f"± {args.weather_jitter * 1000:.0f} ms, {args.weather_error_rate:.0%} d'erreurs, "
+          f"cache météo {args.weather_cache_ttl}s, {os.cpu_count()} cœurs", flush=True)
+    server = start_server(args, env)
+    try:
+        summary, elapsed = asyncio.run(measure(args, accounts, titles))
+    finally:
+        server.terminate()
+        server.wait()
+        weather.shutdown()
+
+    print_report(summary, elapsed)
+    print(f"API météo factice : {weather.requests} appels, {weather.errors} erreurs injectées")
+    if args.output:
+        args.output.write_text(json.dumps({
+            'config': {key: str(value) if isinstance(value, Path) else value
+                       for key, value in vars(args).items()},
+            'cpu_count': os.cpu_count(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'elapsed': elapsed,
+            'endpoints': summary,
+            'weather_stub': {'requests': weather.requests, 'errors': weather.errors},
+        }, indent=2) + '\n')
+        print(f"Rapport écrit dans {args.output}")
+
+
+if __name__ == '__main__':
+    main()
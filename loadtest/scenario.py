@@ -0,0 +1,175 @@
+"""
+Scénario multi-utilisateurs du banc de charge.
+
+Chaque utilisateur virtuel a son propre client HTTP (cookies de session et
+jeton CSRF) et son propre compte. Après connexion par le formulaire, il
+enchaîne jusqu'à la fin de la mesure le parcours du site :
+
+1. ``GET /home/`` (appel à l'API météo) ;
+2. ``GET /movie/`` puis ``POST /movie/`` (``MovieRecommendationForm``), qui
+   redirige vers ``/results/<ligne>-<titre>/`` ;
+3. ``GET /results/<ligne>-<titre>/`` (redirection suivie) ;
+4. ``POST /recommend/`` (API JSON).
+
+Les latences et les erreurs sont relevées par point d'accès.
+"""
+import asyncio
+import random
+import time
+
+import numpy as np
+
+ENDPOINTS = ('login', 'home', 'movie', 'movie_submit', 'results', 'recommend')
+
+
+class Recorder:
+    """Latences (ms) et erreurs par point d'accès, hors période de chauffe."""
+
+    def __init__(self, record_from):
+        self.record_from = record_from
+        self.latencies = {endpoint: [] for endpoint in ENDPOINTS}
+        self.errors = {endpoint: {} for endpoint in ENDPOINTS}
+
+    def add(self, endpoint, started, elapsed, error=None):
+        if started < self.record_from:
+            return
+        self.latencies[endpoint].append(elapsed * 1000)
+        if error is not None:
+            self.errors[endpoint][error] = self.errors[endpoint].get(error, 0) + 1
+
+    def summary(self, duration):
+        """Débit, percentiles et erreurs par point d'accès."""
+        summary = {}
+        for endpoint in ENDPOINTS:
+            values = self.latencies[endpoint]
+            if not values:
+                continue
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            summary[endpoint] = {
+                'requests': len(values),
+                'throughput': len(values) / duration,
+                'p50_ms': p50,
+                'p95_ms': p95,
+                'p99_ms': p99,
+                'max_ms': max(values),
+                'errors': sum(self.errors[endpoint].values()),
+                'error_kinds': self.errors[endpoint],
+            }
+        return summary
+
+
+async def wait_ready(client, base_url, timeout=600):
+    """Attend que le serveur réponde (modèle préchargé par les workers)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get(f'{base_url}/login/')
+        except Exception:
+            await asyncio.sleep(0.5)
+            continue
+        if response.status_code != 200:
+            raise RuntimeError(f"Serveur {base_url} en erreur (HTTP {response.status_code})")
+        return
+    raise RuntimeError(f"Serveur {base_url} non disponible après {timeout}s")
+
+
+async def login(client, base_url, username, password):
+    """Connexion par le formulaire, avec le jeton CSRF du cookie ``csrftoken``."""
+    await client.get(f'{base_url}/login/')
+    response = await client.post(f'{base_url}/login/', data={
+        'username': username,
+        'password': password,
+        'csrfmiddlewaretoken': client.cookies['csrftoken'],
+    }, headers={'Referer': f'{base_url}/login/'})
+    if 'sessionid' not in client.cookies:
+        raise RuntimeError(f"Connexion de '{username}' refusée ({response.status_code})")
+    return response
+
+
+async def _timed(recorder, endpoint, request, check):
+    """Exécute ``request()`` et consigne sa latence ; retourne la réponse (ou None)."""
+    started = time.monotonic()
+    clock = time.perf_counter()
+    try:
+        response = await request()
+    except Exception as e:
+        recorder.add(endpoint, started, time.perf_counter() - clock, type(e).__name__)
+        return None
+    error = check(response)
+    recorder.add(endpoint, started, time.perf_counter() - clock, error)
+    return response
+
+
+def _status(expected):
+    def check(response):
+        return None if response.status_code == expected else f'HTTP {response.status_code}'
+    return check
+
+
+def _recommend_ok(response):
+    if response.status_code != 200:
+        return f'HTTP {response.status_code}'
+    return None if response.json().get('success') else 'success=false'
+
+
+async def virtual_user(client, base_url, credentials, titles, deadline, recorder, think_time, rng):
+    """Parcours d'un utilisateur jusqu'à ``deadline`` (horloge monotone)."""
+    username, password = credentials
+    started = time.monotonic()
+    clock = time.perf_counter()
+    try:
+        await login(client, base_url, username, password)
+        recorder.add('login', started, time.perf_counter() - clock)
+    except Exception as e:
+        recorder.add('login', started, time.perf_counter() - clock, type(e).__name__)
+        return
+
+    def csrf_headers(path):
+        return {'X-CSRFToken': client.cookies.get('csrftoken', ''), 'Referer': f'{base_url}{path}'}
+
+    while time.monotonic() < deadline:
+        title = rng.choice(titles)
+        await _timed(recorder, 'home', lambda: client.get(f'{base_url}/home/'), _status(200))
+        await _timed(recorder, 'movie', lambda: client.get(f'{base_url}/movie/'), _status(200))
+        submitted = await _timed(recorder, 'movie_submit', lambda: client.post(
+            f'{base_url}/movie/', data={'movie_name': title}, headers=csrf_headers('/movie/'),
+        ), _status(302))
+        if submitted is not None and submitted.status_code == 302:
+            location = submitted.headers['location']
+            await _timed(recorder, 'results', lambda: client.get(
+                location if location.startswith('http') else f'{base_url}{location}'
+            ), _status(200))
+        await _timed(recorder, 'recommend', lambda: client.post(
+            f'{base_url}/recommend/', data={'movie_name': title}, headers=csrf_headers('/recommend/'),
+        ), _recommend_ok)
+        if think_time:
+            await asyncio.sleep(rng.uniform(0, 2 * think_time))
+
+
+async def run_scenario(base_url, accounts, titles, duration, warmup=0.0, think_time=0.0, seed=0):
+    """
+    Lance un utilisateur virtuel par compte de ``accounts`` (``[(nom, mot de
+    passe)]``) pendant ``warmup + duration`` secondes ; retourne le résumé
+    par point d'accès des requêtes parties après la chauffe.
+    """
+    import httpx
+
+    started = time.monotonic()
+    recorder = Recorder(record_from=started + warmup)
+    deadline = started + warmup + duration
+    limits = httpx.Limits(max_connections=1, max_keepalive_connections=1)
+    clients = [httpx.AsyncClient(timeout=120, limits=limits) for _ in accounts]
+    try:
+        await asyncio.gather(*(
+            virtual_user(
+                client, base_url, credentials, titles, deadline, recorder, think_time,
+                random.Random(seed + position),
+            )
+            for position, (client, credentials) in enumerate(zip(clients, accounts))
+        ))
+    finally:
+        for client in clients:
+            await client.aclose()
+    # Les derniers parcours débordent de l'échéance : durée réelle de la mesure
+    elapsed = time.monotonic() - recorder.record_from
+    return recorder.summary(elapsed), elapsed
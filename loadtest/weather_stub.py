@@ -0,0 +1,113 @@
+"""
+API météo factice, à la place de l'hôte RapidAPI de ``cinetopia/config.py``.
+
+Répond à ``GET /forecast.json`` avec une prévision fixe au format de
+WeatherAPI, après une latence réglable (``latency`` ± ``jitter`` secondes) ;
+une part ``error_rate`` des réponses est une erreur ``error_status``. Le
+serveur s'utilise depuis le banc de charge (``start_weather_stub``) ou seul,
+avec ``WEATHER_API_SCHEME=http`` et ``WEATHER_API_HOST=127.0.0.1:<port>`` :
+
+Usage :
+    python -m loadtest.weather_stub --port 8081 --latency 0.2 --jitter 0.05 --error-rate 0.02
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FORECAST = {
+    'location': {'name': 'Limoges', 'country': 'France'},
+    'forecast': {'forecastday': [
+        {'date': f'2024-06-0{day}', 'day': {
+            'maxtemp_c': 24.0, 'mintemp_c': 12.0, 'condition': {'text': 'Ensoleillé'},
+        }}
+        for day in range(1, 4)
+    ]},
+}
+
+
+class WeatherStubServer(ThreadingHTTPServer):
+    """Serveur de l'API factice ; ``requests`` et ``errors`` comptent les réponses."""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503, seed=None):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.body = json.dumps(FORECAST).encode()
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self):
+        """Retourne ``(délai, erreur)`` de la prochaine réponse."""
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        return delay, failed
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        delay, failed = self.server.draw()
+        time.sleep(delay)
+        if failed:
+            body = b'{"error": {"message": "Erreur simulee"}}'
+            self.send_response(self.server.error_status)
+        else:
+            body = self.server.body
+            self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_weather_stub(latency=0.0, jitter=0.0, error_rate=0.0, error_status=503,
+                       port=0, seed=None):
+    """Démarre l'API factice dans un thread ; retourne le serveur (``server_address``)."""
+    server = WeatherStubServer(
+        ('127.0.0.1', port), latency=latency, jitter=jitter,
+        error_rate=error_rate, error_status=error_status, seed=seed,
+    )
+    threading.Thread(target=server.serve_forever, name='weather-stub', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API météo factice pour les tests de charge.")
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.2, help="Latence moyenne (secondes).")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Variation uniforme de la latence (secondes).")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Part des réponses en erreur.")
+    parser.add_argument('--error-status', type=int, default=503)
+    args = parser.parse_args()
+
+    server = WeatherStubServer(
+        ('127.0.0.1', args.port), latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, error_status=args.error_status,
+    )
+    print(f"API météo factice sur http://127.0.0.1:{args.port}/forecast.json "
+          f"({args.latency * 1000:.0f} ms, {args.error_rate:.0%} d'erreurs)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class MyappCinetopiaConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'myapp_cinetopia'
+
+    def ready(self):
+        # Profils de recommandation mis à jour avec l'historique des
+        # utilisateurs, cache des utilisateurs connectés invalidé
+        from . import signals  # noqa: F401
@@ -0,0 +1,372 @@
+"""
+Persistance du modèle de recommandation sous forme d'artefact versionné.
+
+Un artefact est un dossier ``<artifact_dir>/<version>/`` contenant :
+
+- ``manifest.json`` : métadonnées (format, version, empreinte du CSV source) ;
+- ``vocabulary.json`` et ``idf.npy`` : l'état ajusté du ``TfidfVectorizer``
+  (``idf.npy`` seul pour le vectoriseur ``hashing``, sans vocabulaire) ;
+- ``matrix_data.npy``, ``matrix_indices.npy``, ``matrix_indptr.npy`` : les
+  tableaux de la matrice TF-IDF creuse (CSR) ;
+- ou, si les plongements denses sont activés, ``embeddings.npy`` et
+  ``components.npy`` : les plongements ``float32`` et la matrice de projection ;
+- ``note.npy``, ``year.npy`` : les colonnes numériques ;
+- ``neighbors_indices.npy``, ``neighbors_distances.npy`` (optionnels) : la
+  table précalculée des K plus proches voisins de chaque film ;
+- ``catalog_codes.npy``, ``catalog_strings.npy``, ``catalog_offsets.npy`` : les
+  colonnes textuelles du catalogue (``CompactCatalog``) : codes des cellules
+  et table des chaînes distinctes.
+
+Les fichiers ``.npy`` sont ouverts avec ``numpy.memmap`` : tous les workers
+gunicorn partagent alors le cache de pages du système au lieu de conserver
+chacun une copie privée de la matrice.
+
+Le fichier ``<artifact_dir>/CURRENT`` désigne la version active ; la date de
+modification de ``<artifact_dir>/RELOAD`` signale aux workers qu'ils doivent
+recharger le modèle (commande ``reload_recommender``).
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+from .catalog import CompactCatalog
+from .neighbors import compute_top_k
+from .segments import SegmentedMatrix
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = 3
+
+CURRENT_POINTER = 'CURRENT'
+RELOAD_TRIGGER = 'RELOAD'
+MANIFEST_FILE = 'manifest.json'
+VOCABULARY_FILE = 'vocabulary.json'
+IDF_FILE = 'idf.npy'
+MATRIX_FILES = {
+    'data': 'matrix_data.npy',
+    'indices': 'matrix_indices.npy',
+    'indptr': 'matrix_indptr.npy',
+}
+EMBEDDING_FILES = {
+    'embeddings': 'embeddings.npy',
+    'components': 'components.npy',
+}
+NUMERIC_FILES = {
+    'Note': 'note.npy',
+    'Annee': 'year.npy',
+}
+NEIGHBOR_FILES = {
+    'indices': 'neighbors_indices.npy',
+    'distances': 'neighbors_distances.npy',
+}
+CATALOG_FILES = {
+    'codes': 'catalog_codes.npy',
+    'buffer': 'catalog_strings.npy',
+    'offsets': 'catalog_offsets.npy',
+}
+
+
+class RecommenderArtifact:
+    """État ajusté du modèle tel que relu depuis le disque."""
+
+    def __init__(self, path, manifest, vectorizer, matrix, catalog, numeric, neighbors=None,
+                 components=None):
+        self.path = path
+        self.manifest = manifest
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        self.components = components
+        self.catalog = catalog
+        self.numeric = numeric
+        self.neighbors = neighbors
+
+    @property
+    def version(self):
+        return self.manifest['version']
+
+    @property
+    def movies(self):
+        """Films de la base intégrés à l'artefact : pk -> (ligne, updated_at)."""
+        return {
+            int(pk): (row, datetime.fromisoformat(updated_at))
+            for pk, (row, updated_at) in self.manifest.get('movies', {}).items()
+        }
+
+    @property
+    def movies_synced_at(self):
+        synced_at = self.manifest.get('movies_synced_at')
+        return datetime.fromisoformat(synced_at) if synced_at else None
+
+    @property
+    def retired(self):
+        return frozenset(self.manifest.get('retired', ()))
+
+
+def file_checksum(path, chunk_size=1 << 20):
+    """Calcule l'empreinte SHA-256 d'un fichier."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def numeric_columns(data):
+    """Extrait les colonnes numériques (note, année de sortie) en tableaux compacts."""
+    import pandas as pd
+
+    n_rows = len(data)
+    if 'Note' in data.columns:
+        note = pd.to_numeric(data['Note'], errors='coerce').to_numpy(dtype=np.float32)
+    else:
+        note = np.full(n_rows, np.nan, dtype=np.float32)
+
+    if 'Date_de_sortie' in data.columns:
+        years = data['Date_de_sortie'].astype(str).str.extract(r'(\d{4})', expand=False)
+        year = pd.to_numeric(years, errors='coerce').fillna(0).to_numpy(dtype=np.int16)
+    else:
+        year = np.zeros(n_rows, dtype=np.int16)
+
+    return {'Note': note, 'Annee': year}
+
+
+def save_artifact(state, source_path, artifact_dir, keep=3, top_k=0):
+    """
+    Écrit l'état ajusté ``state`` du service dans une nouvelle version d'artefact.
+
+    Avec ``top_k > 0``, la table des ``top_k`` plus proches voisins de chaque
+    film est précalculée et enregistrée avec l'artefact.
+    """
+    from .vectorizers import vectorizer_kind
+
+    artifact_dir = Path(artifact_dir)
+    artifact_dir.mkdir(parents=True, exist_ok=True)
+
+    checksum = file_checksum(source_path)
+    created_at = datetime.now(timezone.utc)
+    # Microsecondes : deux constructions rapprochées (autre --top-k) ne partagent pas de version
+    version = f"{created_at:%Y%m%dT%H%M%S.%f}-{checksum[:12]}"
+
+    # Écriture dans un dossier temporaire puis renommage atomique
+    tmp_dir = Path(tempfile.mkdtemp(prefix='.build-', dir=artifact_dir))
+    try:
+        kind = vectorizer_kind(state.vectorizer)
+        if kind == 'hashing':
+            vocabulary_size = int(state.vectorizer.n_features)
+        else:
+            vocabulary = {term: int(index) for term, index in state.vectorizer.vocabulary_.items()}
+            with open(tmp_dir / VOCABULARY_FILE, 'w', encoding='utf-8') as handle:
+                json.dump(vocabulary, handle, ensure_ascii=False)
+            vocabulary_size = len(vocabulary)
+        np.save(tmp_dir / IDF_FILE, state.vectorizer.idf_)
+
+        matrix = state.data_vectorized
+        if isinstance(matrix, SegmentedMatrix):
+            # Films intégrés depuis l'entraînement : fusionnés dans la base de l'artefact
+            matrix = matrix.merged()
+        embedding_dim = 0
+        if sparse.issparse(matrix):
+            matrix = matrix.tocsr()
+            matrix.sort_indices()
+            for name, filename in MATRIX_FILES.items():
+                np.save(tmp_dir / filename, getattr(matrix, name))
+        else:
+            embedding_dim = int(matrix.shape[1])
+            np.save(tmp_dir / EMBEDDING_FILES['embeddings'], matrix)
+            np.save(tmp_dir / EMBEDDING_FILES['components'], state.components)
+        for name, filename in NUMERIC_FILES.items():
+            np.save(tmp_dir / filename, state.numeric[name])
+
+        if top_k > 0:
+            neighbor_indices, neighbor_distances = compute_top_k(matrix, top_k, exclude=state.retired)
+            np.save(tmp_dir / NEIGHBOR_FILES['indices'], neighbor_indices)
+            np.save(tmp_dir / NEIGHBOR_FILES['distances'], neighbor_distances)
+            top_k = int(neighbor_indices.shape[1])
+
+        columns = state.catalog.columns
+        for name, array in zip(('codes', 'buffer', 'offsets'), state.catalog.arrays()):
+            np.save(tmp_dir / CATALOG_FILES[name], array)
+
+        manifest = {
+            'format': ARTIFACT_FORMAT,
+            'version': version,
+            'created_at': created_at.isoformat(),
+            'source': {
+                'path': str(source_path),
+                'sha256': checksum,
+                'rows': int(matrix.shape[0]),
+            },
+            'matrix_shape': list(matrix.shape),
+            'vectorizer': kind,
+            'vocabulary_size': vocabulary_size,
+            'embedding_dim': embedding_dim,
+            'corpus_terms': int(state.corpus_terms),
+            'top_k': max(top_k, 0),
+            'columns': columns,
+            'movies': {
+                str(pk): [int(row), updated_at.isoformat()]
+                for pk, (row, updated_at) in state.movies.items()
+            },
+            'movies_synced_at': (
+                state.movies_synced_at.isoformat() if state.movies_synced_at else None
+            ),
+            'retired': sorted(int(row) for row in state.retired),
+        }
+        with open(tmp_dir / MANIFEST_FILE, 'w', encoding='utf-8') as handle:
+            json.dump(manifest, handle, indent=2, ensure_ascii=False)
+
+        version_dir = artifact_dir / version
+        os.replace(tmp_dir, version_dir)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    _write_pointer(artifact_dir, version)
+    _prune_versions(artifact_dir, keep=keep, current=version)
+    logger.info(f"Artefact de recommandation écrit: {version_dir}")
+    return version_dir
+
+
+def load_artifact(source_path, artifact_dir, mmap=True, embedding_dim=0, vectorizer='tfidf'):
+    """
+    Relit la version active de l'artefact.
+
+    Retourne ``None`` si aucun artefact n'est disponible ou s'il ne correspond
+    plus au CSV source ou à la dimension des plongements demandée
+    (``embedding_dim``, 0 pour la matrice TF-IDF creuse) ou au vectoriseur
+    demandé (``vectorizer``), auquel cas le modèle doit être réentraîné. Avec ``mmap=True``, les tableaux sont projetés en
+    mémoire en lecture seule.
+    """
+    artifact_dir = Path(artifact_dir)
+    pointer = artifact_dir / CURRENT_POINTER
+    if not pointer.exists():
+        return None
+
+    version_dir = artifact_dir / pointer.read_text(encoding='utf-8').strip()
+    try:
+        with open(version_dir / MANIFEST_FILE, encoding='utf-8') as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Manifeste d'artefact illisible ({version_dir}): {e}")
+        return None
+
+    if manifest.get('format') != ARTIFACT_FORMAT:
+        logger.info(f"Format d'artefact {manifest.get('format')} non supporté, réentraînement")
+        return None
+
+    if manifest.get('embedding_dim', 0) != embedding_dim:
+        logger.info(
+            f"Artefact {manifest['version']} construit avec embedding_dim="
+            f"{manifest.get('embedding_dim', 0)} (attendu: {embedding_dim}), réentraînement"
+        )
+        return None
+
+    if manifest.get('vectorizer', 'tfidf') != vectorizer:
+        logger.info(
+            f"Artefact {manifest['version']} construit avec le vectoriseur "
+            f"{manifest.get('vectorizer', 'tfidf')} (attendu: {vectorizer}), réentraînement"
+        )
+        return None
+
+    if Path(source_path).exists():
+        if file_checksum(source_path) != manifest['source']['sha256']:
+            logger.info(f"Artefact {manifest['version']} périmé, réentraînement")
+            return None
+    else:
+        logger.warning(f"CSV source introuvable, artefact {manifest['version']} utilisé sans validation")
+
+    # Import différé : ``request_reload`` et la commande ``reload_recommender``
+    # n'ont pas besoin de scikit-learn
+    from .vectorizers import make_vectorizer
+
+    fitted = make_vectorizer(vectorizer, n_features=manifest['vocabulary_size'])
+    if vectorizer == 'tfidf':
+        with open(version_dir / VOCABULARY_FILE, encoding='utf-8') as handle:
+            fitted.vocabulary_ = json.load(handle)
+    fitted.idf_ = np.load(version_dir / IDF_FILE)
+
+    mmap_mode = 'r' if mmap else None
+    components = None
+    if embedding_dim:
+        matrix = np.load(version_dir / EMBEDDING_FILES['embeddings'], mmap_mode=mmap_mode)
+        components = np.load(version_dir / EMBEDDING_FILES['components'], mmap_mode=mmap_mode)
+    else:
+        arrays = {
+            name: np.load(version_dir / filename, mmap_mode=mmap_mode)
+            for name, filename in MATRIX_FILES.items()
+        }
+        matrix = sparse.csr_matrix(
+            (arrays['data'], arrays['indices'], arrays['indptr']),
+            shape=tuple(manifest['matrix_shape']),
+            copy=False,
+        )
+        # Les indices sont triés à l'écriture : évite toute réécriture du memmap
+        matrix.has_sorted_indices = True
+
+    numeric = {
+        name: np.load(version_dir / filename, mmap_mode=mmap_mode)
+        for name, filename in NUMERIC_FILES.items()
+    }
+    catalog = CompactCatalog.from_arrays(manifest['columns'], *(
+        np.load(version_dir / CATALOG_FILES[name], mmap_mode=mmap_mode)
+        for name in ('codes', 'buffer', 'offsets')
+    ))
+
+    neighbors = None
+    if manifest.get('top_k'):
+        neighbors = tuple(
+            np.load(version_dir / NEIGHBOR_FILES[name], mmap_mode=mmap_mode)
+            for name in ('indices', 'distances')
+        )
+
+    return RecommenderArtifact(
+        version_dir, manifest, fitted, matrix, catalog, numeric, neighbors, components
+    )
+
+
+def request_reload(artifact_dir):
+    """Demande aux workers de recharger le modèle ; retourne le chemin du fichier signal."""
+    artifact_dir = Path(artifact_dir)
+    artifact_dir.mkdir(parents=True, exist_ok=True)
+    _write_atomic(artifact_dir, RELOAD_TRIGGER, datetime.now(timezone.utc).isoformat())
+    return artifact_dir / RELOAD_TRIGGER
+
+
+def reload_requested_at(artifact_dir):
+    """Date (timestamp) de la dernière demande de rechargement, 0 si aucune."""
+    try:
+        return os.stat(Path(artifact_dir) / RELOAD_TRIGGER).st_mtime
+    except OSError:
+        return 0.0
+
+
+def _write_pointer(artifact_dir, version):
+    """Met à jour le pointeur ``CURRENT`` de façon atomique."""
+    _write_atomic(artifact_dir, CURRENT_POINTER, version)
+
+
+def _write_atomic(artifact_dir, name, content):
+    """Écrit ``artifact_dir/name`` via un fichier temporaire renommé."""
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{name.lower()}-', dir=artifact_dir)
+    with os.fdopen(fd, 'w', encoding='utf-8') as handle:
+        handle.write(content)
+    os.replace(tmp_path, Path(artifact_dir) / name)
+
+
+def _prune_versions(artifact_dir, keep, current):
+    """Supprime les versions les plus anciennes au-delà de ``keep``."""
+    versions = sorted(
+        path for path in artifact_dir.iterdir()
+        if path.is_dir() and not path.name.startswith('.')
+    )
+    for path in versions[:-keep] if keep > 0 else []:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,71 @@
+"""
+Authentification avec l'utilisateur connecté gardé en cache.
+
+``AuthenticationMiddleware`` recharge l'utilisateur de la session à chaque
+requête (un SELECT sur ``auth_user``). ``CachedModelBackend`` garde ses
+champs dans le cache Django par défaut pendant ``AUTH_USER_CACHE_TIMEOUT``
+secondes ; l'entrée est supprimée à chaque enregistrement ou suppression de
+l'utilisateur (voir ``signals.py``) : un changement de mot de passe invalide
+toujours les autres sessions. Les mises à jour en masse (``update()``), qui
+n'émettent pas de signal, ne sont prises en compte qu'à l'expiration.
+
+Le hachage du mot de passe n'est pas mis en cache, seulement l'empreinte de
+session qui en dérive (déjà enregistrée dans chaque session) : le mot de
+passe d'un utilisateur lu depuis le cache est un champ différé, relu en base
+au premier accès.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import router
+
+# Champ jamais mis en cache
+PASSWORD_FIELD = 'password'
+
+
+def user_cache_key(user_id):
+    """Clé de cache d'un utilisateur."""
+    return f'auth:user:{user_id}'
+
+
+def forget_user(user_id):
+    """Retire un utilisateur du cache."""
+    cache.delete(user_cache_key(user_id))
+
+
+def cached_fields(user):
+    """Champs de ``user`` mis en cache, sans le mot de passe, et son empreinte de session."""
+    fields = {
+        field.attname: getattr(user, field.attname)
+        for field in user._meta.concrete_fields
+        if field.attname != PASSWORD_FIELD
+    }
+    return fields, user.get_session_auth_hash()
+
+
+def user_from_cache(entry):
+    """Utilisateur reconstruit depuis une entrée de ``cached_fields``."""
+    fields, session_auth_hash = entry
+    UserModel = get_user_model()
+    user = UserModel.from_db(router.db_for_read(UserModel), list(fields), list(fields.values()))
+    # Empreinte vérifiée par le middleware à chaque requête, sans relire le
+    # mot de passe ; les clés de SECRET_KEY_FALLBACKS passent par
+    # ``_get_session_auth_hash``, qui relit le champ différé
+    user.get_session_auth_hash = lambda: session_auth_hash
+    return user
+
+
+class CachedModelBackend(ModelBackend):
+    """``ModelBackend`` dont ``get_user`` lit d'abord le cache."""
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        entry = cache.get(key)
+        if entry is not None:
+            return user_from_cache(entry)
+        user = super().get_user(user_id)
+        # Utilisateur inactif ou supprimé : rien à garder
+        if user is not None:
+            cache.set(key, cached_fields(user), settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
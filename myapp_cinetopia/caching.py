@@ -0,0 +1,277 @@
+"""
+Caches mémoire utilisés par les services.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    """Valeur en cache et date de son chargement."""
+
+    __slots__ = ('value', 'fetched_at', 'retry_at')
+
+    def __init__(self, value, fetched_at):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.retry_at = 0.0
+
+
+class StaleWhileRevalidateCache:
+    """
+    Cache à durée de vie (TTL) servant les valeurs périmées pendant leur rafraîchissement.
+
+    - valeur fraîche (âge < ``ttl``) : servie directement ;
+    - valeur périmée (âge < ``ttl + stale_ttl``) : servie immédiatement, et un
+      unique rafraîchissement est lancé en arrière-plan ;
+    - valeur absente ou expirée : l'appelant attend le chargement.
+
+    Un seul chargement est en cours par clé : N requêtes concurrentes ne
+    déclenchent qu'un appel amont. Le chargeur signale un échec en retournant
+    ``None`` ou en levant une exception ; aucun nouvel essai n'a alors lieu
+    avant ``error_backoff`` secondes.
+    """
+
+    def __init__(self, ttl, stale_ttl, error_backoff=30, clock=time.monotonic):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.error_backoff = error_backoff
+        self._clock = clock
+        self._entries = {}
+        self._inflight = {}
+        self._failures = {}
+        self._tasks = set()
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        """Retourne la valeur associée à ``key``, chargée au besoin par ``loader()``."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry.fetched_at
+                if age < self.ttl:
+                    return entry.value
+                if age < self.ttl + self.stale_ttl:
+                    if key not in self._inflight and now >= entry.retry_at:
+                        future = self._inflight[key] = Future()
+                        threading.Thread(
+                            target=self._load, args=(key, loader, future),
+                            name=f'cache-refresh-{key}', daemon=True,
+                        ).start()
+                    return entry.value
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                if now - self._failures.get(key, float('-inf')) < self.error_backoff:
+                    return None
+                future = self._inflight[key] = Future()
+
+        if owner:
+            self._load(key, loader, future)
+        return future.result()
+
+    async def aget(self, key, loader):
+        """
+        Variante asynchrone de ``get`` : ``loader`` est une fonction coroutine.
+
+        Le rafraîchissement d'une valeur périmée est une tâche de la boucle
+        d'événements courante ; l'attente d'un chargement ne bloque pas la boucle.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry.fetched_at
+                if age < self.ttl:
+                    return entry.value
+                if age < self.ttl + self.stale_ttl:
+                    if key not in self._inflight and now >= entry.retry_at:
+                        future = self._inflight[key] = Future()
+                        task = asyncio.get_running_loop().create_task(
+                            self._aload(key, loader, future)
+                        )
+                        # Référence forte : une tâche non référencée peut être collectée
+                        self._tasks.add(task)
+                        task.add_done_callback(self._tasks.discard)
+                    return entry.value
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                if now - self._failures.get(key, float('-inf')) < self.error_backoff:
+                    return None
+                future = self._inflight[key] = Future()
+
+        if owner:
+            await self._aload(key, loader, future)
+        return await asyncio.wrap_future(future)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._failures.clear()
+
+    def _load(self, key, loader, future):
+        """Charge la valeur, met le cache à jour et réveille les appelants en attente."""
+        try:
+            value = loader()
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement de la clé de cache {key!r}: {e}")
+            value = None
+        self._store(key, value, future)
+
+    async def _aload(self, key, loader, future):
+        """Comme ``_load``, avec un chargeur asynchrone."""
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            # Annulation (client déconnecté, boucle arrêtée) : pas un échec de
+            # l'amont, mais les appelants en attente doivent être libérés
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_result(None)
+            raise
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement de la clé de cache {key!r}: {e}")
+            value = None
+        self._store(key, value, future)
+
+    def _store(self, key, value, future):
+        """Met le cache à jour avec ``value`` et réveille les appelants en attente."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if value is not None:
+                self._entries[key] = _Entry(value, now)
+                self._failures.pop(key, None)
+            elif entry is not None and now - entry.fetched_at < self.ttl + self.stale_ttl:
+                # Échec du rafraîchissement : la valeur périmée reste servie
+                entry.retry_at = now + self.error_backoff
+                value = entry.value
+            else:
+                self._failures[key] = now
+            self._inflight.pop(key, None)
+
+        future.set_result(value)
+
+
+class LRUCache:
+    """Cache mémoire borné, évincant les entrées les moins récemment utilisées."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
+
+
+class ResultCache:
+    """
+    Cache de résultats à deux niveaux : LRU local au processus, puis cache
+    Django partagé (optionnel) pour que les workers profitent des mêmes succès.
+
+    Les clés sont préfixées par la version du modèle : un réentraînement
+    invalide donc toutes les entrées sans purge explicite.
+    """
+
+    def __init__(self, maxsize=1024, alias=None, timeout=3600, prefix='reco'):
+        self.local = LRUCache(maxsize)
+        self.alias = alias
+        self.timeout = timeout
+        self.prefix = prefix
+        self.shared_hits = 0
+
+    def _key(self, version, key):
+        return ':'.join(str(part) for part in (self.prefix, version, *key))
+
+    def _shared(self):
+        if not self.alias:
+            return None
+        from django.core.cache import caches
+        return caches[self.alias]
+
+    def get(self, version, key):
+        full_key = self._key(version, key)
+        value = self.local.get(full_key)
+        if value is not None:
+            return value
+
+        shared = self._shared()
+        if shared is not None:
+            try:
+                value = shared.get(full_key)
+            except Exception as e:
+                logger.warning(f"Cache partagé indisponible: {e}")
+                value = None
+            if value is not None:
+                self.shared_hits += 1
+                self.local.set(full_key, value)
+        return value
+
+    def set(self, version, key, value):
+        full_key = self._key(version, key)
+        self.local.set(full_key, value)
+
+        shared = self._shared()
+        if shared is not None:
+            try:
+                shared.set(full_key, value, self.timeout)
+            except Exception as e:
+                logger.warning(f"Cache partagé indisponible: {e}")
+
+    def clear(self):
+        self.local.clear()
+
+    def stats(self):
+        stats = self.local.stats()
+        stats['local_hits'] = stats['hits']
+        stats['shared_hits'] = self.shared_hits
+        stats['hits'] += self.shared_hits
+        stats['misses'] -= self.shared_hits
+        return stats
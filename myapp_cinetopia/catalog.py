@@ -0,0 +1,212 @@
+"""
+Stockage compact des colonnes textuelles du catalogue.
+
+Un ``DataFrame`` pandas conserve chaque cellule sous forme d'objet ``str``
+Python (au moins une cinquantaine d'octets d'en-tête par valeur, plus un
+pointeur par cellule), et les valeurs répétées (genres, réalisateurs, dates)
+autant de fois qu'elles apparaissent. ``CompactCatalog`` range toutes les
+chaînes distinctes, une seule fois, dans une table UTF-8 unique adressée par
+des décalages ; chaque colonne n'est plus qu'un tableau ``int32`` de codes
+dans cette table, comme une colonne catégorielle. Les valeurs ne sont
+décodées qu'à la lecture d'une cellule.
+
+Les tableaux étant de simples ``numpy.ndarray``, ils s'écrivent dans
+l'artefact et se relisent en ``memmap``, partagés entre les workers.
+"""
+import numpy as np
+
+# Colonnes textuelles conservées pour l'affichage et le filtrage des recommandations
+CATALOG_COLUMNS = [
+    'Nom', 'Lien_de_l_affiche', 'Nom_du_réalisateur',
+    'Noms_de_tous_les_acteurs', 'Synopsis', 'Genre', 'Date_de_sortie',
+]
+
+
+class _StringTable:
+    """Chaînes ``first_id``, ``first_id + 1``... encodées bout à bout en UTF-8."""
+
+    def __init__(self, first_id, buffer, offsets):
+        self.first_id = first_id
+        self.buffer = buffer
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, first_id, strings):
+        encoded = [value.encode('utf-8') for value in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        buffer = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(first_id, buffer, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self):
+        return self.buffer.nbytes + self.offsets.nbytes
+
+    def get(self, string_id):
+        position = string_id - self.first_id
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return self.buffer[start:end].tobytes().decode('utf-8')
+
+
+class _Column:
+    """Vue en lecture seule d'une colonne : ``column[row]`` décode la cellule."""
+
+    def __init__(self, catalog, position):
+        self._catalog = catalog
+        self._position = position
+
+    def __len__(self):
+        return len(self._catalog)
+
+    def __getitem__(self, row):
+        return self._catalog._string(self._catalog.codes_array[row, self._position])
+
+    def __iter__(self):
+        for code in self._catalog.codes_array[:, self._position]:
+            yield self._catalog._string(code)
+
+    def tolist(self):
+        return list(self)
+
+
+def _intern(frame, columns, first_id):
+    """Codes des cellules de ``frame`` et nouvelles chaînes distinctes à ranger."""
+    import pandas as pd
+
+    table = {}
+    strings = []
+    codes = np.empty((len(frame), len(columns)), dtype=np.int32)
+    for position, name in enumerate(columns):
+        if name not in frame.columns:
+            values = pd.Series('', index=frame.index, dtype=object)
+        else:
+            values = frame[name].fillna('').astype(str)
+        # Factorisation vectorisée, puis internement des seules valeurs distinctes
+        local_codes, uniques = pd.factorize(values)
+        mapping = np.empty(len(uniques), dtype=np.int32)
+        for local, value in enumerate(uniques):
+            code = table.get(value)
+            if code is None:
+                code = table[value] = first_id + len(strings)
+                strings.append(value)
+            mapping[local] = code
+        codes[:, position] = mapping[local_codes]
+    return codes, strings
+
+
+class CompactCatalog:
+    """
+    Colonnes textuelles du catalogue : une table de chaînes internées et un
+    tableau de codes de forme ``(lignes, colonnes)``.
+    """
+
+    def __init__(self, columns, codes, tables):
+        self.columns = list(columns)
+        self.codes_array = codes
+        self._tables = list(tables)
+        self._positions = {name: position for position, name in enumerate(self.columns)}
+
+    @classmethod
+    def from_frame(cls, frame, columns=CATALOG_COLUMNS):
+        """Construit le catalogue à partir des colonnes ``columns`` de ``frame``."""
+        codes, strings = _intern(frame, columns, first_id=0)
+        return cls(columns, codes, [_StringTable.build(0, strings)])
+
+    @classmethod
+    def from_arrays(cls, columns, codes, buffer, offsets):
+        """Reconstruit un catalogue écrit par ``arrays`` (éventuellement en ``memmap``)."""
+        return cls(columns, codes, [_StringTable(0, buffer, offsets)])
+
+    @classmethod
+    def concatenate(cls, catalogs):
+        """
+        Catalogue des lignes de ``catalogs`` mises bout à bout (mêmes colonnes).
+
+        Les tables de chaînes sont concaténées sans dédoublonnage entre
+        catalogues, comme pour ``appended`` : seuls les codes sont décalés.
+        """
+        catalogs = [catalog.compacted() if len(catalog._tables) > 1 else catalog
+                    for catalog in catalogs]
+        first_ids = np.cumsum([0] + [catalog.n_strings for catalog in catalogs[:-1]])
+        codes = np.concatenate([
+            catalog.codes_array + np.int32(first_id)
+            for catalog, first_id in zip(catalogs, first_ids)
+        ])
+        return cls(catalogs[0].columns, codes, [
+            _StringTable(int(first_id), catalog._tables[0].buffer, catalog._tables[0].offsets)
+            for catalog, first_id in zip(catalogs, first_ids)
+        ]).compacted()
+
+    def arrays(self):
+        """Retourne ``(codes, buffer, offsets)``, les tableaux à persister."""
+        if len(self._tables) > 1:
+            return self.compacted().arrays()
+        table = self._tables[0]
+        return self.codes_array, table.buffer, table.offsets
+
+    def __len__(self):
+        return len(self.codes_array)
+
+    @property
+    def nbytes(self):
+        """Taille des tableaux du catalogue, en octets."""
+        return self.codes_array.nbytes + sum(table.nbytes for table in self._tables)
+
+    @property
+    def n_strings(self):
+        return sum(len(table) for table in self._tables)
+
+    def column(self, name):
+        """Vue de la colonne ``name``."""
+        return _Column(self, self._positions[name])
+
+    def codes(self, name):
+        """Codes de la colonne ``name`` : deux cellules de même valeur ont le même code."""
+        return self.codes_array[:, self._positions[name]]
+
+    def value(self, code):
+        """Chaîne correspondant à un code."""
+        return self._string(code)
+
+    def record(self, row, columns):
+        """Valeurs des colonnes ``columns`` pour la ligne ``row``."""
+        codes = self.codes_array[row]
+        return {name: self._string(codes[self._positions[name]]) for name in columns}
+
+    def appended(self, frame):
+        """
+        Retourne un nouveau catalogue avec les lignes de ``frame`` ajoutées.
+
+        La table de chaînes existante n'est ni modifiée ni copiée (elle peut
+        être en ``memmap``) : les chaînes des nouvelles lignes forment une
+        table supplémentaire, sans dédoublonnage avec la table existante.
+        """
+        codes, strings = _intern(frame, self.columns, first_id=self.n_strings)
+        tables = self._tables
+        if strings:
+            tables = tables + [_StringTable.build(self.n_strings, strings)]
+        return CompactCatalog(self.columns, np.concatenate([self.codes_array, codes]), tables)
+
+    def compacted(self):
+        """Catalogue équivalent avec une seule table de chaînes (pour l'écriture)."""
+        table = _StringTable(
+            0,
+            np.concatenate([table.buffer for table in self._tables]),
+            np.concatenate([self._tables[0].offsets] + [
+                table.offsets[1:] + offset
+                for table, offset in zip(
+                    self._tables[1:],
+                    np.cumsum([len(table.buffer) for table in self._tables[:-1]]),
+                )
+            ]),
+        )
+        return CompactCatalog(self.columns, self.codes_array, [table])
+
+    def _string(self, code):
+        for table in reversed(self._tables):
+            if code >= table.first_id:
+                return table.get(code)
+        raise IndexError(code)
@@ -0,0 +1,37 @@
+"""
+Plongements denses des films (TruncatedSVD).
+
+Les vecteurs TF-IDF comptent une dimension par terme du vocabulaire. Une
+décomposition en valeurs singulières tronquée les projette dans un espace de
+``n_components`` dimensions ; les plongements sont normalisés (norme L2) et
+stockés en ``float32``, de sorte que la similarité cosinus se réduit à un
+produit matrice-vecteur dense (BLAS).
+"""
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+
+
+def fit_embeddings(matrix, n_components, seed=0):
+    """
+    Ajuste la projection sur ``matrix`` (TF-IDF).
+
+    Retourne ``(embeddings, components)`` : les plongements normalisés du
+    catalogue, de forme ``(n, n_components)``, et la matrice de projection,
+    de forme ``(n_components, n_features)``, pour projeter de nouveaux textes.
+    """
+    svd = TruncatedSVD(n_components=n_components, random_state=seed)
+    embeddings = svd.fit_transform(matrix)
+    return _normalize(embeddings), svd.components_.astype(np.float32)
+
+
+def project(matrix, components):
+    """Projette des vecteurs TF-IDF dans l'espace des plongements."""
+    return _normalize(np.asarray(matrix @ components.T))
+
+
+def _normalize(embeddings):
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    embeddings /= norms
+    return embeddings
@@ -0,0 +1,160 @@
+"""
+Filtres à facettes des recommandations : genre, années de sortie, note minimale.
+
+Les filtres sont appliqués pendant la recherche des voisins, sous forme d'un
+masque booléen des lignes autorisées, et non après : une recommandation
+filtrée compte autant de films qu'une recommandation libre.
+
+``FacetIndex`` précalcule un ensemble de bits (``numpy.packbits``) par genre,
+à partir des codes de la colonne ``Genre`` du catalogue ; les années et les
+notes sont comparées directement dans les colonnes numériques compactes
+(``int16`` / ``float32``) déjà chargées par le service.
+"""
+import numpy as np
+
+from .title_index import normalize_title
+
+# Séparateurs des genres multiples dans la colonne ``Genre`` (« Drame, Thriller »)
+GENRE_SEPARATORS = (',', '|', '/')
+
+# Bornes acceptées pour les filtres reçus des utilisateurs
+MIN_YEAR, MAX_YEAR = 1800, 2100
+MAX_RATING = 10
+
+
+def split_genres(value):
+    """Genres d'une cellule ``Genre``, dans l'ordre, sans doublons ni vides."""
+    for separator in GENRE_SEPARATORS[1:]:
+        value = value.replace(separator, GENRE_SEPARATORS[0])
+    genres = []
+    for genre in value.split(GENRE_SEPARATORS[0]):
+        genre = genre.strip()
+        if genre and genre not in genres:
+            genres.append(genre)
+    return genres
+
+
+class MovieFilters:
+    """
+    Critères de filtrage d'une recommandation.
+
+    ``genres`` : au moins un de ces genres (accents et casse ignorés) ;
+    ``year_min`` / ``year_max`` : bornes incluses de l'année de sortie ;
+    ``min_rating`` : note minimale. Un film sans année (ou sans note) est
+    écarté dès qu'un filtre porte sur l'année (ou la note).
+    """
+
+    def __init__(self, genres=(), year_min=None, year_max=None, min_rating=None):
+        self.genres = tuple(sorted({normalize_title(genre) for genre in genres} - {''}))
+        self.year_min = year_min
+        self.year_max = year_max
+        self.min_rating = min_rating
+
+    @classmethod
+    def from_params(cls, params):
+        """
+        Construit les filtres depuis les paramètres d'une requête (``QueryDict``
+        ou dictionnaire) : ``genre`` (répétable ou séparé par des virgules),
+        ``year_min``, ``year_max``, ``min_rating``.
+
+        Lève ``ValueError`` (message destiné à l'utilisateur) si une valeur est invalide.
+        """
+        if hasattr(params, 'getlist'):
+            raw_genres = params.getlist('genre')
+        else:
+            raw_genres = params.get('genre') or []
+            if isinstance(raw_genres, str):
+                raw_genres = [raw_genres]
+        genres = [genre for value in raw_genres for genre in split_genres(value)]
+
+        def number(name, convert, low, high):
+            value = params.get(name)
+            if value in (None, ''):
+                return None
+            try:
+                value = convert(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Paramètre '{name}' invalide.")
+            if not low <= value <= high:
+                raise ValueError(f"Paramètre '{name}' hors limites ({low} à {high}).")
+            return value
+
+        filters = cls(
+            genres=genres,
+            year_min=number('year_min', int, MIN_YEAR, MAX_YEAR),
+            year_max=number('year_max', int, MIN_YEAR, MAX_YEAR),
+            min_rating=number('min_rating', float, 0, MAX_RATING),
+        )
+        if filters.year_min is not None and filters.year_max is not None \
+                and filters.year_min > filters.year_max:
+            raise ValueError("'year_min' doit être inférieur ou égal à 'year_max'.")
+        return filters
+
+    @property
+    def key(self):
+        """Clé hachable des critères (cache des résultats)."""
+        return (self.genres, self.year_min, self.year_max, self.min_rating)
+
+    def __bool__(self):
+        return self.key != ((), None, None, None)
+
+    def __repr__(self):
+        return f"MovieFilters{self.key!r}"
+
+
+class FacetIndex:
+    """Ensembles de bits des genres et colonnes numériques du catalogue."""
+
+    def __init__(self, catalog, numeric):
+        self._n_rows = len(catalog)
+        self._year = numeric['Annee']
+        self._rating = numeric['Note']
+
+        # Chaque valeur distincte de la colonne n'est découpée qu'une fois
+        codes, inverse = np.unique(catalog.codes('Genre'), return_inverse=True)
+        members = {}
+        self._labels = {}
+        for position, code in enumerate(codes):
+            for genre in split_genres(catalog.value(code)):
+                key = normalize_title(genre)
+                if key:
+                    members.setdefault(key, []).append(position)
+                    self._labels.setdefault(key, genre)
+
+        self._bitsets = {}
+        for key, positions in members.items():
+            has_genre = np.zeros(len(codes), dtype=bool)
+            has_genre[positions] = True
+            self._bitsets[key] = np.packbits(has_genre[inverse])
+
+    def __len__(self):
+        return self._n_rows
+
+    @property
+    def genres(self):
+        """Libellés des genres du catalogue, triés."""
+        return sorted(self._labels.values(), key=normalize_title)
+
+    @property
+    def nbytes(self):
+        return sum(bitset.nbytes for bitset in self._bitsets.values())
+
+    def mask(self, filters):
+        """Masque booléen (nouveau tableau) des lignes satisfaisant ``filters``."""
+        if filters.genres:
+            packed = np.zeros((self._n_rows + 7) // 8, dtype=np.uint8)
+            for genre in filters.genres:
+                bitset = self._bitsets.get(genre)
+                if bitset is not None:
+                    packed |= bitset
+            mask = np.unpackbits(packed, count=self._n_rows).view(bool)
+        else:
+            mask = np.ones(self._n_rows, dtype=bool)
+
+        if filters.year_min is not None:
+            mask &= self._year >= filters.year_min
+        if filters.year_max is not None:
+            mask &= (self._year <= filters.year_max) & (self._year > 0)
+        if filters.min_rating is not None:
+            mask &= self._rating >= filters.min_rating
+        return mask
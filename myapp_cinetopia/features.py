@@ -0,0 +1,87 @@
+"""
+Construction vectorisée des caractéristiques textuelles des films.
+
+Les opérations portent sur des colonnes entières (méthodes ``.str`` de
+pandas) plutôt que sur chaque ligne, ce qui évite une boucle Python sur le
+catalogue lors de l'entraînement.
+"""
+import pandas as pd
+
+# Mentions « id » / « name » et nombres laissés par le format JSON des mots-clés
+KEYWORDS_NOISE = r'\b(?:id|name)\b|\d+'
+
+
+def normalize_columns(data):
+    """Renomme les colonnes du CSV source (espaces, apostrophe) en identifiants."""
+    data = data.rename(columns={'Lien de l\'affiche': 'Lien_de_l_affiche'})
+    data.columns = [col.replace(' ', '_') for col in data.columns]
+    return data
+
+
+def clean_keywords(keywords):
+    """Nettoie la colonne des mots-clés ; les valeurs non textuelles sont conservées."""
+    if keywords.dtype != object:
+        return keywords
+    cleaned = keywords.str.replace(KEYWORDS_NOISE, '', regex=True)
+    return cleaned.where(cleaned.notna(), keywords)
+
+
+def combine_features(data):
+    """
+    Combine les caractéristiques de chaque film en un seul texte.
+
+    Le genre, le réalisateur, le synopsis et la date sont répétés deux fois
+    pour peser davantage dans la vectorisation TF-IDF.
+    """
+    def column(name):
+        if name not in data.columns:
+            return pd.Series('', index=data.index, dtype=object)
+        return data[name].astype(str)
+
+    def twice(name):
+        values = column(name)
+        return values + values
+
+    return column('Noms_de_tous_les_acteurs').str.cat([
+        twice('Nom_du_réalisateur'),
+        twice('Genre'),
+        twice('Synopsis'),
+        column('Note'),
+        twice('Date_de_sortie'),
+        column('keywords'),
+    ], sep=' ')
+
+
+def preprocess(data):
+    """Retourne une copie nettoyée des données avec la colonne ``combined_features``."""
+    data = data.fillna('')
+    if 'keywords' in data.columns:
+        data['keywords'] = clean_keywords(data['keywords'])
+    data['combined_features'] = combine_features(data)
+    return data
+
+
+# Champs du modèle Movie et colonnes correspondantes du catalogue CSV
+MOVIE_COLUMNS = {
+    'title': 'Nom',
+    'description': 'Synopsis',
+    'image_url': 'Lien_de_l_affiche',
+    'director': 'Nom_du_réalisateur',
+    'actors': 'Noms_de_tous_les_acteurs',
+    'genre': 'Genre',
+    'rating': 'Note',
+    'release_date': 'Date_de_sortie',
+}
+
+
+def movies_frame(movies):
+    """Convertit des instances de ``Movie`` en lignes au format du catalogue CSV."""
+    records = []
+    for movie in movies:
+        record = {column: getattr(movie, field) for field, column in MOVIE_COLUMNS.items()}
+        if record['Note'] is not None:
+            record['Note'] = float(record['Note'])
+        if record['Date_de_sortie'] is not None:
+            record['Date_de_sortie'] = record['Date_de_sortie'].isoformat()
+        records.append(record)
+    return pd.DataFrame.from_records(records, columns=list(MOVIE_COLUMNS.values()))
@@ -0,0 +1,275 @@
+"""
+Mesure du temps passé par étape de traitement des requêtes.
+
+Activée par ``PERFORMANCE_METRICS`` (voir ``config.py``). Les étapes
+(recherche du titre, des voisins, mise en forme, appel météo, rendu...)
+sont délimitées dans le code par ``with stage('nom'):``. Pendant une
+requête, les durées s'additionnent par étape et sont enregistrées en une
+fois à la fin de la requête par ``TimingMiddleware`` : un histogramme par
+étape (durée de l'étape dans la requête) et un par vue (durée totale), et
+l'en-tête ``Server-Timing`` de la réponse. Hors requête (rafraîchissement
+de la météo en arrière-plan), chaque durée est enregistrée directement. Les
+histogrammes sont exposés au format texte de Prometheus par la vue
+``metrics_view`` (``/metrics``, réservée aux membres du personnel).
+
+Désactivée, ``stage`` retourne un gestionnaire de contexte partagé qui ne
+fait rien et le middleware est retiré de la chaîne au démarrage
+(``MiddlewareNotUsed``). Le réglage est lu à l'import du module, puis suivi
+par le signal ``setting_changed`` (``override_settings``).
+
+Les histogrammes sont propres à chaque processus : sous gunicorn, chaque
+lecture de ``/metrics`` rend compte du worker qui l'a servie.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .metrics import rss_bytes
+
+# Bornes supérieures (secondes) des classes des histogrammes
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Durées (secondes) par étape de la requête en cours ; None hors requête
+_request_timings = ContextVar('request_timings', default=None)
+
+
+class Histogram:
+    """Histogramme à classes fixes (accès protégés par le verrou du registre)."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class TimingRegistry:
+    """Histogrammes de durée indexés par (métrique, étiquette)."""
+
+    METRICS = {
+        'stage': ('cinetopia_stage_seconds', 'stage', "Durée des étapes de traitement des requêtes"),
+        'request': ('cinetopia_request_seconds', 'view', "Durée totale des requêtes, par vue"),
+    }
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, metric, label):
+        histogram = self._histograms.get((metric, label))
+        if histogram is None:
+            histogram = self._histograms[(metric, label)] = Histogram()
+        return histogram
+
+    def observe(self, metric, label, seconds):
+        with self._lock:
+            self._histogram(metric, label).observe(seconds)
+
+    def observe_request(self, view, total, timings):
+        """Enregistre une requête : durée totale et durées de ses étapes."""
+        with self._lock:
+            self._histogram('request', view).observe(total)
+            for name, seconds in timings.items():
+                self._histogram('stage', name).observe(seconds)
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def exposition(self):
+        """Lignes au format texte de Prometheus (``# HELP``, ``# TYPE``, séries)."""
+        lines = []
+        with self._lock:
+            histograms = [
+                (key, histogram.buckets, list(histogram.counts), histogram.sum, histogram.count)
+                for key, histogram in sorted(self._histograms.items())
+            ]
+        for metric, (name, label_name, help_text) in self.METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (kind, label), buckets, counts, total, count in histograms:
+                if kind != metric:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{{label_name}="{label}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{label_name}="{label}",le="+Inf"}} {count}')
+                lines.append(f'{name}_sum{{{label_name}="{label}"}} {total}')
+                lines.append(f'{name}_count{{{label_name}="{label}"}} {count}')
+        return lines
+
+
+def _sample(lines, name, kind, help_text, value):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    lines.append(f"{name} {value}")
+
+
+def exposition(service=None):
+    """
+    Métriques du processus au format texte de Prometheus : histogrammes des
+    étapes et des requêtes, mémoire résidente et, si ``service`` (service de
+    recommandation déjà construit) est fourni, compteurs de ses caches et de
+    ses rechargements.
+    """
+    lines = registry.exposition()
+    _sample(lines, 'cinetopia_process_resident_memory_bytes', 'gauge',
+            "Mémoire résidente du worker", rss_bytes())
+    if service is not None:
+        for cache_name, stats in (('result', service.cache_stats()), ('profile', service.profiles.stats())):
+            for key in ('hits', 'misses', 'evictions'):
+                _sample(lines, f'cinetopia_{cache_name}_cache_{key}_total', 'counter',
+                        f"Cache {cache_name} : {key}", stats[key])
+            _sample(lines, f'cinetopia_{cache_name}_cache_size', 'gauge',
+                    f"Cache {cache_name} : entrées", stats['size'])
+        reloads = service.reload_stats()
+        _sample(lines, 'cinetopia_model_reloads_total', 'counter',
+                "Rechargements à chaud du modèle", reloads['count'])
+        if reloads['last']:
+            _sample(lines, 'cinetopia_model_last_reload_seconds', 'gauge',
+                    "Durée du dernier rechargement du modèle", reloads['last']['duration'])
+            for key, help_text in (
+                ('before', "Mémoire résidente avant le dernier rechargement du modèle"),
+                ('peak', "Pic de mémoire résidente pendant le dernier rechargement du modèle"),
+                ('after', "Mémoire résidente après le dernier rechargement du modèle"),
+            ):
+                _sample(lines, f'cinetopia_model_last_reload_rss_{key}_bytes', 'gauge',
+                        help_text, reloads['last'][f'rss_{key}'])
+    return '\n'.join(lines) + '\n'
+
+
+class _Stage:
+    __slots__ = ('name', 'started')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _NoopStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP_STAGE = _NoopStage()
+
+_enabled = settings.PERFORMANCE_METRICS
+
+
+@receiver(setting_changed)
+def _setting_changed(setting, value, **kwargs):
+    global _enabled
+    if setting == 'PERFORMANCE_METRICS':
+        _enabled = bool(value)
+
+
+def stage(name):
+    """Gestionnaire de contexte mesurant l'étape ``name`` (sans effet si désactivé)."""
+    if not _enabled:
+        return _NOOP_STAGE
+    return _Stage(name)
+
+
+def record(name, seconds):
+    """Ajoute une durée de l'étape ``name`` à la requête en cours (ou à son histogramme)."""
+    timings = _request_timings.get()
+    if timings is None:
+        registry.observe('stage', name, seconds)
+    else:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def server_timing(timings, total):
+    """Valeur de l'en-tête ``Server-Timing`` (durées en millisecondes)."""
+    entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items()]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ', '.join(entries)
+
+
+class TimingMiddleware:
+    """
+    Mesure la durée totale de chaque requête et renvoie les durées de ses
+    étapes dans l'en-tête ``Server-Timing``.
+
+    À placer en tête de ``MIDDLEWARE`` pour couvrir les autres middlewares.
+    Compatible WSGI et ASGI ; retiré de la chaîne si ``PERFORMANCE_METRICS``
+    est désactivé.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not _enabled:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings = {}
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_timings.reset(token)
+        return self._finish(request, response, timings, started)
+
+    async def __acall__(self, request):
+        timings = {}
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_timings.reset(token)
+        return self._finish(request, response, timings, started)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # La session n'est lue qu'au premier accès : on la charge ici pour en
+        # mesurer la lecture séparément de la vue
+        session = getattr(request, 'session', None)
+        if session is not None:
+            with stage('session'):
+                session.keys()
+        return None
+
+    @staticmethod
+    def _finish(request, response, timings, started):
+        total = time.perf_counter() - started
+        match = request.resolver_match
+        registry.observe_request((match and match.url_name) or 'unmatched', total, timings)
+        response['Server-Timing'] = server_timing(timings, total)
+        return response
+
+
+registry = TimingRegistry()
@@ -0,0 +1,73 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp_cinetopia.artifacts import request_reload, save_artifact
+
+
+def table_width(state):
+    """Nombre de voisins précalculés par film dans ``state`` (0 sans table)."""
+    return 0 if state.top_k_indices is None else int(state.top_k_indices.shape[1])
+
+
+def expected_width(state, top_k):
+    """Largeur de la table écrite par ``save_artifact`` pour ``top_k`` (bornée au catalogue)."""
+    return min(max(top_k, 0), state.data_vectorized.shape[0])
+
+
+class Command(BaseCommand):
+    """Entraîne le modèle de recommandation et l'écrit sous forme d'artefact."""
+
+    help = "Entraîne le modèle de recommandation et écrit un artefact versionné."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Réentraîne même si l'artefact courant est à jour.",
+        )
+        parser.add_argument(
+            '--keep', type=int, default=3,
+            help="Nombre de versions d'artefact à conserver (défaut: 3).",
+        )
+        parser.add_argument(
+            '--reload', action='store_true',
+            help="Demande ensuite aux workers en cours d'exécution de charger le nouvel artefact.",
+        )
+        parser.add_argument(
+            '--top-k', type=int, default=None,
+            help="Nombre de voisins précalculés par film (défaut: RECOMMENDER_TOP_K).",
+        )
+
+    def handle(self, *args, **options):
+        from myapp_cinetopia.models import Movie
+        from myapp_cinetopia.services import movie_service
+
+        source_path = Path(settings.RECOMMENDER_DATA_PATH)
+        if not source_path.exists():
+            raise CommandError(f"CSV source introuvable: {source_path}")
+
+        top_k = options['top_k']
+        if top_k is None:
+            top_k = settings.RECOMMENDER_TOP_K
+
+        if movie_service.artifact_version and not options['force']:
+            width = table_width(movie_service.state)
+            if width == expected_width(movie_service.state, top_k):
+                self.stdout.write(f"Artefact déjà à jour: {movie_service.artifact_version}")
+                return
+            self.stdout.write(f"Table des voisins de l'artefact en top-{width}, top-{max(top_k, 0)} demandé.")
+
+        # Les films de la base sont entraînés avec le CSV et inclus dans l'artefact
+        if movie_service.artifact_version or Movie.objects.exists():
+            movie_service._load_data(use_artifact=False, include_movies=True)
+
+        version_dir = save_artifact(
+            movie_service.state, source_path, settings.RECOMMENDER_ARTIFACT_DIR,
+            keep=options['keep'], top_k=top_k,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Artefact écrit: {version_dir}"))
+        if options['reload']:
+            request_reload(settings.RECOMMENDER_ARTIFACT_DIR)
+            self.stdout.write("Rechargement demandé aux workers.")
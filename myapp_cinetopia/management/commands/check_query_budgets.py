@@ -0,0 +1,116 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from myapp_cinetopia.query_budget import QueryBudgetExceeded, QueryCounter, query_budget
+from myapp_cinetopia.title_index import title_slug
+
+
+def scenario(title, row):
+    """
+    Requêtes du parcours vérifié : ``(nom d'URL, méthode, chemin, données)`` ;
+    des données textuelles sont envoyées en JSON.
+    """
+    return [
+        ('home', 'get', reverse('home'), None),
+        ('movie', 'get', reverse('movie'), None),
+        ('movie', 'post', reverse('movie'), {'movie_name': title}),
+        ('results', 'get', reverse('results', kwargs={'row': row, 'slug': title_slug(title)}), None),
+        ('recommend', 'post', reverse('recommend'), {'movie_name': title}),
+        ('recommend_batch', 'post', reverse('recommend_batch'), json.dumps({'titles': [title]})),
+        ('autocomplete', 'get', reverse('autocomplete') + f'?q={title[:3]}', None),
+        ('history', 'post', reverse('history'), {'movie_name': title, 'liked': '1'}),
+        ('history', 'get', reverse('history'), None),
+        ('recommend_user', 'get', reverse('recommend_user'), None),
+        ('history_remove', 'post', reverse('history_remove'), {'movie_name': title}),
+    ]
+
+
+class Command(BaseCommand):
+    """Vérifie les budgets de requêtes SQL des vues (``QUERY_BUDGETS``) sur une base de test."""
+
+    help = (
+        "Parcourt les vues sur une base de test, caches vides, et échoue si l'une "
+        "d'elles dépasse son budget de requêtes SQL (QUERY_BUDGETS)."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--catalog', type=Path,
+            help="CSV des films à servir (défaut: RECOMMENDER_DATA_PATH), ex. un catalogue "
+                 "synthétique de benchmarks.synthetic.",
+        )
+
+    def handle(self, *args, **options):
+        overrides = {
+            'QUERY_BUDGET_CHECKS': True,
+            # Pas de synchronisation des films en arrière-plan pendant la vérification
+            'RECOMMENDER_SYNC_INTERVAL': None,
+            # Cache propre à la vérification, vidé avant chaque requête
+            'CACHES': {'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'query-budgets',
+            }},
+        }
+        if options['catalog'] is not None:
+            overrides['RECOMMENDER_DATA_PATH'] = options['catalog'].resolve()
+            overrides['RECOMMENDER_ARTIFACT_DIR'] = Path(tempfile.mkdtemp(prefix='cinetopia-budgets-'))
+        source_path = Path(overrides.get('RECOMMENDER_DATA_PATH', settings.RECOMMENDER_DATA_PATH))
+        if not source_path.exists():
+            raise CommandError(f"CSV source introuvable: {source_path}")
+
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(**overrides):
+                failures = self.check_budgets()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if failures:
+            for failure in failures:
+                self.stderr.write(failure)
+            raise CommandError(f"{len(failures)} requête(s) au-delà du budget de leur vue.")
+        self.stdout.write(self.style.SUCCESS("Budgets de requêtes SQL respectés."))
+
+    def check_budgets(self):
+        """Exécute le parcours ; retourne les messages des budgets dépassés."""
+        from django.contrib.auth.models import User
+        from django.core.cache import cache
+        from myapp_cinetopia.services import warmup
+
+        # Modèle construit avant la mesure : son chargement n'est pas compté
+        service = warmup()
+        title = service.state.catalog.column('Nom')[0]
+        row = service.title_row(title)
+
+        client = Client()
+        client.force_login(User.objects.create_user('query-budget'))
+
+        failures = []
+        self.stdout.write(f"{'vue':<16}{'méthode':<9}{'HTTP':>5}{'requêtes':>10}{'budget':>8}")
+        for url_name, method, path, data in scenario(title, row):
+            # Caches vides : session et utilisateur relus en base, pire cas
+            cache.clear()
+            counter = QueryCounter()
+            status = '-'
+            try:
+                with connection.execute_wrapper(counter):
+                    extra = {'content_type': 'application/json'} if isinstance(data, str) else {}
+                    status = getattr(client, method)(path, data, **extra).status_code
+            except QueryBudgetExceeded as e:
+                failures.append(str(e))
+            budget = query_budget(url_name, method.upper())
+            budget = '-' if budget is None else budget
+            self.stdout.write(f"{url_name:<16}{method.upper():<9}{status:>5}{len(counter):>10}{budget:>8}")
+        return failures
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from myapp_cinetopia.artifacts import request_reload
+
+
+class Command(BaseCommand):
+    """Demande aux workers en cours d'exécution de recharger le modèle de recommandation."""
+
+    help = "Demande aux workers de recharger le modèle de recommandation (artefact courant ou CSV)."
+    requires_system_checks = []
+
+    def handle(self, *args, **options):
+        trigger = request_reload(settings.RECOMMENDER_ARTIFACT_DIR)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rechargement demandé ({trigger}) : chaque worker recharge le modèle à sa "
+            f"prochaine requête, au plus tard {settings.RECOMMENDER_RELOAD_CHECK_INTERVAL}s après."
+        ))
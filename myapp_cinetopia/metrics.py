@@ -0,0 +1,48 @@
+"""
+Mesures de ressources du processus.
+"""
+import os
+import resource
+import threading
+
+
+def rss_bytes():
+    """Mémoire résidente (RSS) courante du processus, en octets."""
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Hors Linux : pic depuis le démarrage (kilo-octets sous Linux, octets sous macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+class PeakMemorySampler:
+    """
+    Échantillonne la mémoire résidente en arrière-plan pour en relever le pic.
+
+    S'utilise comme gestionnaire de contexte autour d'une opération coûteuse
+    (rechargement du modèle) : ``peak`` donne alors le maximum observé.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.start_rss = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start_rss = self.peak = rss_bytes()
+        self._thread = threading.Thread(target=self._run, name='memory-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_bytes())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes())
@@ -0,0 +1,58 @@
+# Generated by Django 5.0.6 on 2026-10-17 02:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Movie',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(help_text='Titre du film', max_length=255, verbose_name='Titre')),
+                ('description', models.TextField(help_text='Synopsis du film', verbose_name='Description')),
+                ('image_url', models.URLField(help_text="Lien vers l'affiche du film", verbose_name="URL de l'affiche")),
+                ('release_date', models.DateField(help_text='Date de sortie du film', verbose_name='Date de sortie')),
+                ('director', models.CharField(blank=True, max_length=255, null=True, verbose_name='Réalisateur')),
+                ('actors', models.TextField(blank=True, help_text='Liste des acteurs principaux', null=True, verbose_name='Acteurs')),
+                ('genre', models.CharField(blank=True, max_length=255, null=True, verbose_name='Genre')),
+                ('rating', models.DecimalField(blank=True, decimal_places=1, help_text='Note du film (ex: 7.5)', max_digits=3, null=True, verbose_name='Note')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Film',
+                'verbose_name_plural': 'Films',
+                'ordering': ['-release_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WatchHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(help_text='Titre du film dans le catalogue', max_length=255, verbose_name='Titre')),
+                ('liked', models.BooleanField(default=False, help_text="Un film aimé pèse davantage dans le profil de l'utilisateur", verbose_name='Aimé')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='watch_history', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Film vu',
+                'verbose_name_plural': 'Historique des films vus',
+                'ordering': ['-updated_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='watchhistory',
+            constraint=models.UniqueConstraint(fields=('user', 'title'), name='unique_watch_history_title'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from django.urls import reverse
 
@@ -61,4 +62,44 @@ class Movie(models.Model):
         return self.title
     
     def get_absolute_url(self):
-        return reverse('movie_detail', kwargs={'pk': self.pk})
\ No newline at end of file
+        return reverse('movie_detail', kwargs={'pk': self.pk})
+
+
+class WatchHistory(models.Model):
+    """Film vu (ou aimé) par un utilisateur, base de ses recommandations personnalisées."""
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='watch_history',
+        verbose_name="Utilisateur"
+    )
+    title = models.CharField(
+        max_length=255,
+        verbose_name="Titre",
+        help_text="Titre du film dans le catalogue"
+    )
+    liked = models.BooleanField(
+        default=False,
+        verbose_name="Aimé",
+        help_text="Un film aimé pèse davantage dans le profil de l'utilisateur"
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Film vu"
+        verbose_name_plural = "Historique des films vus"
+        ordering = ['-updated_at']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'title'], name='unique_watch_history_title'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.title}"
+
+    @property
+    def weight(self):
+        """Poids du film dans le profil de l'utilisateur."""
+        return settings.RECOMMENDER_HISTORY_LIKED_WEIGHT if self.liked else 1.0
@@ -0,0 +1,238 @@
+"""
+Moteurs de recherche des plus proches voisins par similarité cosinus.
+
+Chaque moteur expose ``fit(X)`` et ``kneighbors(X, n_neighbors, mask=None)``,
+comme ``sklearn.neighbors.NearestNeighbors``, et retourne des distances
+cosinus (``1 - similarité``) triées par ordre croissant. ``mask`` (un booléen
+par ligne ajustée) restreint la recherche aux lignes autorisées (filtres).
+
+Moteurs disponibles :
+
+- ``brute`` (``CosineNeighbors``) : recherche exhaustive exacte, par défaut ;
+- ``inverted`` (``InvertedIndexNeighbors``) : recherche approchée pour les
+  grands catalogues.
+"""
+import numpy as np
+from scipy import sparse
+
+
+class CosineNeighbors:
+    """
+    Recherche exhaustive des plus proches voisins (distance cosinus).
+
+    Équivalent de ``NearestNeighbors(metric='cosine', algorithm='brute')``,
+    mais sans copie privée de la matrice ajustée : une matrice adossée à un
+    ``numpy.memmap`` reste partagée entre les processus.
+    """
+
+    # Sous cette part de lignes autorisées par le masque, seules ces lignes
+    # sont parcourues ; au-delà, les lignes exclues sont écartées après le calcul
+    subset_ratio = 0.25
+
+    def __init__(self, query_chunk_size=256):
+        self.query_chunk_size = query_chunk_size
+        self._fit_X = None
+        self._norms = None
+
+    def fit(self, X):
+        self._fit_X = X
+        self._norms = row_norms(X)
+        return self
+
+    def kneighbors(self, X, n_neighbors=10, mask=None):
+        """Retourne ``(distances, indices)`` triés par distance croissante."""
+        fit_X, norms, rows = self._fit_X, self._norms, None
+        if mask is not None:
+            rows = np.flatnonzero(mask)
+            if len(rows) < self.subset_ratio * fit_X.shape[0]:
+                # Filtre sélectif : seules les lignes autorisées sont parcourues
+                fit_X, norms, mask = fit_X[rows], norms[rows], None
+            else:
+                rows = None
+        n_neighbors = min(n_neighbors, fit_X.shape[0] if mask is None else int(mask.sum()))
+
+        all_distances = []
+        all_indices = []
+        for start in range(0, X.shape[0], self.query_chunk_size):
+            chunk = X[start:start + self.query_chunk_size]
+            similarities = self._similarities(chunk, fit_X, norms)
+            if mask is not None:
+                similarities[:, ~mask] = -np.inf
+            distances, indices = _top_k(similarities, n_neighbors)
+            all_distances.append(distances)
+            all_indices.append(indices if rows is None else rows[indices])
+
+        return np.vstack(all_distances), np.vstack(all_indices)
+
+    def _similarities(self, chunk, fit_X=None, norms=None):
+        """Similarités cosinus (requêtes × catalogue) sous forme dense."""
+        if fit_X is None:
+            fit_X, norms = self._fit_X, self._norms
+        dense = chunk.toarray() if sparse.issparse(chunk) else np.asarray(chunk)
+        query_norms = np.linalg.norm(dense, axis=1)
+        query_norms[query_norms == 0] = 1.0
+
+        # Produit matrice creuse × matrice dense : aucune copie du catalogue
+        similarities = np.asarray(fit_X @ dense.T).T
+        return similarities / query_norms[:, None] / norms[None, :]
+
+
+class InvertedIndexNeighbors:
+    """
+    Recherche approchée par index inversé des termes (listes de films par terme).
+
+    La similarité cosinus entre vecteurs TF-IDF ne dépend que des termes
+    partagés ; les vrais voisins partagent presque toujours les termes les plus
+    lourds de la requête (noms d'acteurs, de réalisateur, mots rares). Seuls
+    les films présents dans les listes de ces termes sont donc reclassés par
+    similarité exacte, au lieu du catalogue entier.
+
+    Réglages rappel / vitesse :
+
+    - ``n_terms`` : nombre de termes de la requête explorés, par poids
+      décroissant ; plus de termes, meilleur rappel ;
+    - ``max_candidates`` : budget de candidats par requête ; les listes qui
+      le dépasseraient (mots courants, peu discriminants) sont ignorées.
+
+    Le coût d'une requête est borné par ``max_candidates`` et ne croît pas
+    avec la taille du catalogue. Une requête ayant moins de ``n_neighbors``
+    candidats est résolue par recherche exhaustive.
+    """
+
+    def __init__(self, n_terms=16, max_candidates=5000):
+        self.n_terms = n_terms
+        self.max_candidates = max_candidates
+        self._exact = CosineNeighbors()
+        self._postings = None
+        self._offsets = None
+
+    def fit(self, X):
+        if not sparse.issparse(X):
+            raise ValueError("Le moteur 'inverted' requiert la matrice TF-IDF creuse")
+        self._exact.fit(X)
+        # Seuls les numéros de lignes sont conservés, pas les poids
+        by_term = sparse.csc_matrix(X)
+        self._postings = by_term.indices.astype(np.int32, copy=False)
+        self._offsets = by_term.indptr.astype(np.int64, copy=False)
+        return self
+
+    def kneighbors(self, X, n_neighbors=10, mask=None):
+        """Retourne ``(distances, indices)`` approchés, triés par distance croissante."""
+        fit_X = self._exact._fit_X
+        norms = self._exact._norms
+        n_neighbors = min(n_neighbors, fit_X.shape[0] if mask is None else int(mask.sum()))
+        X = sparse.csr_matrix(X)
+
+        all_distances = np.empty((X.shape[0], n_neighbors))
+        all_indices = np.empty((X.shape[0], n_neighbors), dtype=np.intp)
+        for row in range(X.shape[0]):
+            query = X[row]
+            candidates = self._candidates(query)
+            if mask is not None:
+                candidates = candidates[mask[candidates]]
+            if len(candidates) < n_neighbors:
+                distances, indices = self._exact.kneighbors(query, n_neighbors, mask=mask)
+                all_distances[row], all_indices[row] = distances[0], indices[0]
+                continue
+
+            # Reclassement exact des seuls candidats
+            query_norm = np.sqrt(query.multiply(query).sum()) or 1.0
+            similarities = np.asarray(fit_X[candidates] @ query.T.toarray()).ravel()
+            similarities /= norms[candidates] * query_norm
+            distances, positions = _top_k(similarities[None, :], n_neighbors)
+            all_distances[row] = distances[0]
+            all_indices[row] = candidates[positions[0]]
+
+        return all_distances, all_indices
+
+    def _candidates(self, query):
+        """Films présents dans les listes des termes les plus lourds de la requête."""
+        terms = query.indices[np.argsort(-query.data, kind='stable')][:self.n_terms]
+        starts = self._offsets[terms]
+        lengths = self._offsets[terms + 1] - starts
+
+        selected = []
+        total = 0
+        for start, length in zip(starts.tolist(), lengths.tolist()):
+            if total + length > self.max_candidates:
+                continue
+            selected.append(self._postings[start:start + length])
+            total += length
+        if not selected:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate(selected))
+
+
+ENGINES = {
+    'brute': CosineNeighbors,
+    'inverted': InvertedIndexNeighbors,
+}
+
+
+def build_engine(name='brute', **options):
+    """Instancie le moteur de recherche ``name`` avec ses réglages."""
+    try:
+        engine_class = ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Moteur de recherche inconnu: {name!r} (choix: {', '.join(ENGINES)})")
+    return engine_class(**options)
+
+
+def compute_top_k(X, k, memory_budget=64 * 1024 * 1024, exclude=()):
+    """
+    Précalcule les ``k`` plus proches voisins de chaque ligne de ``X``.
+
+    Le produit ``X · Xᵀ`` est calculé par blocs de lignes (produit de matrices
+    creuses) afin que le bloc de similarités denses tienne dans
+    ``memory_budget`` octets. Retourne ``(indices, distances)`` sous forme de
+    tableaux denses ``int32`` / ``float32`` de forme ``(n, k)``, triés par
+    distance croissante (le film lui-même en premier). Les lignes ``exclude``
+    (films retirés) ne figurent dans aucune liste.
+    """
+    n_samples = X.shape[0]
+    exclude = np.asarray(sorted(exclude), dtype=np.intp)
+    k = min(k, n_samples - len(exclude))
+    norms = row_norms(X).astype(np.float32)
+    X_t = X.T.tocsr() if sparse.issparse(X) else np.ascontiguousarray(X.T)
+    chunk_size = max(1, memory_budget // (n_samples * 8))
+
+    indices = np.empty((n_samples, k), dtype=np.int32)
+    distances = np.empty((n_samples, k), dtype=np.float32)
+    for start in range(0, n_samples, chunk_size):
+        stop = min(start + chunk_size, n_samples)
+        product = X[start:stop] @ X_t
+        if sparse.issparse(product):
+            product = product.toarray()
+        similarities = np.asarray(product, dtype=np.float32)
+        similarities /= norms[start:stop, None]
+        similarities /= norms[None, :]
+        similarities[:, exclude] = -np.inf
+
+        distances[start:stop], indices[start:stop] = _top_k(similarities, k)
+
+    return indices, distances
+
+
+def _top_k(similarities, k):
+    """Sélection partielle puis tri des ``k`` meilleures similarités de chaque ligne."""
+    n_samples = similarities.shape[1]
+    if k < n_samples:
+        candidates = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.tile(np.arange(n_samples), (similarities.shape[0], 1))
+    candidate_sims = np.take_along_axis(similarities, candidates, axis=1)
+    order = np.argsort(-candidate_sims, axis=1, kind='stable')
+
+    indices = np.take_along_axis(candidates, order, axis=1)
+    distances = np.clip(1.0 - np.take_along_axis(candidate_sims, order, axis=1), 0.0, 2.0)
+    return distances, indices
+
+
+def row_norms(X):
+    """Norme L2 de chaque ligne, les lignes nulles valant 1."""
+    if sparse.issparse(X):
+        norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+    else:
+        norms = np.linalg.norm(X, axis=1)
+    norms[norms == 0] = 1.0
+    return norms
@@ -0,0 +1,68 @@
+"""
+Profils de goûts des utilisateurs, pour les recommandations personnalisées.
+
+Le profil d'un utilisateur est la somme pondérée des vecteurs (TF-IDF ou
+plongements) des films de son historique, calculée en une seule agrégation
+creuse ``poids × lignes de l'historique``. Les recommandations sont les plus
+proches voisins de son barycentre (la similarité cosinus ignore la
+normalisation).
+
+Un profil est immuable : une modification de l'historique produit un nouveau
+profil par simple ajout ou retrait du vecteur du film concerné, sans
+reprendre tout l'historique.
+"""
+import time
+
+import numpy as np
+from scipy import sparse
+
+
+class UserProfile:
+    """Somme pondérée des vecteurs des films vus ou aimés par un utilisateur."""
+
+    __slots__ = ('model_version', 'vector', 'weights', 'built_at')
+
+    def __init__(self, model_version, vector, weights, built_at=None):
+        self.model_version = model_version
+        self.vector = vector
+        # Ligne du catalogue -> poids
+        self.weights = weights
+        self.built_at = time.monotonic() if built_at is None else built_at
+
+    @classmethod
+    def build(cls, model_version, matrix, weights):
+        """Profil des lignes ``weights`` (ligne -> poids) de ``matrix``."""
+        rows = np.fromiter(weights.keys(), dtype=np.int64, count=len(weights))
+        values = np.fromiter(weights.values(), dtype=np.float64, count=len(weights))
+        # Agrégation des seules lignes de l'historique (matrice éventuellement segmentée)
+        aggregation = sparse.csr_matrix(values[None, :])
+        return cls(model_version, aggregation @ matrix[rows], dict(weights))
+
+    def __len__(self):
+        return len(self.weights)
+
+    @property
+    def seen(self):
+        """Lignes de l'historique (à exclure des recommandations)."""
+        return self.weights.keys()
+
+    def centroid(self):
+        """Barycentre pondéré des vecteurs de l'historique."""
+        total = sum(self.weights.values())
+        return self.vector / total if total else self.vector
+
+    def updated(self, matrix, row, weight):
+        """
+        Retourne le profil avec la ligne ``row`` ajoutée, repondérée, ou
+        retirée (``weight=None``).
+        """
+        weights = dict(self.weights)
+        delta = -weights.pop(row, 0.0)
+        if weight:
+            weights[row] = weight
+            delta += weight
+        if not delta:
+            return UserProfile(self.model_version, self.vector, weights, self.built_at)
+        return UserProfile(
+            self.model_version, self.vector + delta * matrix[row:row + 1], weights, self.built_at
+        )
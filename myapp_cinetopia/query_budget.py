@@ -0,0 +1,96 @@
+"""
+Budgets de requêtes SQL par vue.
+
+``QUERY_BUDGETS`` (settings.py) associe le nom d'URL d'une vue au nombre
+maximal de requêtes SQL d'une requête HTTP, middlewares compris (session,
+utilisateur), ou à un dictionnaire méthode HTTP → budget. Avec
+``QUERY_BUDGET_CHECKS`` activé, ``QueryBudgetMiddleware`` compte les
+requêtes de chaque réponse et lève ``QueryBudgetExceeded`` en cas de
+dépassement : une régression N+1 fait échouer ``check_query_budgets``.
+``assert_max_queries`` applique la même vérification à un bloc de code.
+
+Les requêtes sont relevées par un ``execute_wrapper`` de la connexion, sans
+``DEBUG`` ; celles des threads d'arrière-plan (synchronisation des films)
+ne sont pas comptées.
+"""
+import contextlib
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Budget de requêtes SQL dépassé."""
+
+
+class QueryCounter:
+    """``execute_wrapper`` relevant les requêtes SQL exécutées."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __len__(self):
+        return len(self.queries)
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def check(self, limit, label):
+        """Lève ``QueryBudgetExceeded``, avec la liste des requêtes, au-delà de ``limit``."""
+        if len(self.queries) <= limit:
+            return
+        listing = '\n'.join(f"  {position}. {sql}" for position, sql in enumerate(self.queries, 1))
+        raise QueryBudgetExceeded(
+            f"{label} : {len(self.queries)} requêtes SQL pour un budget de {limit}\n{listing}"
+        )
+
+
+def query_budget(url_name, method):
+    """Budget de requêtes SQL d'une vue pour une méthode HTTP, ou ``None``."""
+    budget = settings.QUERY_BUDGETS.get(url_name)
+    if isinstance(budget, dict):
+        return budget.get(method)
+    return budget
+
+
+@contextlib.contextmanager
+def assert_max_queries(limit, using=DEFAULT_DB_ALIAS, label='Bloc'):
+    """
+    Vérifie que le bloc exécute au plus ``limit`` requêtes SQL sur la base
+    ``using`` ::
+
+        with assert_max_queries(2):
+            client.get('/home/')
+    """
+    counter = QueryCounter()
+    with connections[using].execute_wrapper(counter):
+        yield counter
+    counter.check(limit, label)
+
+
+class QueryBudgetMiddleware:
+    """
+    Vérifie le budget de requêtes SQL de la vue servie (``QUERY_BUDGETS``).
+
+    Synchrone uniquement : sous ASGI, Django l'adapte, au prix d'un passage
+    par un thread par requête (vérification réservée à la CI et au
+    développement).
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_BUDGET_CHECKS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        with connections[DEFAULT_DB_ALIAS].execute_wrapper(counter):
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        limit = query_budget(match.url_name, request.method) if match is not None else None
+        if limit is not None:
+            counter.check(limit, f"Vue '{match.url_name}' ({request.method} {request.path})")
+        return response
@@ -0,0 +1,961 @@
+"""
+Modèle de recommandation de films.
+
+Ce module importe pandas, SciPy et scikit-learn : il n'est chargé qu'à la
+première utilisation du service (voir ``services.movie_service``), et non à
+l'import des vues.
+"""
+import copy
+import hashlib
+import logging
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from .artifacts import file_checksum, load_artifact, numeric_columns, reload_requested_at
+from .caching import LRUCache, ResultCache
+from .catalog import CompactCatalog
+from .embeddings import fit_embeddings, project
+from .facets import FacetIndex
+from .features import movies_frame, normalize_columns, preprocess
+from .instrumentation import stage
+from .metrics import PeakMemorySampler, rss_bytes
+from .neighbors import build_engine, row_norms
+from .profiles import UserProfile
+from .segments import append_rows, segmented_engine, segments
+from .title_index import TitleIndex, TrigramIndex
+from .training import train_chunked
+from .vectorizers import make_vectorizer
+
+logger = logging.getLogger(__name__)
+
+# Colonnes renvoyées pour chaque film recommandé
+DISPLAY_COLUMNS = [
+    'Nom', 'Lien_de_l_affiche', 'Nom_du_réalisateur',
+    'Noms_de_tous_les_acteurs', 'Synopsis',
+]
+
+# Recouvrement (secondes) entre deux synchronisations des films de la base
+MOVIE_SYNC_OVERLAP = 5
+
+
+class RecommenderState:
+    """
+    État complet du modèle de recommandation à un instant donné.
+
+    Un état publié n'est jamais modifié : chaque mise à jour construit un
+    nouvel état puis le publie d'une seule affectation. Une requête en cours
+    travaille ainsi toujours sur un état cohérent, sans verrou.
+    """
+
+    def __init__(self, **fields):
+        # Colonnes textuelles (CompactCatalog) : seules celles servies sont conservées
+        self.catalog = None
+        self.vectorizer = None
+        self.data_vectorized = None
+        self.components = None
+        self.numeric = None
+        self.knn = None
+        self.top_k_indices = None
+        self.top_k_distances = None
+        # Listes de voisins recalculées depuis la table précalculée : ligne -> (distances, indices)
+        self.neighbor_overrides = {}
+        self.title_index = None
+        self.autocomplete_index = None
+        # Ensembles de bits des genres, pour les recommandations filtrées
+        self.facets = None
+        # Lignes remplacées ou supprimées depuis le dernier entraînement complet
+        self.retired = frozenset()
+        # Films de la base intégrés au modèle : pk -> (ligne, updated_at)
+        self.movies = {}
+        self.movies_synced_at = None
+        # Occurrences de termes du corpus d'entraînement, et termes inconnus du
+        # vocabulaire rencontrés depuis dans les films intégrés
+        self.corpus_terms = 0
+        self.unknown_terms = 0
+        self.artifact_version = None
+        self.model_version = None
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def replace(self, **changes):
+        """Retourne une copie de l'état avec les attributs ``changes`` remplacés."""
+        state = copy.copy(self)
+        for name, value in changes.items():
+            setattr(state, name, value)
+        return state
+
+    @property
+    def drift(self):
+        """Part de termes inconnus du vocabulaire dans les films intégrés depuis l'entraînement."""
+        return self.unknown_terms / self.corpus_terms if self.corpus_terms else 0.0
+
+
+def _state_attribute(name):
+    """Attribut en lecture seule délégué à l'état courant du service."""
+    return property(lambda self: getattr(self._state, name))
+
+
+class MovieRecommendationService:
+    """
+    Service de recommandation de films.
+
+    Le modèle est entraîné sur le CSV du catalogue, puis complété au fil de
+    l'eau par les films ajoutés, modifiés ou supprimés dans le modèle ``Movie``
+    (voir ``sync_movies``) sans réentraînement complet.
+    """
+
+    catalog = _state_attribute('catalog')
+    vectorizer = _state_attribute('vectorizer')
+    data_vectorized = _state_attribute('data_vectorized')
+    components = _state_attribute('components')
+    numeric = _state_attribute('numeric')
+    knn = _state_attribute('knn')
+    top_k_indices = _state_attribute('top_k_indices')
+    top_k_distances = _state_attribute('top_k_distances')
+    title_index = _state_attribute('title_index')
+    autocomplete_index = _state_attribute('autocomplete_index')
+    facets = _state_attribute('facets')
+    artifact_version = _state_attribute('artifact_version')
+    model_version = _state_attribute('model_version')
+
+    def __init__(self, use_artifact=True):
+        self._state = RecommenderState()
+        # Sérialise les mises à jour du modèle (synchronisation, rechargement)
+        self._update_lock = threading.Lock()
+        self._next_sync = 0.0
+        self._next_reload_check = 0.0
+        self._reload_requested_at = reload_requested_at(settings.RECOMMENDER_ARTIFACT_DIR)
+        self.reload_count = 0
+        self.last_reload = None
+        self.result_cache = ResultCache(
+            maxsize=settings.RECOMMENDER_RESULT_CACHE_SIZE,
+            alias=settings.RECOMMENDER_RESULT_CACHE_ALIAS,
+            timeout=settings.RECOMMENDER_RESULT_CACHE_TIMEOUT,
+        )
+        # Profils des utilisateurs (recommandations personnalisées) : user_id -> UserProfile
+        self.profiles = LRUCache(maxsize=settings.RECOMMENDER_PROFILE_CACHE_SIZE)
+        self._load_data(use_artifact=use_artifact)
+
+    @property
+    def state(self):
+        """État courant du modèle (à lire une seule fois par opération)."""
+        return self._state
+
+    def _load_data(self, use_artifact=True, include_movies=False):
+        """
+        Charge et prépare les données de films.
+
+        Avec ``include_movies=True``, les films de la base sont entraînés avec
+        le CSV ; sinon ils sont intégrés ensuite par ``sync_movies``.
+        """
+        try:
+            data_path = Path(settings.RECOMMENDER_DATA_PATH)
+
+            # Réutiliser l'artefact pré-entraîné s'il correspond au CSV source
+            if use_artifact:
+                artifact = load_artifact(
+                    data_path, settings.RECOMMENDER_ARTIFACT_DIR, mmap=settings.RECOMMENDER_MMAP,
+                    embedding_dim=settings.RECOMMENDER_EMBEDDING_DIM,
+                    vectorizer=settings.RECOMMENDER_VECTORIZER,
+                )
+                if artifact is not None:
+                    self._load_artifact(artifact)
+                    return
+
+            db_movies = []
+            if include_movies:
+                from .models import Movie
+
+                db_movies = list(Movie.objects.order_by('updated_at', 'pk'))
+
+            if settings.RECOMMENDER_TRAINING_WORKERS == 1:
+                df = normalize_columns(pd.read_csv(data_path))
+                if db_movies:
+                    df = pd.concat([df, movies_frame(db_movies)], ignore_index=True)
+                state = self._train_model(self._preprocess_data(df.copy()))
+            else:
+                state = self._train_chunked(
+                    data_path, movies_frame(db_movies) if db_movies else None
+                )
+
+            # Les films de la base suivent les lignes du CSV
+            n_csv = state.data_vectorized.shape[0] - len(db_movies)
+            movies = {
+                movie.pk: (n_csv + offset, movie.updated_at)
+                for offset, movie in enumerate(db_movies)
+            }
+            synced_at = max((movie.updated_at for movie in db_movies), default=None)
+            # Même CSV, même modèle : les workers partagent la même version
+            model_version = f"src-{file_checksum(data_path)[:16]}"
+            self._state = state.replace(
+                movies=movies,
+                movies_synced_at=synced_at,
+                model_version=self._movies_version(model_version, movies, frozenset()),
+            )
+
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement des données: {e}")
+            raise
+
+    def _load_artifact(self, artifact):
+        """Charge le modèle depuis un artefact pré-entraîné."""
+        neighbors = artifact.neighbors or (None, None)
+        state = RecommenderState(
+            catalog=artifact.catalog,
+            vectorizer=artifact.vectorizer,
+            data_vectorized=artifact.matrix,
+            components=artifact.components,
+            numeric=artifact.numeric,
+            top_k_indices=neighbors[0],
+            top_k_distances=neighbors[1],
+            retired=artifact.retired,
+            movies=artifact.movies,
+            movies_synced_at=artifact.movies_synced_at,
+            corpus_terms=artifact.manifest.get('corpus_terms', 0),
+            artifact_version=artifact.version,
+            model_version=artifact.version,
+        )
+        state.knn = self._build_engine(state.data_vectorized)
+        self._state = self._build_indexes(state)
+        logger.info(f"Modèle de recommandation chargé depuis l'artefact {artifact.version}")
+
+    @staticmethod
+    def _build_indexes(state):
+        """Construit les index de titres et de facettes de ``state``."""
+        titles = state.catalog.column('Nom').tolist()
+        for row in state.retired:
+            titles[row] = None
+        state.title_index = TitleIndex(titles)
+        state.autocomplete_index = TrigramIndex(titles)
+        state.facets = FacetIndex(state.catalog, state.numeric)
+        return state
+
+    def _preprocess_data(self, data):
+        """Préprocesse les données."""
+        return preprocess(data)
+
+    def _train_model(self, data):
+        """Entraîne le modèle de recommandation et retourne le nouvel état."""
+        vectorizer = make_vectorizer(
+            settings.RECOMMENDER_VECTORIZER, settings.RECOMMENDER_HASHING_FEATURES
+        )
+        tfidf = vectorizer.fit_transform(data['combined_features'])
+        # Seules les colonnes servies survivent à l'entraînement : le texte
+        # combiné et les colonnes brutes du CSV sont libérés avec ``data``
+        return self._fitted_state(
+            CompactCatalog.from_frame(data), vectorizer, tfidf, numeric_columns(data)
+        )
+
+    def _train_chunked(self, data_path, extra=None):
+        """
+        Entraîne le modèle par lots du CSV préparés en parallèle
+        (``RECOMMENDER_TRAINING_WORKERS`` processus) ; ``extra`` (films de la
+        base) est ajouté après les lignes du CSV.
+        """
+        features = train_chunked(
+            data_path,
+            kind=settings.RECOMMENDER_VECTORIZER,
+            n_features=settings.RECOMMENDER_HASHING_FEATURES,
+            workers=settings.RECOMMENDER_TRAINING_WORKERS,
+            chunk_size=settings.RECOMMENDER_TRAINING_CHUNK_SIZE,
+            extra=extra,
+        )
+        return self._fitted_state(
+            features.catalog, features.vectorizer, features.matrix, features.numeric
+        )
+
+    def _fitted_state(self, catalog, vectorizer, tfidf, numeric):
+        """État du modèle ajusté sur ``tfidf`` (plongements, moteur, index)."""
+        if settings.RECOMMENDER_EMBEDDING_DIM:
+            # Plongements denses : la matrice creuse n'est pas conservée
+            data_vectorized, components = fit_embeddings(
+                tfidf, settings.RECOMMENDER_EMBEDDING_DIM
+            )
+        else:
+            data_vectorized, components = tfidf, None
+
+        state = RecommenderState(
+            catalog=catalog,
+            vectorizer=vectorizer,
+            data_vectorized=data_vectorized,
+            components=components,
+            numeric=numeric,
+            knn=self._build_engine(data_vectorized),
+            corpus_terms=int(tfidf.nnz),
+        )
+        return self._build_indexes(state)
+
+    def _build_engine(self, matrix):
+        """Construit le moteur de recherche des voisins choisi dans les paramètres."""
+        engine = build_engine(settings.RECOMMENDER_ENGINE, **settings.RECOMMENDER_ENGINE_OPTIONS)
+        return engine.fit(matrix)
+
+    @staticmethod
+    def _movies_version(base_version, movies, retired):
+        """Version du modèle tenant compte des films intégrés depuis l'entraînement."""
+        if not movies and not retired:
+            return base_version
+        layout = repr((sorted((pk, row) for pk, (row, _) in movies.items()), sorted(retired)))
+        return f"{base_version}+{hashlib.sha1(layout.encode()).hexdigest()[:12]}"
+
+    def sync_movies(self):
+        """
+        Intègre au modèle les films ajoutés, modifiés ou supprimés dans la base.
+
+        Les nouveaux films sont vectorisés avec le vocabulaire déjà ajusté et
+        ajoutés aux index, à la table des voisins et au segment de la matrice
+        parcouru à côté de la base partagée (voir ``segments``) ; un film
+        modifié remplace son ancienne ligne, qui est retirée. Le modèle n'est
+        réentraîné entièrement que si la part de termes inconnus du
+        vocabulaire dépasse ``RECOMMENDER_VOCABULARY_DRIFT``.
+
+        Retourne ``True`` si un nouvel état a été publié.
+        """
+        from .models import Movie
+
+        with self._update_lock:
+            state = self._state
+
+            # Marge de recouvrement : une écriture validée après la précédente
+            # synchronisation peut porter une date légèrement antérieure
+            changed = Movie.objects.order_by('updated_at', 'pk')
+            if state.movies_synced_at is not None:
+                changed = changed.filter(
+                    updated_at__gte=state.movies_synced_at - timedelta(seconds=MOVIE_SYNC_OVERLAP)
+                )
+            changed = [
+                movie for movie in changed
+                if movie.pk not in state.movies or state.movies[movie.pk][1] != movie.updated_at
+            ]
+            existing = set(Movie.objects.values_list('pk', flat=True))
+            deleted = [pk for pk in state.movies if pk not in existing]
+            if not changed and not deleted:
+                return False
+
+            new_state = self._ingest(state, changed, deleted)
+            if new_state.drift > settings.RECOMMENDER_VOCABULARY_DRIFT:
+                logger.info(
+                    f"Dérive du vocabulaire de {new_state.drift:.1%} : réentraînement complet"
+                )
+                self._load_data(use_artifact=False, include_movies=True)
+            else:
+                self._state = new_state
+            logger.info(
+                f"Films synchronisés: {len(changed)} ajoutés ou modifiés, {len(deleted)} supprimés"
+            )
+            return True
+
+    def reload(self):
+        """
+        Recharge le modèle : artefact courant, ou réentraînement sur le CSV.
+
+        Le nouveau modèle est construit pendant que l'ancien continue de
+        servir, puis publié d'une seule affectation. Retourne les mesures du
+        rechargement : durée et mémoire résidente avant, au pic (les deux
+        modèles coexistent) et après.
+        """
+        with self._update_lock:
+            previous_version = self._state.model_version
+            started = time.perf_counter()
+            with PeakMemorySampler() as memory:
+                self._load_data(use_artifact=True)
+            duration = time.perf_counter() - started
+
+        # Les résultats de l'ancienne version ne seront plus lus
+        self.result_cache.clear()
+        self.reload_count += 1
+        self.last_reload = {
+            'previous_version': previous_version,
+            'model_version': self._state.model_version,
+            'duration': duration,
+            'rss_before': memory.start_rss,
+            'rss_peak': memory.peak,
+            'rss_after': rss_bytes(),
+            'finished_at': time.time(),
+        }
+        logger.info(
+            f"Modèle rechargé en {duration:.2f}s ({previous_version} -> "
+            f"{self._state.model_version}), pic de mémoire {memory.peak / 2**20:.0f} Mo"
+        )
+        return self.last_reload
+
+    def reload_in_background(self):
+        """Lance ``reload`` dans un thread ; sans effet si une mise à jour est en cours."""
+        if self._update_lock.locked():
+            return False
+        threading.Thread(target=self._reload_in_background, name='recommender-reload', daemon=True).start()
+        return True
+
+    def _reload_in_background(self):
+        try:
+            self.reload()
+        except Exception as e:
+            logger.error(f"Erreur lors du rechargement du modèle: {e}")
+
+    def reload_stats(self):
+        """Nombre de rechargements et mesures du dernier (durée, mémoire)."""
+        return {'count': self.reload_count, 'last': self.last_reload}
+
+    def _schedule_updates(self):
+        """
+        Lance en arrière-plan les mises à jour dues : rechargement demandé par
+        ``reload_recommender``, puis synchronisation des films de la base.
+        """
+        now = time.monotonic()
+        interval = settings.RECOMMENDER_RELOAD_CHECK_INTERVAL
+        if interval is not None and now >= self._next_reload_check:
+            self._next_reload_check = now + interval
+            requested_at = reload_requested_at(settings.RECOMMENDER_ARTIFACT_DIR)
+            if requested_at > self._reload_requested_at:
+                self._reload_requested_at = requested_at
+                self.reload_in_background()
+                return
+
+        interval = settings.RECOMMENDER_SYNC_INTERVAL
+        if interval is None or now < self._next_sync or self._update_lock.locked():
+            return
+        self._next_sync = now + interval
+        threading.Thread(target=self._sync_in_background, name='recommender-sync', daemon=True).start()
+
+    def _sync_in_background(self):
+        try:
+            self.sync_movies()
+        except DatabaseError as e:
+            logger.warning(f"Synchronisation des films impossible: {e}")
+        except Exception as e:
+            logger.error(f"Erreur lors de la synchronisation des films: {e}")
+        finally:
+            connections.close_all()
+
+    def _ingest(self, state, movies, deleted):
+        """Construit l'état suivant ``state`` avec les films ``movies`` intégrés et ``deleted`` retirés."""
+        frame = self._preprocess_data(movies_frame(movies))
+
+        # Termes absents du vocabulaire ajusté : ignorés par la vectorisation
+        # (aucun avec le hachage des termes, sans vocabulaire)
+        unknown_terms = 0
+        vocabulary = state.vectorizer.vocabulary_
+        if vocabulary is not None:
+            analyzer = state.vectorizer.build_analyzer()
+            unknown_terms = sum(
+                sum(term not in vocabulary for term in set(analyzer(text)))
+                for text in frame['combined_features']
+            )
+
+        vectors = None
+        if movies:
+            vectors = state.vectorizer.transform(frame['combined_features'])
+            if state.components is not None:
+                vectors = project(vectors, state.components)
+
+        n_old = state.data_vectorized.shape[0]
+        movies_map = dict(state.movies)
+        retired_rows = [movies_map.pop(pk)[0] for pk in deleted]
+        retired_rows += [movies_map[movie.pk][0] for movie in movies if movie.pk in movies_map]
+        for offset, movie in enumerate(movies):
+            movies_map[movie.pk] = (n_old + offset, movie.updated_at)
+        retired = state.retired | frozenset(retired_rows)
+        new_rows = range(n_old, n_old + len(movies))
+
+        # Nouvelles lignes dans le segment ajouté : la base (memmap partagé)
+        # et son moteur de recherche ne sont ni copiés ni réajustés
+        matrix, knn = state.data_vectorized, state.knn
+        if vectors is not None:
+            matrix = append_rows(matrix, vectors)
+            knn = segmented_engine(knn, matrix)
+
+        catalog = state.catalog.appended(frame)
+        new_numeric = numeric_columns(frame)
+        numeric = {
+            name: np.concatenate([values, new_numeric[name]])
+            for name, values in state.numeric.items()
+        }
+        titles = state.catalog.column('Nom')
+
+        # Index de titres : ajout des nouvelles lignes, retrait des anciennes
+        removed = [(row, titles[row]) for row in retired_rows if row not in state.retired]
+        added = list(zip(new_rows, frame['Nom']))
+        title_index = state.title_index.updated(added=added, removed=removed)
+        autocomplete_index = state.autocomplete_index.updated(
+            added=frame['Nom'],
+            removed=[title for _, title in removed if title not in title_index],
+        )
+
+        neighbor_overrides = state.neighbor_overrides
+        if state.top_k_indices is not None:
+            neighbor_overrides = self._update_neighbors(state, knn, matrix, vectors, new_rows, retired)
+
+        base_version = state.model_version.split('+')[0]
+        return state.replace(
+            catalog=catalog,
+            data_vectorized=matrix,
+            numeric=numeric,
+            knn=knn,
+            neighbor_overrides=neighbor_overrides,
+            title_index=title_index,
+            autocomplete_index=autocomplete_index,
+            facets=FacetIndex(catalog, numeric),
+            retired=retired,
+            movies=movies_map,
+            movies_synced_at=max(
+                [movie.updated_at for movie in movies]
+                + ([state.movies_synced_at] if state.movies_synced_at else []),
+                default=None,
+            ),
+            unknown_terms=state.unknown_terms + unknown_terms,
+            model_version=self._movies_version(base_version, movies_map, retired),
+        )
+
+    def _update_neighbors(self, state, knn, matrix, vectors, new_rows, retired):
+        """
+        Met à jour la table des voisins précalculés après l'ajout de ``new_rows``
+        (lignes ``vectors`` de ``matrix``) et le retrait des lignes ``retired``.
+
+        Les nouveaux films reçoivent leur propre liste ; un film existant dont
+        un nouveau film est plus proche que son K-ième voisin voit sa liste
+        complétée, et celui dont la liste contient une ligne nouvellement
+        retirée la voit recalculée, afin que chaque liste garde K films
+        servis. Les listes modifiées sont des surcharges de la table, qui
+        reste partagée (memmap) entre les workers.
+        """
+        k = state.top_k_indices.shape[1]
+        n_old = new_rows.start
+        overrides = dict(state.neighbor_overrides)
+        allowed = np.ones(matrix.shape[0], dtype=bool)
+        allowed[list(retired)] = False
+
+        # Listes contenant une ligne nouvellement retirée
+        newly_retired = np.zeros(n_old, dtype=bool)
+        newly_retired[list(retired - state.retired)] = True
+        stale = set()
+        if newly_retired.any():
+            stale.update(np.flatnonzero(newly_retired[state.top_k_indices].any(axis=1)).tolist())
+            for row, (_, row_indices) in overrides.items():
+                if newly_retired[row_indices].any():
+                    stale.add(row)
+                else:
+                    # Liste de la table remplacée par une surcharge à jour
+                    stale.discard(row)
+        stale -= retired
+
+        if vectors is not None:
+            # Distance du K-ième voisin de chaque film existant
+            kth = np.full(n_old, np.inf)
+            kth[:len(state.top_k_distances)] = state.top_k_distances[:, -1]
+            for row, (row_distances, _) in overrides.items():
+                kth[row] = row_distances[-1] if len(row_distances) == k else np.inf
+
+            # Listes des nouveaux films, sans les lignes retirées
+            distances, indices = knn.kneighbors(vectors, n_neighbors=k, mask=allowed)
+            for row, row_distances, row_indices in zip(new_rows, distances, indices):
+                overrides[row] = (row_distances, row_indices)
+
+            # Films existants dont un nouveau film entre dans les K plus proches,
+            # segment par segment des lignes existantes
+            vector_norms = row_norms(vectors)
+            found = []
+            for offset, segment in segments(state.data_vectorized):
+                similarities = segment @ vectors.T
+                if sparse.issparse(similarities):
+                    similarities = similarities.tocoo()
+                    rows, columns, values = similarities.row, similarities.col, similarities.data
+                else:
+                    rows, columns = np.nonzero(similarities)
+                    values = similarities[rows, columns]
+                # Normes des seules lignes concernées
+                hit, positions = np.unique(rows, return_inverse=True)
+                segment_distances = 1.0 - values / row_norms(segment[hit])[positions] / vector_norms[columns]
+                rows = rows + offset
+                closer = segment_distances < kth[rows]
+                found.append((rows[closer], columns[closer], segment_distances[closer]))
+            rows, columns, new_distances = (np.concatenate(parts) for parts in zip(*found))
+
+            new_indices = np.asarray(new_rows)
+            for row in np.unique(rows):
+                # Listes recalculées ci-dessous, nouveaux films compris
+                if row in retired or row in stale:
+                    continue
+                mask = rows == row
+                if row in overrides:
+                    row_distances, row_indices = overrides[row]
+                else:
+                    row_distances, row_indices = state.top_k_distances[row], state.top_k_indices[row]
+                merged_distances = np.concatenate([row_distances, new_distances[mask]])
+                merged_indices = np.concatenate([row_indices, new_indices[columns[mask]]])
+                order = np.argsort(merged_distances, kind='stable')[:k]
+                overrides[row] = (merged_distances[order], merged_indices[order])
+
+        if stale:
+            stale = sorted(stale)
+            distances, indices = knn.kneighbors(matrix[stale], n_neighbors=k, mask=allowed)
+            for row, row_distances, row_indices in zip(stale, distances, indices):
+                overrides[row] = (row_distances, row_indices)
+        return overrides
+
+    @staticmethod
+    def _table_neighbors(state, rows, n_neighbors):
+        """Voisins précalculés de ``rows``, ou ``None`` si la table ne suffit pas."""
+        if state.top_k_indices is None or n_neighbors > state.top_k_indices.shape[1]:
+            return None
+        if not state.neighbor_overrides:
+            return (
+                state.top_k_distances[rows, :n_neighbors],
+                state.top_k_indices[rows, :n_neighbors],
+            )
+
+        distances = np.empty((len(rows), n_neighbors))
+        indices = np.empty((len(rows), n_neighbors), dtype=np.intp)
+        for position, row in enumerate(rows):
+            if row in state.neighbor_overrides:
+                row_distances, row_indices = state.neighbor_overrides[row]
+            else:
+                row_distances, row_indices = state.top_k_distances[row], state.top_k_indices[row]
+            if len(row_indices) < n_neighbors:
+                return None
+            distances[position] = row_distances[:n_neighbors]
+            indices[position] = row_indices[:n_neighbors]
+        return distances, indices
+
+    def _kneighbors(self, state, movie_index, n_neighbors, mask=None):
+        """
+        Voisins d'un film : table précalculée si possible, moteur de recherche sinon.
+
+        Avec ``mask``, seules les lignes autorisées sont retenues ; la table
+        n'est utilisée que si elle en contient au moins ``n_neighbors``.
+        """
+        if mask is None:
+            table = self._table_neighbors(state, [movie_index], n_neighbors)
+        elif state.top_k_indices is not None:
+            table = self._table_neighbors(state, [movie_index], state.top_k_indices.shape[1])
+            if table is not None:
+                distances, indices = table
+                allowed = mask[indices[0]]
+                table = None
+                if allowed.sum() >= n_neighbors:
+                    table = (
+                        distances[:, allowed][:, :n_neighbors],
+                        indices[:, allowed][:, :n_neighbors],
+                    )
+        else:
+            table = None
+        if table is not None:
+            return table
+
+        if mask is None:
+            mask = self._served_mask(state)
+        return state.knn.kneighbors(
+            state.data_vectorized[movie_index:movie_index + 1],
+            n_neighbors=n_neighbors, mask=mask,
+        )
+
+    @staticmethod
+    def _served_mask(state):
+        """Lignes servies (sans les lignes retirées), ou ``None`` si aucune n'est retirée."""
+        if not state.retired:
+            return None
+        mask = np.ones(state.data_vectorized.shape[0], dtype=bool)
+        mask[list(state.retired)] = False
+        return mask
+
+    @staticmethod
+    def _filter_mask(state, filters, movie_index):
+        """
+        Lignes autorisées par ``filters``, sans les lignes retirées.
+
+        Le film recherché reste autorisé : comme sans filtre, il occupe l'une
+        des ``n_neighbors`` places et est écarté à la mise en forme.
+        """
+        mask = state.facets.mask(filters)
+        if state.retired:
+            mask[list(state.retired)] = False
+        mask[movie_index] = True
+        return mask
+
+    def autocomplete(self, query, limit=10):
+        """Propose des titres du catalogue pour une saisie partielle."""
+        self._schedule_updates()
+        return self._state.autocomplete_index.search(query, limit=limit)
+
+    def resolve_title(self, movie_name, state=None):
+        """Retourne toutes les lignes du catalogue correspondant à un titre."""
+        return (state or self._state).title_index.lookup(movie_name)
+
+    def title_row(self, movie_name, state=None):
+        """Ligne du catalogue retenue pour un titre (homonymes départagés), ou ``None``."""
+        state = state or self._state
+        candidates = self.resolve_title(movie_name, state)
+        return self._select_candidate(state, movie_name, candidates) if candidates else None
+
+    def row_title(self, row, state=None):
+        """Titre de la ligne ``row`` du catalogue, ou ``None`` si elle n'existe pas ou plus."""
+        state = state or self._state
+        if not 0 <= row < len(state.catalog) or row in state.retired:
+            return None
+        return state.catalog.column('Nom')[row]
+
+    def _select_candidate(self, state, movie_name, candidates):
+        """Choisit parmi des homonymes, en privilégiant le titre exact."""
+        if len(candidates) > 1:
+            logger.debug(f"Titre ambigu '{movie_name}': lignes candidates {candidates}")
+            names = state.catalog.column('Nom')
+            for row in candidates:
+                if names[row] == movie_name:
+                    return row
+        return candidates[0]
+
+    def recommend_movies(self, movie_name, n_neighbors=10, filters=None, row=None):
+        """
+        Recommande des films similaires.
+
+        ``filters`` (``MovieFilters``) restreint les recommandations à certains
+        genres, années de sortie ou notes ; le filtrage a lieu pendant la
+        recherche des voisins, qui en retourne toujours ``n_neighbors``.
+        ``row`` désigne le film parmi les homonymes de ``movie_name`` (adresse
+        des résultats) ; il est ignoré s'il ne porte pas ce titre.
+
+        Les résultats sont mis en cache par (film, K, filtres) pour la version
+        courante du modèle et partagés entre appelants : ils ne doivent pas
+        être modifiés.
+        """
+        self._schedule_updates()
+        state = self._state
+        with stage('title_lookup'):
+            candidates = self.resolve_title(movie_name, state)
+
+        if not candidates:
+            return None, f"Le film '{movie_name}' n'est pas présent dans la base de données."
+
+        try:
+            if row in candidates:
+                movie_index = row
+            else:
+                movie_index = self._select_candidate(state, movie_name, candidates)
+            cache_key = (movie_index, n_neighbors)
+            mask = None
+            if filters:
+                cache_key += (filters.key,)
+            cached = self.result_cache.get(state.model_version, cache_key)
+            if cached is not None:
+                return cached
+
+            if filters:
+                with stage('filters'):
+                    mask = self._filter_mask(state, filters, movie_index)
+                if mask.sum() < 2:
+                    return None, "Aucun film ne correspond aux filtres demandés."
+
+            with stage('kneighbors'):
+                distances, indices = self._kneighbors(state, movie_index, n_neighbors, mask)
+            with stage('format'):
+                result = self._format_recommendations(state, movie_index, distances[0], indices[0])
+            self.result_cache.set(state.model_version, cache_key, result)
+            return result
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la recommandation: {e}")
+            return None, f"Erreur lors de la recommandation: {str(e)}"
+
+    def recommend_many(self, titles, n_neighbors=10):
+        """
+        Recommande des films pour plusieurs titres en une seule recherche.
+
+        Retourne une liste alignée sur ``titles`` de couples
+        ``(recommended_movies, movie_info)``, ou ``(None, message)`` pour les
+        titres inconnus, comme ``recommend_movies``.
+        """
+        self._schedule_updates()
+        state = self._state
+        results = [None] * len(titles)
+        positions = []
+        rows = []
+        for position, movie_name in enumerate(titles):
+            with stage('title_lookup'):
+                candidates = self.resolve_title(movie_name, state)
+            if not candidates:
+                results[position] = (
+                    None, f"Le film '{movie_name}' n'est pas présent dans la base de données."
+                )
+                continue
+            movie_index = self._select_candidate(state, movie_name, candidates)
+            cached = self.result_cache.get(state.model_version, (movie_index, n_neighbors))
+            if cached is not None:
+                results[position] = cached
+                continue
+            positions.append(position)
+            rows.append(movie_index)
+
+        if not rows:
+            return results
+
+        try:
+            # Une seule recherche pour l'ensemble des titres résolus
+            with stage('kneighbors'):
+                table = self._table_neighbors(state, rows, n_neighbors)
+                if table is not None:
+                    distances, indices = table
+                else:
+                    distances, indices = state.knn.kneighbors(
+                        state.data_vectorized[rows], n_neighbors=n_neighbors,
+                        mask=self._served_mask(state),
+                    )
+        except Exception as e:
+            logger.error(f"Erreur lors de la recommandation groupée: {e}")
+            for position in positions:
+                results[position] = (None, f"Erreur lors de la recommandation: {str(e)}")
+            return results
+
+        for batch_row, (position, movie_index) in enumerate(zip(positions, rows)):
+            try:
+                with stage('format'):
+                    results[position] = self._format_recommendations(
+                        state, movie_index, distances[batch_row], indices[batch_row]
+                    )
+                self.result_cache.set(state.model_version, (movie_index, n_neighbors), results[position])
+            except Exception as e:
+                logger.error(f"Erreur lors de la recommandation: {e}")
+                results[position] = (None, f"Erreur lors de la recommandation: {str(e)}")
+
+        return results
+
+    def recommend_for_user(self, user_id, n_neighbors=10, filters=None):
+        """
+        Recommande des films à partir de l'historique d'un utilisateur.
+
+        Les voisins du barycentre pondéré des films de l'historique sont
+        retournés, sans les films déjà vus. Retourne ``(recommended_movies,
+        profile_info)``, où ``profile_info`` indique le nombre de films de
+        l'historique retrouvés dans le catalogue, ou ``(None, message)``.
+        """
+        self._schedule_updates()
+        state = self._state
+        try:
+            with stage('profile'):
+                profile = self._user_profile(state, user_id)
+            if not profile:
+                return None, "Aucun film de votre historique n'est présent dans la base de données."
+
+            mask = None
+            if filters:
+                mask = state.facets.mask(filters)
+                if state.retired:
+                    mask[list(state.retired)] = False
+                if not mask.any():
+                    return None, "Aucun film ne correspond aux filtres demandés."
+
+            # Marge pour remplacer les films déjà vus et les doublons de titre,
+            # écartés à la mise en forme
+            with stage('kneighbors'):
+                distances, indices = state.knn.kneighbors(
+                    profile.centroid(), n_neighbors=2 * n_neighbors + len(profile), mask=mask
+                )
+            with stage('format'):
+                recommended_movies = self._format_user_recommendations(
+                    state, indices[0], profile.seen, n_neighbors
+                )
+            return recommended_movies, {'history_size': len(profile)}
+
+        except Exception as e:
+            logger.error(f"Erreur lors de la recommandation personnalisée: {e}")
+            return None, f"Erreur lors de la recommandation: {str(e)}"
+
+    def history_changed(self, user_id, title, weight=None):
+        """
+        Met à jour le profil en cache d'un utilisateur après une modification
+        de son historique : film ajouté ou repondéré, ou retiré (``weight=None``).
+        """
+        state = self._state
+        profile = self.profiles.get(user_id)
+        if profile is None or profile.model_version != state.model_version:
+            # Pas de profil à jour : il sera construit à la prochaine demande
+            return
+        candidates = self.resolve_title(title, state)
+        if not candidates:
+            return
+        row = self._select_candidate(state, title, candidates)
+        if row in state.retired:
+            return
+        self.profiles.set(user_id, profile.updated(state.data_vectorized, row, weight))
+
+    def _user_profile(self, state, user_id):
+        """Profil en cache de l'utilisateur, reconstruit s'il est périmé."""
+        profile = self.profiles.get(user_id)
+        if (profile is None or profile.model_version != state.model_version
+                or time.monotonic() - profile.built_at > settings.RECOMMENDER_PROFILE_TTL):
+            profile = UserProfile.build(
+                state.model_version, state.data_vectorized, self._history_weights(state, user_id)
+            )
+            self.profiles.set(user_id, profile)
+        return profile
+
+    def _history_weights(self, state, user_id):
+        """Lignes du catalogue des films récents de l'historique et leur poids."""
+        from .models import WatchHistory
+
+        history = WatchHistory.objects.filter(user_id=user_id)[:settings.RECOMMENDER_HISTORY_MAX_ITEMS]
+        weights = {}
+        for item in history:
+            candidates = self.resolve_title(item.title, state)
+            if not candidates:
+                continue
+            row = self._select_candidate(state, item.title, candidates)
+            if row not in state.retired:
+                weights[row] = item.weight
+        return weights
+
+    def cache_stats(self):
+        """Compteurs du cache de résultats (succès, échecs, évictions)."""
+        return self.result_cache.stats()
+
+    def _format_recommendations(self, state, movie_index, distances, indices):
+        """Met en forme les voisins d'un film pour l'affichage."""
+        names = state.catalog.column('Nom')
+        seed_name = names[movie_index]
+
+        # Les voisins arrivent triés par distance croissante : on écarte les
+        # lignes retirées, les doublons de titre et le film recherché lui-même
+        seen = set()
+        recommended_movies = []
+        for row in indices:
+            if row in state.retired:
+                continue
+            name = names[row]
+            if name in seen:
+                continue
+            seen.add(name)
+            if name != seed_name:
+                recommended_movies.append(self._display_record(state, row))
+
+        return recommended_movies, self._display_record(state, movie_index)
+
+    def _format_user_recommendations(self, state, indices, seen, n_neighbors):
+        """Met en forme les voisins d'un profil, sans les films déjà vus ni doublons de titre."""
+        names = state.catalog.column('Nom')
+        seen_names = {names[row] for row in seen}
+        recommended_movies = []
+        for row in indices:
+            if row in state.retired or row in seen:
+                continue
+            name = names[row]
+            if name in seen_names:
+                continue
+            seen_names.add(name)
+            recommended_movies.append(self._display_record(state, row))
+            if len(recommended_movies) == n_neighbors:
+                break
+        return recommended_movies
+
+    def _display_record(self, state, row):
+        """Informations d'affichage d'un film (acteurs limités à dix mots)."""
+        record = state.catalog.record(row, DISPLAY_COLUMNS)
+        record['Noms_de_tous_les_acteurs'] = ' '.join(
+            record['Noms_de_tous_les_acteurs'].split()[:10]
+        )
+        return record
@@ -0,0 +1,131 @@
+"""
+Matrice et moteur de recherche segmentés : base partagée + films intégrés.
+
+Les films intégrés par ``sync_movies`` depuis le dernier entraînement ne
+sont pas recopiés dans la matrice de base : celle-ci, souvent adossée à un
+``numpy.memmap`` partagé entre les workers, reste intacte avec son moteur de
+recherche. Les nouvelles lignes forment un petit segment, parcouru par
+recherche exhaustive à côté de la base ; les deux listes de voisins sont
+fusionnées par distance.
+
+Le segment n'est fusionné dans la base qu'au réentraînement ou au
+rechargement du modèle (``build_recommender``, ``reload``).
+"""
+import numpy as np
+from scipy import sparse
+
+from .neighbors import CosineNeighbors
+
+
+class SegmentedMatrix:
+    """
+    Lignes de ``base`` suivies de celles de ``delta``, sans copie de la base.
+
+    Seuls la forme (``shape``) et l'accès à des lignes (tranche ou liste de
+    lignes) sont proposés, comme pour la matrice d'origine.
+    """
+
+    def __init__(self, base, delta):
+        self.base = base
+        self.delta = delta
+        self.n_base = base.shape[0]
+        self.shape = (self.n_base + delta.shape[0], base.shape[1])
+
+    def __getitem__(self, rows):
+        if isinstance(rows, slice):
+            start, stop, step = rows.indices(self.shape[0])
+            if step == 1 and stop <= self.n_base:
+                return self.base[start:stop]
+            if step == 1 and start >= self.n_base:
+                return self.delta[start - self.n_base:stop - self.n_base]
+            rows = np.arange(start, stop, step)
+        rows = np.asarray(rows, dtype=np.intp)
+        in_base = rows < self.n_base
+        if in_base.all():
+            return self.base[rows]
+        if not in_base.any():
+            return self.delta[rows - self.n_base]
+
+        # Lignes des deux segments : empilées puis remises dans l'ordre demandé
+        order = np.concatenate([np.flatnonzero(in_base), np.flatnonzero(~in_base)])
+        parts = [self.base[rows[in_base]], self.delta[rows[~in_base] - self.n_base]]
+        if sparse.issparse(self.base):
+            stacked = sparse.vstack(parts, format='csr')
+        else:
+            stacked = np.vstack(parts)
+        return stacked[np.argsort(order)]
+
+    def segments(self):
+        """Couples ``(première ligne, matrice)`` de la base et du segment ajouté."""
+        return [(0, self.base), (self.n_base, self.delta)]
+
+    def appended(self, vectors):
+        """Matrice segmentée avec les lignes ``vectors`` ajoutées au segment."""
+        if sparse.issparse(self.delta):
+            delta = sparse.vstack([self.delta, vectors], format='csr')
+        else:
+            delta = np.vstack([self.delta, vectors])
+        return SegmentedMatrix(self.base, delta)
+
+    def merged(self):
+        """Matrice unique (copie), pour l'écriture d'un artefact."""
+        if sparse.issparse(self.base):
+            return sparse.vstack([self.base, self.delta], format='csr')
+        return np.vstack([self.base, self.delta])
+
+
+def segments(matrix):
+    """Couples ``(première ligne, matrice)`` de ``matrix``, segmentée ou non."""
+    if isinstance(matrix, SegmentedMatrix):
+        return matrix.segments()
+    return [(0, matrix)]
+
+
+def append_rows(matrix, vectors):
+    """Matrice segmentée ``matrix`` + ``vectors``, la base de ``matrix`` restant partagée."""
+    if isinstance(matrix, SegmentedMatrix):
+        return matrix.appended(vectors)
+    return SegmentedMatrix(matrix, vectors)
+
+
+class SegmentedNeighbors:
+    """
+    Recherche des voisins sur une ``SegmentedMatrix`` : moteur ``base`` déjà
+    ajusté sur la base, recherche exhaustive sur le segment ajouté.
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self.n_base = None
+        self.delta = None
+
+    def fit(self, X):
+        self.n_base = X.n_base
+        self.delta = CosineNeighbors().fit(X.delta)
+        return self
+
+    def kneighbors(self, X, n_neighbors=10, mask=None):
+        """Retourne ``(distances, indices)`` triés par distance croissante."""
+        results = []
+        for offset, engine, segment_mask in (
+            (0, self.base, None if mask is None else mask[:self.n_base]),
+            (self.n_base, self.delta, None if mask is None else mask[self.n_base:]),
+        ):
+            if segment_mask is not None and not segment_mask.any():
+                continue
+            distances, indices = engine.kneighbors(X, n_neighbors=n_neighbors, mask=segment_mask)
+            results.append((distances, indices + offset))
+        if len(results) == 1:
+            return results[0]
+
+        distances = np.hstack([distances for distances, _ in results])
+        indices = np.hstack([indices for _, indices in results])
+        order = np.argsort(distances, axis=1, kind='stable')[:, :n_neighbors]
+        return np.take_along_axis(distances, order, axis=1), np.take_along_axis(indices, order, axis=1)
+
+
+def segmented_engine(knn, matrix):
+    """Moteur de ``matrix`` (segmentée) réutilisant le moteur ajusté sur sa base."""
+    if isinstance(knn, SegmentedNeighbors):
+        knn = knn.base
+    return SegmentedNeighbors(knn).fit(matrix)
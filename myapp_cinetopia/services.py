@@ -1,181 +1,171 @@
-import os
-from pathlib import Path
-import pandas as pd
-import re
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.neighbors import NearestNeighbors
-from django.conf import settings
-from cinetopia.config import WEATHER_API_KEY, WEATHER_API_HOST
+import asyncio
+import contextvars
+import functools
+import importlib
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from cinetopia.config import (
+    WEATHER_API_KEY, WEATHER_API_HOST, WEATHER_API_SCHEME,
+    WEATHER_CONNECT_TIMEOUT, WEATHER_READ_TIMEOUT,
+    WEATHER_CACHE_TTL, WEATHER_CACHE_STALE_TTL,
+)
 import requests
+from requests.adapters import HTTPAdapter
 import logging
 
+from .caching import StaleWhileRevalidateCache
+from .instrumentation import stage
+
 logger = logging.getLogger(__name__)
 
 
-class MovieRecommendationService:
-    """Service de recommandation de films."""
+class LazyService:
+    """
+    Service construit à sa première utilisation.
+
+    ``target`` est le chemin pointé de la classe du service : son module
+    n'est importé qu'à la construction, de sorte que les dépendances lourdes
+    (pandas, scikit-learn) ne sont pas chargées par les commandes de gestion
+    ou les processus qui n'en ont pas besoin. Les attributs sont délégués à
+    l'instance, construite une seule fois même sous accès concurrents.
+    """
+
+    def __init__(self, target):
+        self._target = target
+        self._instance = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        """Vrai si le service a déjà été construit."""
+        return self._instance is not None
+
+    def get(self):
+        """Retourne l'instance du service, construite au premier appel."""
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    module_name, class_name = self._target.rsplit('.', 1)
+                    factory = getattr(importlib.import_module(module_name), class_name)
+                    instance = self._instance = factory()
+        return instance
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+class WeatherService:
+    """
+    Service pour récupérer les données météo.
     
-    def __init__(self):
-        self.data = None
-        self.knn = None
-        self.vectorizer = None
-        self.data_vectorized = None
-        self._load_data()
+    Les prévisions sont mises en cache par (ville, jours, langue) : une
+    prévision périmée est servie pendant son rafraîchissement en arrière-plan,
+    afin que la page d'accueil n'attende jamais l'API météo.
+    """
     
-    def _load_data(self):
-        """Charge et prépare les données de films."""
-        try:
-            data_path = Path(settings.BASE_DIR) / 'myapp_cinetopia' / 'data' / 'french_movies_with_keywords.csv'
-            df = pd.read_csv(data_path)
-            
-            # Renommer les colonnes problématiques
-            df = df.rename(columns={'Lien de l\'affiche': 'Lien_de_l_affiche'})
-            df.columns = [col.replace(' ', '_') for col in df.columns]
-            
-            self.data = df.copy()
-            self._preprocess_data()
-            self._train_model()
-            
-        except Exception as e:
-            logger.error(f"Erreur lors du chargement des données: {e}")
-            raise
-    
-    def _preprocess_data(self):
-        """Préprocesse les données."""
-        # Nettoyage des mots-clés
-        self.data['keywords'] = self.data['keywords'].apply(self._clean_text)
-        self.data = self.data.fillna('')
+    def __init__(self):
+        self.api_key = WEATHER_API_KEY
+        self.api_host = WEATHER_API_HOST
+        self.base_url = f"{WEATHER_API_SCHEME}://{WEATHER_API_HOST}/forecast.json"
+        self.timeout = (WEATHER_CONNECT_TIMEOUT, WEATHER_READ_TIMEOUT)
         
-        # Combinaison des caractéristiques
-        self.data['combined_features'] = self.data.apply(self._combine_features, axis=1)
-    
-    def _clean_text(self, text):
-        """Nettoie le texte."""
-        if isinstance(text, str):
-            text = re.sub(r'\bid\b|\bname\b|\d+', '', text)
-        return text
-    
-    def _combine_features(self, row):
-        """Combine les caractéristiques d'un film."""
-        genres = row.get('Genre', '') * 2
-        acteurs = row.get('Noms_de_tous_les_acteurs', '')
-        director = row.get('Nom_du_réalisateur', '') * 2
-        synopsis = row.get('Synopsis', '') * 2
-        note = str(row.get('Note', ''))
-        date = str(row.get('Date_de_sortie', '')) * 2
-        keywords = row.get('keywords', '')
+        # Connexions HTTP réutilisées d'un appel à l'autre
+        self.session = requests.Session()
+        self.session.mount(WEATHER_API_SCHEME + '://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
         
-        return f'{acteurs} {director} {genres} {synopsis} {note} {date} {keywords}'
+        self.cache = StaleWhileRevalidateCache(
+            ttl=WEATHER_CACHE_TTL, stale_ttl=WEATHER_CACHE_STALE_TTL
+        )
+        
+        # Client asynchrone (vues ASGI), lié à la boucle d'événements qui l'a créé
+        self._async_client = None
+        self._async_client_loop = None
     
-    def _train_model(self):
-        """Entraîne le modèle de recommandation."""
-        self.vectorizer = TfidfVectorizer()
-        self.data_vectorized = self.vectorizer.fit_transform(self.data['combined_features'])
+    def get_weather_data(self, city="Limoges", days=3, lang="fr"):
+        """Récupère les données météo pour une ville."""
+        if not self.api_key:
+            logger.warning("Clé API météo non configurée")
+            return None
         
-        self.knn = NearestNeighbors(metric='cosine', algorithm='brute')
-        self.knn.fit(self.data_vectorized)
+        with stage('weather'):
+            return self.cache.get(
+                (city, days, lang), lambda: self._fetch_weather_data(city, days, lang)
+            )
     
-    def recommend_movies(self, movie_name, n_neighbors=10):
-        """Recommande des films similaires."""
-        movie_name_lower = movie_name.lower()
-        self.data['Nom_lower'] = self.data['Nom'].str.lower()
+    async def aget_weather_data(self, city="Limoges", days=3, lang="fr"):
+        """Variante asynchrone de ``get_weather_data`` (même cache)."""
+        if not self.api_key:
+            logger.warning("Clé API météo non configurée")
+            return None
         
-        if movie_name_lower not in self.data['Nom_lower'].values:
-            return None, f"Le film '{movie_name}' n'est pas présent dans la base de données."
+        with stage('weather'):
+            return await self.cache.aget(
+                (city, days, lang), lambda: self._afetch_weather_data(city, days, lang)
+            )
+    
+    def _request(self, city, days, lang):
+        """En-têtes et paramètres d'une requête à l'API météo."""
+        headers = {
+            "X-RapidAPI-Key": self.api_key,
+            "X-RapidAPI-Host": self.api_host
+        }
         
+        params = {
+            "q": city,
+            "days": days,
+            "lang": lang
+        }
+        return headers, params
+    
+    def _fetch_weather_data(self, city, days, lang):
+        """Interroge l'API météo (sans cache)."""
         try:
-            movie_index = self.data[self.data['Nom_lower'] == movie_name_lower].index[0]
-            distances, indices = self.knn.kneighbors(
-                self.data_vectorized[movie_index], 
-                n_neighbors=n_neighbors
-            )
-            
-            # Créer le DataFrame des recommandations
-            recommended_movies = pd.DataFrame({
-                'Nom': self.data['Nom'].iloc[indices[0]], 
-                'Distance': distances[0]
-            })
-            
-            # Ajouter les informations supplémentaires
-            columns_to_add = [
-                'Lien_de_l_affiche', 'Nom_du_réalisateur', 
-                'Noms_de_tous_les_acteurs', 'Synopsis'
-            ]
-            
-            for col in columns_to_add:
-                if col in self.data.columns:
-                    if col == 'Noms_de_tous_les_acteurs':
-                        recommended_movies[col] = self.data[col].iloc[indices[0]].apply(
-                            lambda x: ' '.join(str(x).split()[:10])
-                        )
-                    else:
-                        recommended_movies[col] = self.data[col].iloc[indices[0]]
-            
-            # Supprimer les doublons et le film original
-            recommended_movies.drop_duplicates(subset='Nom', keep='first', inplace=True)
-            recommended_movies = recommended_movies[
-                recommended_movies['Nom'] != self.data['Nom'].iloc[movie_index]
-            ]
-            recommended_movies.sort_values(by='Distance', inplace=True)
-            
-            # Informations du film recherché
-            movie_info = self.data.loc[movie_index, [
-                'Nom', 'Lien_de_l_affiche', 'Nom_du_réalisateur', 
-                'Noms_de_tous_les_acteurs', 'Synopsis'
-            ]].copy()
-            
-            if 'Noms_de_tous_les_acteurs' in movie_info:
-                movie_info['Noms_de_tous_les_acteurs'] = ' '.join(
-                    str(movie_info['Noms_de_tous_les_acteurs']).split()[:10]
+            headers, params = self._request(city, days, lang)
+            with stage('weather_fetch'):
+                response = self.session.get(
+                    self.base_url, headers=headers, params=params, timeout=self.timeout
                 )
+            response.raise_for_status()
             
-            # Convertir en dictionnaires
-            recommended_movies_dict = recommended_movies[[
-                'Nom', 'Lien_de_l_affiche', 'Nom_du_réalisateur', 
-                'Noms_de_tous_les_acteurs', 'Synopsis'
-            ]].to_dict('records')
-            
-            movie_info_dict = movie_info.to_dict()
-            
-            return recommended_movies_dict, movie_info_dict
+            return response.json()
             
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Erreur lors de la récupération des données météo: {e}")
+            return None
         except Exception as e:
-            logger.error(f"Erreur lors de la recommandation: {e}")
-            return None, f"Erreur lors de la recommandation: {str(e)}"
-
-
-class WeatherService:
-    """Service pour récupérer les données météo."""
+            logger.error(f"Erreur inattendue: {e}")
+            return None
     
-    def __init__(self):
-        self.api_key = WEATHER_API_KEY
-        self.api_host = WEATHER_API_HOST
-        self.base_url = "https://weatherapi-com.p.rapidapi.com/forecast.json"
+    def _client(self):
+        """Client httpx de la boucle courante, aux connexions réutilisées d'un appel à l'autre."""
+        import httpx
+        
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(WEATHER_READ_TIMEOUT, connect=WEATHER_CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=4, max_keepalive_connections=4),
+            )
+            self._async_client_loop = loop
+        return self._async_client
     
-    def get_weather_data(self, city="Limoges", days=3, lang="fr"):
-        """Récupère les données météo pour une ville."""
-        if not self.api_key:
-            logger.warning("Clé API météo non configurée")
-            return None
+    async def _afetch_weather_data(self, city, days, lang):
+        """Interroge l'API météo sans bloquer la boucle d'événements (sans cache)."""
+        import httpx
         
         try:
-            headers = {
-                "X-RapidAPI-Key": self.api_key,
-                "X-RapidAPI-Host": self.api_host
-            }
-            
-            params = {
-                "q": city,
-                "days": days,
-                "lang": lang
-            }
-            
-            response = requests.get(self.base_url, headers=headers, params=params)
+            headers, params = self._request(city, days, lang)
+            with stage('weather_fetch'):
+                response = await self._client().get(self.base_url, headers=headers, params=params)
             response.raise_for_status()
             
             return response.json()
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Erreur lors de la récupération des données météo: {e}")
             return None
         except Exception as e:
@@ -183,6 +173,88 @@ class WeatherService:
             return None
 
 
-# Instances globales pour éviter de recharger les données
-movie_service = MovieRecommendationService()
-weather_service = WeatherService()
\ No newline at end of file
+# Instances globales pour éviter de recharger les données. Le modèle de
+# recommandation n'est construit qu'à la première utilisation (ou par
+# ``warmup``) : importer les vues n'entraîne aucun modèle.
+movie_service = LazyService('myapp_cinetopia.recommender.MovieRecommendationService')
+weather_service = WeatherService()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def recommendation_executor():
+    """
+    Pool de threads borné (``RECOMMENDER_EXECUTOR_WORKERS``) exécutant les
+    calculs de recommandation des vues asynchrones, hors de la boucle
+    d'événements.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from django.conf import settings
+                
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.RECOMMENDER_EXECUTOR_WORKERS,
+                    thread_name_prefix='recommender',
+                )
+    return _executor
+
+
+async def run_recommendation(function, *args, **kwargs):
+    """
+    Exécute ``function(*args, **kwargs)`` dans ``recommendation_executor``.
+    
+    ``function`` doit accéder elle-même au service : le premier accès à
+    ``movie_service`` construit le modèle, ce qui ne doit pas bloquer la boucle.
+    Elle s'exécute dans le contexte de l'appelant (mesure des étapes de la
+    requête en cours).
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        recommendation_executor(), context.run, functools.partial(function, *args, **kwargs)
+    )
+
+
+def warmup():
+    """
+    Construit le modèle de recommandation sans attendre la première requête.
+
+    Appelé par les crochets gunicorn (voir ``gunicorn.conf.py``) lorsque
+    ``RECOMMENDER_WARMUP`` est activé.
+    """
+    started = time.perf_counter()
+    service = movie_service.get()
+    logger.info(
+        f"Modèle de recommandation préchargé en {time.perf_counter() - started:.2f}s "
+        f"(version {service.model_version})"
+    )
+    return service
+
+
+def _reload_recommender(signum, frame):
+    """Gestionnaire de signal : recharge le modèle en arrière-plan."""
+    # Service pas encore construit : il chargera directement le modèle à jour
+    if movie_service.loaded:
+        logger.info(f"Signal {signal.Signals(signum).name} reçu, rechargement du modèle")
+        movie_service.reload_in_background()
+
+
+def install_reload_signal():
+    """
+    Recharge le modèle à la réception de ``RECOMMENDER_RELOAD_SIGNAL``.
+
+    Appelé par chaque worker gunicorn (``post_worker_init``, après la
+    réinitialisation de ses signaux) : les autres processus Django
+    (runserver, commandes de gestion) gardent le comportement par défaut du
+    signal. À envoyer aux workers : sur le maître, SIGHUP relance les workers.
+    """
+    from django.conf import settings
+
+    signal_name = settings.RECOMMENDER_RELOAD_SIGNAL
+    if not signal_name or not hasattr(signal, signal_name):
+        return
+    signal.signal(getattr(signal, signal_name), _reload_recommender)
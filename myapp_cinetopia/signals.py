@@ -0,0 +1,40 @@
+"""
+Mise à jour des profils de recommandation à chaque modification de
+l'historique, et du cache des utilisateurs connectés.
+"""
+import sys
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth import forget_user
+from .models import WatchHistory
+
+
+def _loaded_service():
+    """Service de recommandation déjà construit dans ce processus, ou ``None``."""
+    services = sys.modules.get('myapp_cinetopia.services')
+    if services is None or not services.movie_service.loaded:
+        return None
+    return services.movie_service
+
+
+@receiver(post_save, sender=WatchHistory)
+def watch_history_saved(sender, instance, **kwargs):
+    service = _loaded_service()
+    if service is not None:
+        service.history_changed(instance.user_id, instance.title, instance.weight)
+
+
+@receiver(post_delete, sender=WatchHistory)
+def watch_history_deleted(sender, instance, **kwargs):
+    service = _loaded_service()
+    if service is not None:
+        service.history_changed(instance.user_id, instance.title)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    forget_user(instance.pk)
@@ -0,0 +1,634 @@
+import asyncio
+import io
+import json
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpRequest
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from benchmarks.preprocessing import legacy_preprocess
+from benchmarks.synthetic import generate_catalog
+from loadtest.weather_stub import FORECAST, start_weather_stub
+from myapp_cinetopia import services
+from myapp_cinetopia.auth import user_cache_key
+from myapp_cinetopia.caching import StaleWhileRevalidateCache
+from myapp_cinetopia.catalog import CompactCatalog
+from myapp_cinetopia.artifacts import numeric_columns, save_artifact
+from myapp_cinetopia.features import normalize_columns, preprocess
+from myapp_cinetopia.instrumentation import exposition
+from myapp_cinetopia.models import Movie, WatchHistory
+from myapp_cinetopia.query_budget import assert_max_queries, query_budget
+from myapp_cinetopia.recommender import MovieRecommendationService
+from myapp_cinetopia.segments import SegmentedMatrix
+from myapp_cinetopia.training import train_chunked
+from myapp_cinetopia.vectorizers import make_vectorizer
+from myapp_cinetopia.title_index import title_slug
+
+
+class PreprocessTests(SimpleTestCase):
+    """``features.preprocess`` face à l'implémentation historique ligne à ligne."""
+
+    def catalog(self):
+        return pd.DataFrame({
+            'Nom': ['Le Grand Bleu', 'Amélie', np.nan],
+            'Noms_de_tous_les_acteurs': ['Jean Reno, Rosanna Arquette', np.nan, 'Gérard Depardieu'],
+            'Nom_du_réalisateur': ['Luc Besson', 'Jean-Pierre Jeunet', np.nan],
+            'Genre': ['Drame', np.nan, 'Comédie'],
+            'Synopsis': [np.nan, 'La vie de Montmartre', 'Un film de 1990'],
+            'Note': [7.5, np.nan, 6.0],
+            'Date_de_sortie': ['1988-05-11', '2001-04-25', np.nan],
+            'keywords': ["[{'id': 12, 'name': 'mer'}]", '', np.nan],
+        })
+
+    def assertSameFeatures(self, data):
+        expected = legacy_preprocess(data)
+        actual = preprocess(data)
+        for column in ('combined_features', 'keywords'):
+            self.assertEqual(actual[column].astype(str).tolist(), expected[column].astype(str).tolist())
+
+    def test_matches_legacy(self):
+        self.assertSameFeatures(self.catalog())
+
+    def test_matches_legacy_without_optional_column(self):
+        self.assertSameFeatures(self.catalog().drop(columns=['Genre', 'Date_de_sortie']))
+
+    def test_numeric_note_without_missing_values(self):
+        data = self.catalog().fillna({'Note': 5.0})
+        self.assertSameFeatures(data)
+        self.assertIn(' 7.5 ', preprocess(data)['combined_features'][0])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CachedModelBackendTests(TestCase):
+    """Utilisateur connecté lu depuis le cache (``auth.CachedModelBackend``)."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('cinephile', password='secret')
+
+    def session_user(self, client):
+        request = HttpRequest()
+        request.session = client.session
+        return get_user(request)
+
+    def test_user_served_from_cache_without_password_hash(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.session_user(self.client), self.user)
+
+        entry = cache.get(user_cache_key(self.user.pk))
+        self.assertNotIn(self.user.password, repr(entry))
+        with self.assertNumQueries(0):
+            user = self.session_user(self.client)
+        self.assertEqual(user.username, 'cinephile')
+        self.assertTrue(user.check_password('secret'))
+
+    def test_password_change_logs_out_cached_sessions(self):
+        self.client.force_login(self.user)
+        self.session_user(self.client)
+
+        self.user.set_password('changed')
+        self.user.save()
+        self.assertTrue(self.session_user(self.client).is_anonymous)
+
+    def test_sessions_opened_with_model_backend_stay_valid(self):
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.session_user(self.client), self.user)
+
+
+class CatalogServiceMixin:
+    """Service de recommandation des vues construit sur un petit catalogue synthétique."""
+
+    @classmethod
+    def catalog(cls):
+        return generate_catalog(300)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        work_dir = Path(tempfile.mkdtemp(prefix='cinetopia-tests-'))
+        cls.addClassCleanup(shutil.rmtree, work_dir)
+        source = work_dir / 'movies.csv'
+        cls.catalog().to_csv(source, index=False)
+        with override_settings(RECOMMENDER_DATA_PATH=source, RECOMMENDER_ARTIFACT_DIR=work_dir / 'artifacts'):
+            service = MovieRecommendationService(use_artifact=False)
+        cls.title = service.state.catalog.column('Nom')[0]
+        cls.row = service.title_row(cls.title)
+
+        # Service et météo des vues remplacés le temps des tests
+        previous = services.movie_service._instance, services.weather_service.api_key
+        services.movie_service._instance = service
+        services.weather_service.api_key = None
+        cls.addClassCleanup(cls.restore_services, *previous)
+
+    @staticmethod
+    def restore_services(instance, api_key):
+        services.movie_service._instance = instance
+        services.weather_service.api_key = api_key
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    QUERY_BUDGET_CHECKS=False,
+    RECOMMENDER_SYNC_INTERVAL=None,
+)
+class QueryBudgetTests(CatalogServiceMixin, TransactionTestCase):
+    """
+    Requêtes SQL de chaque vue de ``QUERY_BUDGETS``, caches vides (pire cas).
+
+    Hors transaction de test : les instructions de transaction des vues sont
+    comptées comme en production.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('cinephile')
+        self.client.force_login(self.user)
+
+    def assertWithinBudget(self, url_name, method, path, data=None, **extra):
+        cache.clear()
+        with assert_max_queries(query_budget(url_name, method), label=f"{method} {path}"):
+            response = getattr(self.client, method.lower())(path, data, **extra)
+        self.assertLess(response.status_code, 400)
+        return response
+
+    def add_to_history(self):
+        WatchHistory.objects.create(user=self.user, title=self.title, liked=True)
+
+    def test_home(self):
+        self.assertWithinBudget('home', 'GET', reverse('home'))
+
+    def test_movie(self):
+        self.assertWithinBudget('movie', 'GET', reverse('movie'))
+        self.assertWithinBudget('movie', 'POST', reverse('movie'), {'movie_name': self.title})
+
+    def test_results(self):
+        path = reverse('results', kwargs={'row': self.row, 'slug': title_slug(self.title)})
+        self.assertWithinBudget('results', 'GET', path)
+
+    def test_recommend(self):
+        self.assertWithinBudget('recommend', 'POST', reverse('recommend'), {'movie_name': self.title})
+
+    def test_recommend_batch(self):
+        self.assertWithinBudget(
+            'recommend_batch', 'POST', reverse('recommend_batch'),
+            json.dumps({'titles': [self.title]}), content_type='application/json',
+        )
+
+    def test_autocomplete(self):
+        self.assertWithinBudget('autocomplete', 'GET', reverse('autocomplete'), {'q': self.title[:3]})
+
+    def test_recommend_user(self):
+        self.add_to_history()
+        self.assertWithinBudget('recommend_user', 'GET', reverse('recommend_user'))
+
+    def test_history(self):
+        self.assertWithinBudget('history', 'POST', reverse('history'), {'movie_name': self.title})
+        response = self.assertWithinBudget(
+            'history', 'POST', reverse('history'), {'movie_name': self.title, 'liked': '1'}
+        )
+        self.assertEqual(response.json()['item']['liked'], True)
+        response = self.assertWithinBudget('history', 'GET', reverse('history'))
+        self.assertEqual(len(response.json()['history']), 1)
+
+    def test_history_remove(self):
+        self.add_to_history()
+        self.assertWithinBudget('history_remove', 'POST', reverse('history_remove'), {'movie_name': self.title})
+        self.assertFalse(WatchHistory.objects.exists())
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    RECOMMENDER_SYNC_INTERVAL=None,
+)
+class ResultsUrlTests(CatalogServiceMixin, TestCase):
+    """Adresses des résultats ``/results/<ligne>-<titre>/``."""
+
+    NON_LATIN_TITLE = '千と千尋の神隠し'
+
+    @classmethod
+    def catalog(cls):
+        data = generate_catalog(300)
+        # Homonyme du premier film, et titre sans lettre latine
+        data.loc[1, 'Nom'] = data.loc[0, 'Nom']
+        data.loc[2, 'Nom'] = cls.NON_LATIN_TITLE
+        return data
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('cinephile'))
+
+    def results_path(self, row, title):
+        return reverse('results', kwargs={'row': row, 'slug': title_slug(title)})
+
+    def test_search_redirects_to_the_row_of_the_title(self):
+        response = self.client.post(reverse('movie'), {'movie_name': self.title})
+        self.assertRedirects(response, self.results_path(0, self.title))
+
+    def test_homonyms_keep_their_own_row(self):
+        posters = services.movie_service.state.catalog.column('Lien_de_l_affiche')
+        response = self.client.get(self.results_path(1, self.title))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['movie_info']['Lien_de_l_affiche'], posters[1])
+        self.assertNotEqual(posters[0], posters[1])
+        self.assertNotEqual(response['ETag'], self.client.get(self.results_path(0, self.title))['ETag'])
+
+    def test_non_latin_title(self):
+        response = self.client.post(reverse('movie'), {'movie_name': self.NON_LATIN_TITLE})
+        self.assertRedirects(response, self.results_path(2, self.NON_LATIN_TITLE))
+        self.assertEqual(self.client.get(response['Location']).context['movie_info']['Nom'], self.NON_LATIN_TITLE)
+
+    def test_row_without_this_title_redirects_to_the_title(self):
+        response = self.client.get(self.results_path(5, self.title))
+        self.assertRedirects(response, self.results_path(0, self.title))
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_non_canonical_slug_redirects_without_validator(self):
+        slug = title_slug(self.title).upper()
+        response = self.client.get(reverse('results', kwargs={'row': 0, 'slug': slug}))
+        self.assertRedirects(response, self.results_path(0, self.title))
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_unknown_row(self):
+        response = self.client.get(reverse('results', kwargs={'row': 10 ** 6}))
+        self.assertRedirects(response, reverse('movie'))
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_revalidated_page(self):
+        etag = self.client.get(self.results_path(0, self.title))['ETag']
+        response = self.client.get(self.results_path(0, self.title), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+@override_settings(RECOMMENDER_SYNC_INTERVAL=None)
+class BuildRecommenderTests(TestCase):
+    """Commande ``build_recommender`` : artefact réutilisé ou réécrit."""
+
+    def setUp(self):
+        work_dir = Path(tempfile.mkdtemp(prefix='cinetopia-tests-'))
+        self.addCleanup(shutil.rmtree, work_dir)
+        source = work_dir / 'movies.csv'
+        generate_catalog(200).to_csv(source, index=False)
+        settings_override = override_settings(
+            RECOMMENDER_DATA_PATH=source, RECOMMENDER_ARTIFACT_DIR=work_dir / 'artifacts',
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(setattr, services.movie_service, '_instance', services.movie_service._instance)
+
+    def build(self, **options):
+        # Service reconstruit à chaque appel, comme dans un nouveau processus
+        services.movie_service._instance = None
+        output = io.StringIO()
+        call_command('build_recommender', stdout=output, **options)
+        return output.getvalue()
+
+    def test_up_to_date_artifact_is_kept(self):
+        self.build(top_k=5)
+        self.assertIn("déjà à jour", self.build(top_k=5))
+
+    def test_top_k_change_rebuilds_the_neighbour_table(self):
+        self.build(top_k=5)
+        self.assertIn("Artefact écrit", self.build(top_k=8))
+        services.movie_service._instance = None
+        self.assertEqual(services.movie_service.state.top_k_indices.shape[1], 8)
+
+
+class WeatherCacheTests(SimpleTestCase):
+    """Cache des prévisions (``StaleWhileRevalidateCache``) face à l'API météo factice."""
+
+    TTL, STALE_TTL, BACKOFF = 60, 600, 30
+
+    def setUp(self):
+        self.stub = start_weather_stub(latency=0.2)
+        self.addCleanup(self.stub.server_close)
+        self.addCleanup(self.stub.shutdown)
+
+        # Horloge du cache avancée à la main
+        self.now = 0.0
+        self.weather = services.WeatherService()
+        self.weather.api_key = 'test'
+        self.weather.base_url = 'http://{}:{}/forecast.json'.format(*self.stub.server_address)
+        self.weather.cache = StaleWhileRevalidateCache(
+            ttl=self.TTL, stale_ttl=self.STALE_TTL, error_backoff=self.BACKOFF, clock=lambda: self.now,
+        )
+
+    def concurrent_gets(self, n_threads=8):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.weather.get_weather_data()))
+            for _ in range(n_threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def wait_for_refresh(self):
+        for thread in threading.enumerate():
+            if thread.name.startswith('cache-refresh-'):
+                thread.join()
+
+    def test_cold_key_loaded_once_for_concurrent_requests(self):
+        self.assertEqual(self.concurrent_gets(), [FORECAST] * 8)
+        self.assertEqual(self.stub.requests, 1)
+
+    def test_stale_value_served_during_background_refresh(self):
+        self.weather.get_weather_data()
+        self.now += self.TTL + 1
+
+        self.stub.latency = 1.0
+        started = time.perf_counter()
+        results = self.concurrent_gets()
+        self.assertLess(time.perf_counter() - started, self.stub.latency)
+        self.assertEqual(results, [FORECAST] * 8)
+
+        self.wait_for_refresh()
+        self.assertEqual(self.stub.requests, 2)
+        # Valeur rafraîchie : de nouveau fraîche, sans appel amont
+        self.weather.get_weather_data()
+        self.assertEqual(self.stub.requests, 2)
+
+    def test_backoff_after_upstream_error(self):
+        self.stub.error_rate = 1.0
+        with self.assertLogs('myapp_cinetopia.services', 'ERROR'):
+            self.assertIsNone(self.weather.get_weather_data())
+        self.assertIsNone(self.weather.get_weather_data())
+        self.assertEqual(self.stub.requests, 1)
+
+        self.now += self.BACKOFF
+        self.stub.error_rate = 0.0
+        self.assertEqual(self.weather.get_weather_data(), FORECAST)
+        self.assertEqual(self.stub.requests, 2)
+
+    def test_stale_value_survives_failed_refresh(self):
+        self.weather.get_weather_data()
+        self.now += self.TTL + 1
+        self.stub.error_rate = 1.0
+
+        with self.assertLogs('myapp_cinetopia.services', 'ERROR'):
+            self.assertEqual(self.weather.get_weather_data(), FORECAST)
+            self.wait_for_refresh()
+        self.assertEqual(self.stub.errors, 1)
+        # Échec : valeur périmée toujours servie, pas de nouvel essai avant le délai
+        self.assertEqual(self.weather.get_weather_data(), FORECAST)
+        self.assertEqual(self.stub.requests, 2)
+
+        self.now += self.BACKOFF
+        with self.assertLogs('myapp_cinetopia.services', 'ERROR'):
+            self.assertEqual(self.weather.get_weather_data(), FORECAST)
+            self.wait_for_refresh()
+        self.assertEqual(self.stub.requests, 3)
+
+    def test_async_requests_coalesced(self):
+        async def gets():
+            return await asyncio.gather(*(self.weather.aget_weather_data() for _ in range(8)))
+
+        self.assertEqual(asyncio.run(gets()), [FORECAST] * 8)
+        self.assertEqual(self.stub.requests, 1)
+
+
+@override_settings(RECOMMENDER_SYNC_INTERVAL=None, RECOMMENDER_VOCABULARY_DRIFT=1.0)
+class SyncMoviesTests(TestCase):
+    """
+    Intégration des films de la base (``sync_movies``) dans un modèle chargé
+    depuis un artefact avec sa table des voisins.
+    """
+
+    K = 10
+
+    def setUp(self):
+        work_dir = Path(tempfile.mkdtemp(prefix='cinetopia-tests-'))
+        self.addCleanup(shutil.rmtree, work_dir)
+        self.catalog = generate_catalog(300)
+        # Titres uniques : les doublons de titre sont écartés des recommandations
+        self.catalog['Nom'] += [f' {row}' for row in range(len(self.catalog))]
+        source = work_dir / 'movies.csv'
+        self.catalog.to_csv(source, index=False)
+        settings_override = override_settings(
+            RECOMMENDER_DATA_PATH=source, RECOMMENDER_ARTIFACT_DIR=work_dir / 'artifacts',
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        # Film de la base entraîné avec le CSV : présent dans la table de l'artefact
+        self.seed = self.catalog['Nom'][0]
+        self.trained = self.create_movie('Suite entraînée')
+        service = MovieRecommendationService(use_artifact=False)
+        service._load_data(use_artifact=False, include_movies=True)
+        save_artifact(service.state, source, work_dir / 'artifacts', top_k=self.K)
+        self.service = MovieRecommendationService()
+        self.assertIsNotNone(self.service.state.top_k_indices)
+
+    def create_movie(self, title):
+        """Film de la base presque identique au film ``seed`` (ligne 0 du CSV)."""
+        row = self.catalog.iloc[0]
+        return Movie.objects.create(
+            title=title, description=row['Synopsis'], image_url=row["Lien de l'affiche"],
+            release_date=date.fromisoformat(row['Date de sortie']),
+            director=row['Nom du réalisateur'], actors=row['Noms de tous les acteurs'],
+            genre=row['Genre'], rating=row['Note'],
+        )
+
+    def recommended_titles(self, title):
+        recommended, _ = self.service.recommend_movies(title, n_neighbors=self.K)
+        self.assertIsNotNone(recommended, title)
+        # Le film lui-même occupe l'une des K places
+        self.assertEqual(len(recommended), self.K - 1, title)
+        return [movie['Nom'] for movie in recommended]
+
+    def assertListsWithoutRetiredRows(self):
+        state = self.service.state
+        for row in range(state.data_vectorized.shape[0]):
+            if row in state.retired:
+                continue
+            _, indices = self.service._table_neighbors(state, [row], self.K)
+            self.assertFalse(set(indices[0].tolist()) & state.retired, f"ligne {row}")
+
+    def test_added_movie(self):
+        self.create_movie('Suite ajoutée')
+        self.assertTrue(self.service.sync_movies())
+
+        self.assertIsInstance(self.service.state.data_vectorized, SegmentedMatrix)
+        self.assertIn('Suite ajoutée', self.recommended_titles(self.seed))
+        self.assertIn(self.seed, self.recommended_titles('Suite ajoutée'))
+
+    def test_renamed_movie(self):
+        self.trained.title = 'Suite renommée'
+        self.trained.save()
+        self.assertTrue(self.service.sync_movies())
+
+        self.assertIsNone(self.service.title_row('Suite entraînée'))
+        titles = self.recommended_titles(self.seed)
+        self.assertIn('Suite renommée', titles)
+        self.assertNotIn('Suite entraînée', titles)
+        self.assertListsWithoutRetiredRows()
+
+    def test_deleted_movies(self):
+        added = self.create_movie('Suite ajoutée')
+        self.service.sync_movies()
+        self.assertIn('Suite ajoutée', self.recommended_titles(self.seed))
+
+        # Lignes de la table partagée et du segment ajouté
+        self.trained.delete()
+        added.delete()
+        self.assertTrue(self.service.sync_movies())
+
+        titles = self.recommended_titles(self.seed)
+        self.assertNotIn('Suite entraînée', titles)
+        self.assertNotIn('Suite ajoutée', titles)
+        self.assertListsWithoutRetiredRows()
+        for title in self.catalog['Nom'][:20]:
+            self.recommended_titles(title)
+
+    def test_segment_merged_into_saved_artifact(self):
+        self.create_movie('Suite ajoutée')
+        self.service.sync_movies()
+        expected = self.recommended_titles(self.seed)
+
+        save_artifact(
+            self.service.state, settings.RECOMMENDER_DATA_PATH, settings.RECOMMENDER_ARTIFACT_DIR, top_k=self.K,
+        )
+        self.service = MovieRecommendationService()
+        self.assertNotIsInstance(self.service.state.data_vectorized, SegmentedMatrix)
+        self.assertEqual(self.recommended_titles(self.seed), expected)
+        self.assertListsWithoutRetiredRows()
+
+    @override_settings(RECOMMENDER_VOCABULARY_DRIFT=0.0)
+    def test_vocabulary_drift_retrains(self):
+        movie = self.create_movie('Suite inédite')
+        movie.description = 'zyxwv qutsr ponml'
+        movie.save()
+        self.assertTrue(self.service.sync_movies())
+
+        state = self.service.state
+        self.assertNotIsInstance(state.data_vectorized, SegmentedMatrix)
+        self.assertIn(movie.pk, state.movies)
+        self.assertIn('zyxwv', state.vectorizer.vocabulary_)
+        self.recommended_titles('Suite inédite')
+
+
+@override_settings(RECOMMENDER_SYNC_INTERVAL=None)
+class ExpositionTests(SimpleTestCase):
+    """Métriques Prometheus du service de recommandation (``/metrics``)."""
+
+    def test_last_reload_memory(self):
+        work_dir = Path(tempfile.mkdtemp(prefix='cinetopia-tests-'))
+        self.addCleanup(shutil.rmtree, work_dir)
+        source = work_dir / 'movies.csv'
+        generate_catalog(200).to_csv(source, index=False)
+        with override_settings(RECOMMENDER_DATA_PATH=source, RECOMMENDER_ARTIFACT_DIR=work_dir / 'artifacts'):
+            service = MovieRecommendationService(use_artifact=False)
+            self.assertNotIn('cinetopia_model_last_reload_rss', exposition(service))
+            last = service.reload()
+
+        metrics = dict(
+            line.rsplit(' ', 1) for line in exposition(service).splitlines() if not line.startswith('#')
+        )
+        for key in ('before', 'peak', 'after'):
+            self.assertEqual(int(metrics[f'cinetopia_model_last_reload_rss_{key}_bytes']), last[f'rss_{key}'])
+        self.assertGreaterEqual(last['rss_peak'], last['rss_before'])
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    RECOMMENDER_SYNC_INTERVAL=None,
+)
+class HistoryTests(CatalogServiceMixin, TestCase):
+    """Historique enregistré sous les titres du catalogue (``/history/``)."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('cinephile')
+        self.client.force_login(self.user)
+        # Même film, autre casse et ponctuation
+        self.variant = f"{self.title.upper()} !"
+
+    def add(self, movie_name, liked=False):
+        return self.client.post(reverse('history'), {'movie_name': movie_name, 'liked': '1' if liked else ''})
+
+    def test_variant_spelling_updates_the_same_entry(self):
+        self.assertTrue(self.add(self.title).json()['created'])
+        response = self.add(self.variant, liked=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()['created'])
+        self.assertEqual(response.json()['item']['title'], self.title)
+        self.assertEqual(list(self.user.watch_history.values_list('title', 'liked')), [(self.title, True)])
+
+    def test_variant_spelling_stored_under_catalogue_title(self):
+        self.add(self.variant)
+        self.assertEqual(list(self.user.watch_history.values_list('title', flat=True)), [self.title])
+
+    def test_remove_with_variant_spelling(self):
+        self.add(self.title)
+        response = self.client.post(reverse('history_remove'), {'movie_name': self.variant})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(self.user.watch_history.exists())
+
+    def test_remove_missing_entry(self):
+        response = self.client.post(reverse('history_remove'), {'movie_name': self.variant})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.json()['success'])
+
+    def test_unknown_title(self):
+        self.assertEqual(self.add('Film inexistant').status_code, 404)
+        self.assertEqual(self.client.post(reverse('history_remove'), {'movie_name': 'Film inexistant'}).status_code, 404)
+
+
+class TrainChunkedTests(SimpleTestCase):
+    """Entraînement par lots (``train_chunked``) face à l'entraînement en un seul passage."""
+
+    N_FEATURES = 2 ** 12
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        work_dir = Path(tempfile.mkdtemp(prefix='cinetopia-tests-'))
+        cls.addClassCleanup(shutil.rmtree, work_dir)
+        cls.source = work_dir / 'movies.csv'
+        generate_catalog(500).to_csv(cls.source, index=False)
+
+    def single_pass(self, kind):
+        data = preprocess(normalize_columns(pd.read_csv(self.source)))
+        vectorizer = make_vectorizer(kind, self.N_FEATURES)
+        matrix = vectorizer.fit_transform(data['combined_features'])
+        return CompactCatalog.from_frame(data), vectorizer, matrix, numeric_columns(data)
+
+    def assertSameTraining(self, kind, workers):
+        catalog, vectorizer, matrix, numeric = self.single_pass(kind)
+        features = train_chunked(
+            self.source, kind=kind, n_features=self.N_FEATURES, workers=workers, chunk_size=120,
+        )
+
+        self.assertEqual(features.vectorizer.vocabulary_, vectorizer.vocabulary_)
+        np.testing.assert_allclose(features.vectorizer.idf_, vectorizer.idf_)
+        self.assertEqual(features.matrix.shape, matrix.shape)
+        self.assertTrue(np.allclose(features.matrix.toarray(), matrix.toarray()))
+
+        # Même contenu ; l'encodage des chaînes dépend du découpage en lots
+        self.assertEqual(features.catalog.columns, catalog.columns)
+        for column in catalog.columns:
+            self.assertEqual(features.catalog.column(column).tolist(), catalog.column(column).tolist())
+        self.assertEqual(features.numeric.keys(), numeric.keys())
+        for name, values in numeric.items():
+            np.testing.assert_array_equal(features.numeric[name], values)
+
+    def test_tfidf(self):
+        for workers in (0, 1, 3):
+            with self.subTest(workers=workers):
+                self.assertSameTraining('tfidf', workers)
+
+    def test_hashing(self):
+        for workers in (0, 1, 3):
+            with self.subTest(workers=workers):
+                self.assertSameTraining('hashing', workers)
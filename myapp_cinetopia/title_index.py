@@ -0,0 +1,240 @@
+"""
+Index des titres de films.
+
+``TitleIndex`` associe chaque titre normalisé (sans accents, casse ni
+ponctuation) à la liste des lignes du catalogue qui le portent, pour une
+résolution en temps constant quelle que soit la taille du catalogue.
+``TrigramIndex`` sert l'autocomplétion tolérante aux fautes de frappe.
+"""
+import bisect
+import copy
+import re
+import unicodedata
+
+import numpy as np
+
+# Ponctuation et espaces ; les lettres de tous les alphabets sont conservées
+_NON_ALNUM = re.compile(r'[\W_]+')
+
+
+def normalize_title(title):
+    """
+    Normalise un titre : accents, casse et ponctuation sont ignorés. Les
+    titres en alphabet non latin gardent leurs lettres (clé non vide).
+    """
+    if not isinstance(title, str):
+        return ''
+    decomposed = unicodedata.normalize('NFKD', title.casefold())
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return _NON_ALNUM.sub(' ', stripped).strip()
+
+
+def title_slug(title):
+    """
+    Forme d'URL d'un titre (``Le Grand Bleu`` → ``le-grand-bleu``), purement
+    descriptive : les adresses de résultats désignent le film par sa ligne.
+    Vide pour un titre sans lettre ni chiffre.
+    """
+    return normalize_title(title).replace(' ', '-')
+
+
+class TitleIndex:
+    """Dictionnaire titre normalisé → lignes du catalogue."""
+
+    def __init__(self, titles):
+        self._rows = {}
+        for row, title in enumerate(titles):
+            key = normalize_title(title)
+            if key:
+                self._rows.setdefault(key, []).append(row)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, title):
+        return normalize_title(title) in self._rows
+
+    def lookup(self, title):
+        """Retourne toutes les lignes correspondant à ``title`` (liste vide si aucune)."""
+        return list(self._rows.get(normalize_title(title), ()))
+
+    def updated(self, added=(), removed=()):
+        """
+        Retourne une copie de l'index avec des lignes ajoutées ou retirées.
+
+        ``added`` et ``removed`` sont des couples ``(ligne, titre)`` ; l'index
+        courant n'est pas modifié.
+        """
+        index = copy.copy(self)
+        index._rows = dict(self._rows)
+        for row, title in removed:
+            key = normalize_title(title)
+            rows = [other for other in index._rows.get(key, ()) if other != row]
+            if rows:
+                index._rows[key] = rows
+            else:
+                index._rows.pop(key, None)
+        for row, title in added:
+            key = normalize_title(title)
+            if key:
+                index._rows[key] = index._rows.get(key, []) + [row]
+        return index
+
+
+def _trigrams(key):
+    """Trigrammes de caractères d'un titre normalisé, bornes comprises."""
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Index de trigrammes de caractères pour l'autocomplétion des titres.
+
+    Les titres commençant par la saisie sont proposés en premier ; les autres
+    candidats sont classés par similarité de trigrammes (indice de Jaccard),
+    ce qui tolère les fautes de frappe.
+    """
+
+    # Nombre maximal d'occurrences comptées par requête : au-delà, les
+    # trigrammes les plus fréquents (donc les moins discriminants) sont ignorés
+    max_postings = 8000
+
+    def __init__(self, titles):
+        labels = {}
+        for title in titles:
+            key = normalize_title(title)
+            if key and key not in labels:
+                labels[key] = title
+
+        self._keys = list(labels)
+        self._labels = list(labels.values())
+        self._sorted = sorted(range(len(self._keys)), key=self._keys.__getitem__)
+        self._sorted_keys = [self._keys[i] for i in self._sorted]
+
+        postings = {}
+        sizes = np.empty(len(self._keys), dtype=np.int32)
+        for key_id, key in enumerate(self._keys):
+            trigrams = _trigrams(key)
+            sizes[key_id] = len(trigrams)
+            for trigram in trigrams:
+                postings.setdefault(trigram, []).append(key_id)
+        self._postings = {
+            trigram: np.array(ids, dtype=np.int32) for trigram, ids in postings.items()
+        }
+        self._sizes = sizes
+        self._removed = frozenset()
+
+    def __len__(self):
+        return len(self._keys) - len(self._removed)
+
+    def updated(self, added=(), removed=()):
+        """
+        Retourne une copie de l'index avec des titres ajoutés ou retirés.
+
+        Les titres retirés sont seulement masqués ; l'index courant n'est pas
+        modifié.
+        """
+        index = copy.copy(self)
+        index._keys = list(self._keys)
+        index._labels = list(self._labels)
+        index._sorted = list(self._sorted)
+        index._sorted_keys = list(self._sorted_keys)
+        index._postings = dict(self._postings)
+        key_ids = {}
+        removed_ids = set(self._removed)
+
+        for title in removed:
+            key = normalize_title(title)
+            position = bisect.bisect_left(index._sorted_keys, key)
+            if position < len(index._sorted_keys) and index._sorted_keys[position] == key:
+                removed_ids.add(index._sorted[position])
+
+        new_sizes = []
+        for title in added:
+            key = normalize_title(title)
+            if not key:
+                continue
+            position = bisect.bisect_left(index._sorted_keys, key)
+            if position < len(index._sorted_keys) and index._sorted_keys[position] == key:
+                removed_ids.discard(index._sorted[position])
+                continue
+            if key in key_ids:
+                continue
+
+            key_id = key_ids[key] = len(index._keys)
+            index._keys.append(key)
+            index._labels.append(title)
+            index._sorted.insert(position, key_id)
+            index._sorted_keys.insert(position, key)
+            trigrams = _trigrams(key)
+            new_sizes.append(len(trigrams))
+            for trigram in trigrams:
+                posting = index._postings.get(trigram)
+                if posting is None:
+                    index._postings[trigram] = np.array([key_id], dtype=np.int32)
+                else:
+                    index._postings[trigram] = np.append(posting, np.int32(key_id))
+
+        index._sizes = np.append(self._sizes, np.array(new_sizes, dtype=np.int32))
+        index._removed = frozenset(removed_ids)
+        return index
+
+    def search(self, query, limit=10):
+        """Retourne jusqu'à ``limit`` titres classés pour la saisie ``query``."""
+        key = normalize_title(query)
+        if not key or limit <= 0:
+            return []
+
+        results = self._prefix_matches(key, limit)
+        if len(results) < limit and len(key) >= 3:
+            seen = set(results) | self._removed
+            for key_id in self._fuzzy_matches(key, limit + len(results) + min(len(self._removed), limit)):
+                if key_id not in seen:
+                    results.append(key_id)
+                    if len(results) == limit:
+                        break
+
+        return [self._labels[key_id] for key_id in results]
+
+    def _prefix_matches(self, key, limit):
+        """Titres commençant par ``key``, les plus courts d'abord."""
+        start = bisect.bisect_left(self._sorted_keys, key)
+        matches = []
+        for position in range(start, min(start + limit * 5, len(self._sorted_keys))):
+            if not self._sorted_keys[position].startswith(key):
+                break
+            if self._sorted[position] not in self._removed:
+                matches.append(self._sorted[position])
+        matches.sort(key=lambda key_id: (len(self._keys[key_id]), self._keys[key_id]))
+        return matches[:limit]
+
+    def _fuzzy_matches(self, key, limit):
+        """Titres les plus proches de ``key`` au sens des trigrammes partagés."""
+        trigrams = _trigrams(key)
+        postings = sorted(
+            (self._postings[trigram] for trigram in trigrams if trigram in self._postings),
+            key=len,
+        )
+        if not postings:
+            return []
+
+        # Les trigrammes rares suffisent à trouver les bons candidats
+        selected = []
+        total = 0
+        for posting in postings:
+            if selected and total + len(posting) > self.max_postings:
+                break
+            selected.append(posting)
+            total += len(posting)
+
+        # Coût borné par max_postings, indépendant de la taille du catalogue
+        candidates, shared = np.unique(np.concatenate(selected), return_counts=True)
+        scores = shared / (len(trigrams) + self._sizes[candidates] - shared)
+
+        if len(candidates) > limit:
+            best = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            best = np.arange(len(candidates))
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return candidates[best].tolist()
@@ -0,0 +1,190 @@
+"""
+Entraînement du modèle par lots, en parallèle, pour les grands catalogues.
+
+Le CSV source est lu par lots de ``chunk_size`` lignes (``pd.read_csv``
+avec ``chunksize``) ; chaque lot est préparé dans un processus d'un
+``ProcessPoolExecutor`` : préprocessing, comptage des termes, colonnes
+textuelles compactes (``CompactCatalog``) et colonnes numériques. Seuls ces
+tableaux compacts reviennent au processus principal, jamais le texte combiné.
+Le nombre de lots en cours est borné, de sorte qu'une partie seulement du
+CSV est en mémoire à un instant donné.
+
+Les comptages des lots sont ensuite fusionnés :
+
+- ``hashing`` : les colonnes (termes hachés) sont communes à tous les lots,
+  les matrices sont simplement empilées ;
+- ``tfidf`` : chaque lot a son propre vocabulaire ; le vocabulaire global est
+  l'union triée des vocabulaires des lots et les colonnes de chaque lot y
+  sont renumérotées. La matrice obtenue est celle de ``TfidfVectorizer``
+  ajusté sur le catalogue entier.
+
+La pondération IDF est enfin calculée sur les fréquences de documents du
+catalogue entier. Le résultat a le même format que l'entraînement en un seul
+passage et s'écrit dans le même artefact.
+"""
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+from .artifacts import numeric_columns
+from .catalog import CompactCatalog
+from .features import normalize_columns, preprocess
+from .vectorizers import HashingTfidfVectorizer, apply_idf, make_vectorizer, smooth_idf
+
+logger = logging.getLogger(__name__)
+
+
+class TrainedFeatures:
+    """Caractéristiques du catalogue entier, issues de la fusion des lots."""
+
+    def __init__(self, catalog, vectorizer, matrix, numeric):
+        self.catalog = catalog
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        self.numeric = numeric
+
+
+def _featurize_chunk(frame, kind, n_features):
+    """
+    Prépare un lot (exécuté dans un processus du pool).
+
+    Retourne ``(counts, terms, catalog_arrays, numeric)`` : les comptages
+    (CSR), les termes des colonnes (``None`` pour ``hashing``), les tableaux
+    du catalogue compact du lot et ses colonnes numériques.
+    """
+    data = preprocess(frame)
+    if kind == 'hashing':
+        counts = HashingTfidfVectorizer(n_features).counts(data['combined_features'])
+        terms = None
+    else:
+        counter = CountVectorizer(dtype=np.int32)
+        counts = counter.fit_transform(data['combined_features'])
+        terms = counter.get_feature_names_out().astype(str)
+    # Colonnes triées dans chaque ligne, comme dans la matrice finale
+    counts.sort_indices()
+    catalog = CompactCatalog.from_frame(data)
+    return counts, terms, (catalog.columns, *catalog.arrays()), numeric_columns(data)
+
+
+def _chunks(source_path, chunk_size, extra):
+    """Lots du CSV source, puis ``extra`` (films de la base) s'il est fourni."""
+    for frame in pd.read_csv(source_path, chunksize=chunk_size):
+        yield normalize_columns(frame)
+    if extra is not None and len(extra):
+        yield extra
+
+
+def _featurize_all(chunks, kind, n_features, workers):
+    """Prépare tous les lots, dans l'ordre, avec au plus ``2 × workers`` lots en cours."""
+    if workers == 1:
+        return [_featurize_chunk(frame, kind, n_features) for frame in chunks]
+
+    parts = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for frame in chunks:
+            pending.append(executor.submit(_featurize_chunk, frame, kind, n_features))
+            if len(pending) >= 2 * workers:
+                parts.append(pending.popleft().result())
+        parts.extend(future.result() for future in pending)
+    return parts
+
+
+def _document_frequency(counts_parts, n_columns, mappings):
+    """Nombre de films de tout le catalogue contenant chaque terme (colonne)."""
+    document_frequency = np.zeros(n_columns, dtype=np.int64)
+    for counts, mapping in zip(counts_parts, mappings):
+        local = np.bincount(counts.indices, minlength=counts.shape[1])
+        if mapping is None:
+            document_frequency += local
+        else:
+            document_frequency[mapping] += local
+    return document_frequency
+
+
+def _assemble(counts_parts, n_columns, idf, mappings):
+    """
+    Matrice TF-IDF du catalogue entier, remplie lot par lot.
+
+    Chaque lot est pondéré, normalisé puis recopié dans les tableaux CSR
+    finaux et libéré aussitôt : ni les comptages empilés ni leur conversion
+    en ``float64`` n'existent en entier à côté de la matrice finale.
+    """
+    n_rows = sum(counts.shape[0] for counts in counts_parts)
+    nnz = sum(counts.nnz for counts in counts_parts)
+    data = np.empty(nnz, dtype=np.float64)
+    indices = np.empty(nnz, dtype=np.int32)
+    indptr = np.empty(n_rows + 1, dtype=np.int64)
+    indptr[0] = 0
+
+    row = position = 0
+    while counts_parts:
+        counts = counts_parts.pop(0)
+        mapping = mappings.pop(0)
+        if mapping is not None:
+            # Vocabulaires triés : la renumérotation conserve l'ordre des colonnes
+            counts = sparse.csr_matrix(
+                (counts.data, mapping[counts.indices], counts.indptr),
+                shape=(counts.shape[0], n_columns),
+            )
+        weighted = apply_idf(counts, idf)
+        end = position + weighted.nnz
+        data[position:end] = weighted.data
+        indices[position:end] = weighted.indices
+        indptr[row + 1:row + weighted.shape[0] + 1] = weighted.indptr[1:] + position
+        row += weighted.shape[0]
+        position = end
+        del counts, weighted
+
+    matrix = sparse.csr_matrix((data, indices, indptr), shape=(n_rows, n_columns), copy=False)
+    matrix.has_sorted_indices = True
+    return matrix
+
+
+def train_chunked(source_path, kind='tfidf', n_features=2 ** 18, workers=0,
+                  chunk_size=50000, extra=None):
+    """
+    Entraîne le vectoriseur ``kind`` sur le CSV ``source_path`` (suivi des
+    lignes du ``DataFrame`` ``extra``, déjà aux noms de colonnes du service).
+
+    ``workers`` : nombre de processus (0 pour un par cœur, 1 pour préparer
+    les lots dans le processus courant). Retourne un ``TrainedFeatures``.
+    """
+    workers = workers or os.cpu_count() or 1
+    parts = _featurize_all(_chunks(source_path, chunk_size, extra), kind, n_features, workers)
+    logger.info(f"Entraînement par lots: {len(parts)} lots préparés par {workers} processus")
+
+    vectorizer = make_vectorizer(kind, n_features)
+    if kind == 'tfidf':
+        # Vocabulaire global : union triée des vocabulaires des lots
+        vocabulary = np.unique(np.concatenate([part[1] for part in parts]))
+        mappings = [np.searchsorted(vocabulary, part[1]).astype(np.int32) for part in parts]
+        vectorizer.vocabulary_ = {term: index for index, term in enumerate(vocabulary.tolist())}
+        n_columns = len(vocabulary)
+        del vocabulary
+    else:
+        mappings = [None] * len(parts)
+        n_columns = n_features
+
+    catalog = CompactCatalog.concatenate([
+        CompactCatalog.from_arrays(*part[2]) for part in parts
+    ])
+    numeric = {
+        name: np.concatenate([part[3][name] for part in parts])
+        for name in parts[0][3]
+    }
+
+    # Seuls les comptages restent nécessaires : les tableaux du catalogue et
+    # les termes des lots sont libérés avant l'assemblage de la matrice
+    counts_parts = [part[0] for part in parts]
+    del parts
+    n_rows = sum(counts.shape[0] for counts in counts_parts)
+    vectorizer.idf_ = smooth_idf(_document_frequency(counts_parts, n_columns, mappings), n_rows)
+    matrix = _assemble(counts_parts, n_columns, vectorizer.idf_, mappings)
+    return TrainedFeatures(catalog, vectorizer, matrix, numeric)
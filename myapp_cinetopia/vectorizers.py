@@ -0,0 +1,90 @@
+"""
+Vectorisation TF-IDF des caractéristiques combinées des films.
+
+Deux variantes, choisies par ``RECOMMENDER_VECTORIZER`` :
+
+- ``tfidf`` : ``TfidfVectorizer`` de scikit-learn, vocabulaire explicite
+  (un terme par colonne), par défaut ;
+- ``hashing`` : ``HashingTfidfVectorizer``, termes hachés dans un nombre fixe
+  de colonnes, sans vocabulaire. Les comptages de deux lots de films
+  s'additionnent sans réconciliation des vocabulaires, ce qui permet de les
+  calculer en parallèle (``training.train_chunked``).
+
+Les deux variantes appliquent la même analyse (minuscules, ``token_pattern``
+par défaut) et la même pondération IDF lissée suivie d'une normalisation L2 ;
+elles ne diffèrent que par les collisions du hachage.
+"""
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+
+from .neighbors import row_norms
+
+VECTORIZERS = ('tfidf', 'hashing')
+
+
+def make_vectorizer(kind='tfidf', n_features=2 ** 18):
+    """Instancie le vectoriseur ``kind`` (non ajusté)."""
+    if kind == 'tfidf':
+        return TfidfVectorizer()
+    if kind == 'hashing':
+        return HashingTfidfVectorizer(n_features=n_features)
+    raise ValueError(f"Vectoriseur inconnu: {kind!r} (choix: {', '.join(VECTORIZERS)})")
+
+
+def vectorizer_kind(vectorizer):
+    """Nom (``tfidf`` ou ``hashing``) de la variante de ``vectorizer``."""
+    return 'hashing' if isinstance(vectorizer, HashingTfidfVectorizer) else 'tfidf'
+
+
+def smooth_idf(document_frequency, n_documents):
+    """Pondération IDF lissée, comme ``TfidfTransformer(smooth_idf=True)``."""
+    return np.log((1 + n_documents) / (1 + np.asarray(document_frequency, dtype=np.float64))) + 1
+
+
+def apply_idf(counts, idf):
+    """
+    Pondère les comptages ``counts`` (CSR) par ``idf`` puis normalise chaque
+    ligne (norme L2), comme ``TfidfTransformer``.
+    """
+    matrix = sparse.csr_matrix(counts, dtype=np.float64)
+    matrix.data *= idf[matrix.indices]
+    matrix.data /= np.repeat(row_norms(matrix), np.diff(matrix.indptr))
+    return matrix
+
+
+class HashingTfidfVectorizer:
+    """
+    TF-IDF sur termes hachés (``HashingVectorizer`` + IDF lissée).
+
+    Expose ce que le service attend d'un ``TfidfVectorizer`` ajusté :
+    ``fit_transform``, ``transform``, ``build_analyzer`` et ``idf_`` ;
+    ``vocabulary_`` vaut ``None`` (aucun terme n'est inconnu).
+    """
+
+    vocabulary_ = None
+
+    def __init__(self, n_features=2 ** 18):
+        self.n_features = n_features
+        self.idf_ = None
+
+    def _hasher(self):
+        return HashingVectorizer(
+            n_features=self.n_features, alternate_sign=False, norm=None, dtype=np.float32,
+        )
+
+    def build_analyzer(self):
+        return self._hasher().build_analyzer()
+
+    def counts(self, raw_documents):
+        """Comptages bruts des termes hachés (CSR ``float32``)."""
+        return self._hasher().transform(raw_documents)
+
+    def fit_transform(self, raw_documents):
+        counts = self.counts(raw_documents)
+        document_frequency = np.bincount(counts.indices, minlength=self.n_features)
+        self.idf_ = smooth_idf(document_frequency, counts.shape[0])
+        return apply_idf(counts, self.idf_)
+
+    def transform(self, raw_documents):
+        return apply_idf(self.counts(raw_documents), self.idf_)
@@ -1,14 +1,24 @@
 
 from django.shortcuts import render, redirect
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.cache import patch_cache_control
 from django.views.decorators.csrf import csrf_protect
+from django.views.decorators.http import condition, require_POST
+import hashlib
+import json
 import logging
 
+from .facets import MovieFilters
 from .forms import LoginForm, SignUpForm, MovieRecommendationForm
+from .instrumentation import exposition, stage
+from .models import WatchHistory
 from .services import movie_service, weather_service
+from .title_index import title_slug
 
 logger = logging.getLogger(__name__)
 
@@ -67,35 +77,119 @@ def home_view(request):
         'user': request.user,
         'weather_data': weather_data,
     }
-    return render(request, 'home.html', context)
+    with stage('render'):
+        return render(request, 'home.html', context)
 
 
 @login_required
 def movie_view(request):
-    """Vue pour la recherche de films."""
+    """
+    Vue pour la recherche de films.
+    
+    Le titre soumis n'est pas gardé en session : la recherche redirige vers
+    l'adresse stable de ses résultats (``/results/<ligne>-<titre>/``).
+    """
     if request.method == 'POST':
         form = MovieRecommendationForm(request.POST)
         if form.is_valid():
             movie_name = form.cleaned_data['movie_name']
-            request.session['movie_name'] = movie_name
-            return redirect('results')
+            row = movie_service.title_row(movie_name)
+            if row is not None:
+                return results_redirect(row, movie_service.row_title(row))
+            form.add_error('movie_name', f"Le film '{movie_name}' n'est pas présent dans la base de données.")
     else:
         form = MovieRecommendationForm()
     
     return render(request, 'movie.html', {'form': form})
 
 
+def results_neighbors(request):
+    """Nombre de recommandations demandé (``?k=``, 10 par défaut)."""
+    try:
+        n_neighbors = int(request.GET.get('k', 10))
+    except ValueError:
+        n_neighbors = 10
+    return min(max(n_neighbors, 1), settings.RECOMMENDER_BATCH_MAX_NEIGHBORS)
+
+
+def results_etag(request, row, slug=''):
+    """
+    ETag d'une page de résultats : elle ne dépend que du film, de K et de la
+    version du modèle. ``None`` si l'adresse n'est pas celle du film de la
+    ligne ``row`` : la vue redirige, sans validateur.
+    """
+    title = movie_service.row_title(row)
+    if title is None or title_slug(title) != slug:
+        return None
+    key = f'{movie_service.model_version}:{row}:{slug}:{results_neighbors(request)}'
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def results_redirect(row, title):
+    """Redirection vers l'adresse stable des résultats du film de la ligne ``row``."""
+    slug = title_slug(title)
+    if slug:
+        return redirect('results', row=row, slug=slug)
+    return redirect('results', row=row)
+
+
+def results_movie(row, slug):
+    """
+    Film désigné par l'adresse ``/results/<ligne>-<slug>/`` : ``(titre, ligne)``,
+    ou ``(None, None)``.
+
+    La ligne fait foi tant que son titre correspond au slug ; sinon (ligne
+    renumérotée par un réentraînement), le film est retrouvé par son slug.
+    """
+    title = movie_service.row_title(row)
+    if title is not None and title_slug(title) == slug:
+        return title, row
+    row = movie_service.title_row(slug.replace('-', ' ')) if slug else None
+    if row is None:
+        return None, None
+    return movie_service.row_title(row), row
+
+
+def patch_results_cache(response):
+    """En-têtes de cache d'une page de résultats (navigateur uniquement : pages authentifiées)."""
+    patch_cache_control(response, private=True, max_age=settings.RECOMMENDER_RESULTS_MAX_AGE)
+    return response
+
+
 @login_required
-def results_view(request):
-    """Vue des résultats de recommandation."""
-    movie_name = request.session.get('movie_name', '')
+def legacy_results_view(request):
+    """Ancienne adresse des résultats (titre en session) : redirige vers l'adresse stable."""
+    row = movie_service.title_row(request.session.get('movie_name', ''))
     
-    if not movie_name:
+    if row is None:
         messages.error(request, 'Aucun film recherché.')
         return redirect('movie')
     
+    return results_redirect(row, movie_service.row_title(row))
+
+
+@login_required
+@condition(etag_func=results_etag)
+def results_view(request, row, slug=''):
+    """
+    Vue des résultats de recommandation (``/results/<ligne>-<titre>/?k=10``).
+    
+    Le film est désigné par sa ligne du catalogue, les homonymes restant
+    distincts ; le titre n'est que descriptif. La page est mise en cache par
+    le navigateur et revalidée par son ETag : un rafraîchissement ou un
+    retour arrière ne recalcule rien.
+    """
+    movie_name, movie_row = results_movie(row, slug)
+    if movie_name is None:
+        messages.error(request, "Ce film n'est pas présent dans la base de données.")
+        return redirect('movie')
+    if movie_row != row or title_slug(movie_name) != slug:
+        return results_redirect(movie_row, movie_name)
+    
     try:
-        recommended_movies, movie_info = movie_service.recommend_movies(movie_name)
+        recommended_movies, movie_info = movie_service.recommend_movies(
+            movie_name, n_neighbors=results_neighbors(request), row=row
+        )
         
         if recommended_movies is None:
             messages.error(request, movie_info)  # movie_info contient le message d'erreur
@@ -107,7 +201,8 @@ def results_view(request):
             'movie_name': movie_name,
         }
         
-        return render(request, 'results.html', context)
+        with stage('render'):
+            return patch_results_cache(render(request, 'results.html', context))
         
     except Exception as e:
         logger.error(f"Erreur lors de la recommandation pour '{movie_name}': {e}")
@@ -115,16 +210,43 @@ def results_view(request):
         return redirect('movie')
 
 
+@login_required
+def autocomplete_view(request):
+    """API JSON d'autocomplétion des titres de films."""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
+    
+    return JsonResponse({
+        'query': query,
+        'results': movie_service.autocomplete(query, limit=limit) if query else [],
+    })
+
+
 @login_required
 def recommend_view(request):
-    """Vue de recommandation (alternative)."""
+    """
+    Vue de recommandation (alternative).
+    
+    Filtres optionnels : ``genre`` (répétable ou séparé par des virgules),
+    ``year_min``, ``year_max`` et ``min_rating``.
+    """
     if request.method == 'POST':
         form = MovieRecommendationForm(request.POST)
         if form.is_valid():
             movie_name = form.cleaned_data['movie_name']
             
             try:
-                recommended_movies, movie_info = movie_service.recommend_movies(movie_name)
+                filters = MovieFilters.from_params(request.POST)
+            except ValueError as e:
+                return JsonResponse({'success': False, 'error': str(e)}, status=400)
+            
+            try:
+                recommended_movies, movie_info = movie_service.recommend_movies(
+                    movie_name, filters=filters
+                )
                 
                 if recommended_movies is None:
                     return JsonResponse({
@@ -147,4 +269,165 @@ def recommend_view(request):
     else:
         form = MovieRecommendationForm()
     
-    return render(request, 'recommend.html', {'form': form})
\ No newline at end of file
+    with stage('render'):
+        return render(request, 'recommend.html', {'form': form})
+
+
+@login_required
+@require_POST
+def recommend_batch_view(request):
+    """API JSON de recommandation pour plusieurs titres en une requête."""
+    try:
+        payload = json.loads(request.body or b'{}')
+        titles = payload.get('titles', [])
+        n_neighbors = int(payload.get('n_neighbors', 10))
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({'success': False, 'error': 'Requête JSON invalide.'}, status=400)
+    
+    if not isinstance(titles, list) or not all(isinstance(title, str) for title in titles):
+        return JsonResponse({'success': False, 'error': "'titles' doit être une liste de titres."}, status=400)
+    
+    if len(titles) > settings.RECOMMENDER_BATCH_MAX_TITLES:
+        return JsonResponse({
+            'success': False,
+            'error': f"Au plus {settings.RECOMMENDER_BATCH_MAX_TITLES} titres par requête."
+        }, status=400)
+    
+    if not 1 <= n_neighbors <= settings.RECOMMENDER_BATCH_MAX_NEIGHBORS:
+        return JsonResponse({'success': False, 'error': "'n_neighbors' hors limites."}, status=400)
+    
+    try:
+        batch = movie_service.recommend_many(titles, n_neighbors=n_neighbors)
+    except Exception as e:
+        logger.error(f"Erreur API recommandation groupée: {e}")
+        return JsonResponse({
+            'success': False,
+            'error': 'Erreur lors de la recherche.'
+        })
+    
+    results = []
+    for title, (recommended_movies, movie_info) in zip(titles, batch):
+        if recommended_movies is None:
+            results.append({'title': title, 'success': False, 'error': movie_info})
+        else:
+            results.append({
+                'title': title,
+                'success': True,
+                'recommended_movies': recommended_movies,
+                'movie_info': movie_info,
+            })
+    
+    return JsonResponse({'success': True, 'results': results})
+
+
+@login_required
+def user_recommend_view(request):
+    """
+    API JSON de recommandations personnalisées, calculées à partir de
+    l'historique de l'utilisateur connecté (mêmes filtres que ``/recommend/``).
+    """
+    try:
+        filters = MovieFilters.from_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    try:
+        recommended_movies, profile_info = movie_service.recommend_for_user(
+            request.user.pk, filters=filters
+        )
+    except Exception as e:
+        logger.error(f"Erreur API recommandation personnalisée: {e}")
+        return JsonResponse({
+            'success': False,
+            'error': 'Erreur lors de la recherche.'
+        })
+    
+    if recommended_movies is None:
+        return JsonResponse({'success': False, 'error': profile_info})
+    
+    return JsonResponse({
+        'success': True,
+        'recommended_movies': recommended_movies,
+        'profile': profile_info,
+    })
+
+
+@login_required
+def history_view(request):
+    """
+    API JSON de l'historique de l'utilisateur connecté.
+    
+    GET : films de l'historique ; POST (``movie_name``, ``liked``) : ajoute un
+    film du catalogue à l'historique, ou met à jour son appréciation, et
+    retourne ce seul film.
+    """
+    if request.method == 'POST':
+        form = MovieRecommendationForm(request.POST)
+        if not form.is_valid():
+            return JsonResponse({'success': False, 'error': 'Titre de film manquant.'}, status=400)
+        
+        movie_name = form.cleaned_data['movie_name']
+        title = _catalog_title(movie_name)
+        if title is None:
+            return JsonResponse({
+                'success': False,
+                'error': f"Le film '{movie_name}' n'est pas présent dans la base de données."
+            }, status=404)
+        
+        liked = request.POST.get('liked', '').lower() in ('1', 'true', 'on')
+        item, created = WatchHistory.objects.update_or_create(
+            user=request.user, title=title, defaults={'liked': liked}
+        )
+        return JsonResponse({'success': True, 'created': created, 'item': _history_item(item)})
+    
+    history = [_history_item(item) for item in request.user.watch_history.all()]
+    return JsonResponse({'success': True, 'history': history})
+
+
+def _catalog_title(movie_name):
+    """
+    Titre du catalogue désigné par une saisie (casse, accents et ponctuation
+    ignorés), ou ``None`` : l'historique n'enregistre que des titres du
+    catalogue, un par film.
+    """
+    row = movie_service.title_row(movie_name)
+    return None if row is None else movie_service.row_title(row)
+
+
+def _history_item(item):
+    """Représentation JSON d'un film de l'historique."""
+    return {'title': item.title, 'liked': item.liked, 'updated_at': item.updated_at.isoformat()}
+
+
+@login_required
+@require_POST
+def history_remove_view(request):
+    """API JSON retirant un film (``movie_name``) de l'historique de l'utilisateur connecté."""
+    movie_name = request.POST.get('movie_name', '')
+    # Titre enregistré par history_view ; celui d'un film retiré du catalogue
+    # depuis ne se résout plus et doit être donné tel quel
+    title = _catalog_title(movie_name) or movie_name
+    items = list(request.user.watch_history.filter(title=title))
+    if not items:
+        return JsonResponse({
+            'success': False,
+            'error': f"Le film '{movie_name}' n'est pas dans votre historique."
+        }, status=404)
+    # delete() sur les instances : le signal post_delete met le profil à jour
+    for item in items:
+        item.delete()
+    return JsonResponse({'success': True})
+
+
+@staff_member_required
+def metrics_view(request):
+    """
+    Métriques de performance du worker au format texte de Prometheus
+    (membres du personnel uniquement, ``PERFORMANCE_METRICS`` activé).
+    """
+    if not settings.PERFORMANCE_METRICS:
+        raise Http404
+    
+    # Les compteurs du service ne le construisent pas s'il ne l'est pas encore
+    service = movie_service.get() if movie_service.loaded else None
+    return HttpResponse(exposition(service), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,161 @@
+"""
+Versions asynchrones des vues d'accueil et de recommandation, pour un
+déploiement ASGI (``ASYNC_VIEWS``, voir ``cinetopia/urls.py``).
+
+L'appel à l'API météo est fait avec un client HTTP asynchrone et la
+recherche des voisins est exécutée dans un pool de threads borné
+(``RECOMMENDER_EXECUTOR_WORKERS``) : une API météo lente ou une recherche
+coûteuse n'immobilise pas le worker, qui continue de servir les autres
+requêtes. Les accès à la session et le rendu des gabarits (qui lisent la
+session via les messages) restent synchrones et passent par
+``sync_to_async``.
+"""
+import functools
+import logging
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.contrib.auth.views import redirect_to_login
+from django.http import JsonResponse
+from django.shortcuts import render, redirect
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from .facets import MovieFilters
+from .forms import MovieRecommendationForm
+from .instrumentation import stage
+from .services import movie_service, run_recommendation, weather_service
+from .title_index import title_slug
+from .views import (
+    patch_results_cache, results_etag, results_movie, results_neighbors, results_redirect,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def async_login_required(view):
+    """Équivalent de ``login_required`` pour une vue asynchrone (Django 5.0)."""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        # Les gabarits lisent ``request.user`` : déjà chargé, sans requête synchrone
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def _render(request, template_name, context=None):
+    with stage('render'):
+        return await sync_to_async(render)(request, template_name, context)
+
+
+def _recommend(movie_name, n_neighbors=10, filters=None, row=None):
+    return movie_service.recommend_movies(
+        movie_name, n_neighbors=n_neighbors, filters=filters, row=row
+    )
+
+
+@async_login_required
+async def home_view(request):
+    """Vue de la page d'accueil."""
+    weather_data = await weather_service.aget_weather_data()
+
+    context = {
+        'user': request.user,
+        'weather_data': weather_data,
+    }
+    return await _render(request, 'home.html', context)
+
+
+@async_login_required
+async def results_view(request, row, slug=''):
+    """Vue des résultats de recommandation (``/results/<ligne>-<titre>/?k=10``)."""
+    # Pas de ``condition`` : son etag_func lirait la version du modèle dans la
+    # boucle, au risque d'y construire le service
+    etag = await run_recommendation(results_etag, request, row, slug)
+    if etag is not None:
+        etag = quote_etag(etag)
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+
+    movie_name, movie_row = await run_recommendation(results_movie, row, slug)
+    if movie_name is None:
+        messages.error(request, "Ce film n'est pas présent dans la base de données.")
+        return redirect('movie')
+    if movie_row != row or title_slug(movie_name) != slug:
+        return results_redirect(movie_row, movie_name)
+
+    try:
+        recommended_movies, movie_info = await run_recommendation(
+            _recommend, movie_name, n_neighbors=results_neighbors(request), row=row
+        )
+
+        if recommended_movies is None:
+            messages.error(request, movie_info)  # movie_info contient le message d'erreur
+            return redirect('movie')
+
+        context = {
+            'recommended_movies': recommended_movies,
+            'movie_info': movie_info,
+            'movie_name': movie_name,
+        }
+
+        response = await _render(request, 'results.html', context)
+        if etag is not None:
+            response.headers['ETag'] = etag
+        return patch_results_cache(response)
+
+    except Exception as e:
+        logger.error(f"Erreur lors de la recommandation pour '{movie_name}': {e}")
+        messages.error(request, 'Une erreur est survenue lors de la recherche.')
+        return redirect('movie')
+
+
+@async_login_required
+async def recommend_view(request):
+    """
+    Vue de recommandation (alternative).
+
+    Filtres optionnels : ``genre`` (répétable ou séparé par des virgules),
+    ``year_min``, ``year_max`` et ``min_rating``.
+    """
+    if request.method == 'POST':
+        form = MovieRecommendationForm(request.POST)
+        if form.is_valid():
+            movie_name = form.cleaned_data['movie_name']
+
+            try:
+                filters = MovieFilters.from_params(request.POST)
+            except ValueError as e:
+                return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+            try:
+                recommended_movies, movie_info = await run_recommendation(
+                    _recommend, movie_name, filters=filters
+                )
+
+                if recommended_movies is None:
+                    return JsonResponse({
+                        'success': False,
+                        'error': movie_info
+                    })
+
+                return JsonResponse({
+                    'success': True,
+                    'recommended_movies': recommended_movies,
+                    'movie_info': movie_info
+                })
+
+            except Exception as e:
+                logger.error(f"Erreur API recommandation: {e}")
+                return JsonResponse({
+                    'success': False,
+                    'error': 'Erreur lors de la recherche.'
+                })
+    else:
+        form = MovieRecommendationForm()
+
+    return await _render(request, 'recommend.html', {'form': form})